@@ -0,0 +1,475 @@
+"""Implementação local (SQLite) das tabelas TB_MOT_*, para benchmarks e testes de carga sem o Oracle.
+
+Ativada com MOTUS_BANCO=sqlite. As conexões expõem a mesma interface usada no restante do código
+(cursor, execute, executemany com batcherrors, var/setinputsizes para RETURNING INTO, commit,
+rollback), e o SQL escrito para o Oracle é traduzido na hora da execução: binds ':1', sequência
+SQ_MOT_DESAFIO, LISTAGG, FROM DUAL e FETCH FIRST. Erros do SQLite são convertidos para as exceções
+do oracledb com os mesmos códigos ORA tratados pelos módulos (ex.: 2291 para chave estrangeira).
+
+É uma tradução do SQL, não uma camada de repositório: um recurso do Oracle fora da lista acima só
+falha no SQLite. test_banco_sqlite.py prepara no banco local todas as constantes SQL registradas
+com registrar_consultas(), então uma consulta nova que a tradução não cubra aparece nos testes.
+"""
+import oracledb
+import argparse
+import os
+import random
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+CAMINHO_PADRAO = os.path.join('.motus', 'motus_local.sqlite3')
+
+# Sequências do Oracle emuladas pelo AUTOINCREMENT da tabela correspondente (sqlite_sequence).
+SEQUENCIAS = {
+    "SQ_MOT_DESAFIO": "TB_MOT_DESAFIO",
+    "SQ_MOT_PONTUACAO": "TB_MOT_PONTUACAO",
+}
+
+DDL_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS TB_MOT_USUARIO (
+    id_usuario INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    email TEXT,
+    ativo TEXT NOT NULL DEFAULT 'S' CHECK (ativo IN ('S', 'N'))
+);
+CREATE TABLE IF NOT EXISTS TB_MOT_TURMA (
+    id_turma INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS TB_MOT_NIVEL_COMPETENCIA (
+    id_nivel INTEGER PRIMARY KEY,
+    codigo TEXT NOT NULL,
+    descricao TEXT NOT NULL,
+    ordem INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS TB_MOT_AREA_COMPETENCIA (
+    id_area INTEGER PRIMARY KEY,
+    codigo TEXT NOT NULL,
+    descricao TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS TB_MOT_VOLUNTARIO (
+    id_voluntario INTEGER PRIMARY KEY,
+    id_usuario INTEGER NOT NULL REFERENCES TB_MOT_USUARIO (id_usuario)
+);
+CREATE TABLE IF NOT EXISTS TB_MOT_ALUNO (
+    id_aluno INTEGER PRIMARY KEY,
+    id_usuario INTEGER NOT NULL REFERENCES TB_MOT_USUARIO (id_usuario),
+    id_turma INTEGER NOT NULL REFERENCES TB_MOT_TURMA (id_turma),
+    id_nivel_atual INTEGER REFERENCES TB_MOT_NIVEL_COMPETENCIA (id_nivel),
+    streak_atual INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS TB_MOT_DESAFIO (
+    id_desafio INTEGER PRIMARY KEY AUTOINCREMENT,
+    titulo TEXT NOT NULL,
+    descricao TEXT NOT NULL,
+    resposta_correta TEXT NOT NULL,
+    feedback_explicacao TEXT,
+    ativo TEXT NOT NULL DEFAULT 'S' CHECK (ativo IN ('S', 'N')),
+    id_nivel_dificuldade INTEGER NOT NULL REFERENCES TB_MOT_NIVEL_COMPETENCIA (id_nivel),
+    id_voluntario_criador INTEGER NOT NULL REFERENCES TB_MOT_VOLUNTARIO (id_voluntario),
+    id_area_competencia INTEGER NOT NULL REFERENCES TB_MOT_AREA_COMPETENCIA (id_area)
+);
+CREATE TABLE IF NOT EXISTS TB_MOT_PONTUACAO (
+    id_pontuacao INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_aluno INTEGER NOT NULL REFERENCES TB_MOT_ALUNO (id_aluno),
+    id_desafio INTEGER NOT NULL REFERENCES TB_MOT_DESAFIO (id_desafio),
+    acertou INTEGER NOT NULL,
+    pontos INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_desafio_nivel ON TB_MOT_DESAFIO (id_nivel_dificuldade);
+CREATE INDEX IF NOT EXISTS ix_desafio_area ON TB_MOT_DESAFIO (id_area_competencia);
+CREATE INDEX IF NOT EXISTS ix_pontuacao_aluno ON TB_MOT_PONTUACAO (id_aluno);
+CREATE INDEX IF NOT EXISTS ix_pontuacao_desafio ON TB_MOT_PONTUACAO (id_desafio);
+"""
+
+NIVEIS_PADRAO = [
+    (1, "BASICO", "Básico - Lógico-Analítico", 1),
+    (2, "MEDIO", "Médio - Criativo-Adaptativo", 2),
+    (3, "AVANCADO", "Avançado - Estratégico-Complexo", 3),
+]
+AREAS_PADRAO = [
+    (1, "PENSAMENTO_ANALITICO", "Pensamento Analítico"),
+    (2, "CRIATIVIDADE", "Pensamento Criativo"),
+    (3, "RESOLUCAO_PROBLEMAS", "Resolução de Problemas Complexos"),
+    (4, "LETRAMENTO_DIGITAL", "Letramento Tecnológico"),
+    (5, "RESILIENCIA", "Resiliência e Flexibilidade"),
+]
+
+_ORDEM_NO_GROUP_CONCAT = sqlite3.sqlite_version_info >= (3, 44, 0)
+_esquema_criado = set()
+_esquema_lock = threading.Lock()
+
+
+def caminho_banco_local():
+    return os.getenv('MOTUS_SQLITE_CAMINHO', CAMINHO_PADRAO)
+
+
+# --- Tradução do SQL do Oracle ---
+
+_RE_PROXIMO_VALOR = re.compile(r"^\s*SELECT\s+(\w+)\.NEXTVAL\s+FROM\s+DUAL\s*$", re.IGNORECASE)
+_RE_NEXTVAL = re.compile(r"\b(\w+)\.NEXTVAL\b", re.IGNORECASE)
+_RE_RETORNO = re.compile(r"\bRETURNING\s+(.+?)\s+INTO\s+:\w+(\s*,\s*:\w+)*\s*$", re.IGNORECASE | re.DOTALL)
+_RE_LISTAGG = re.compile(
+    r"LISTAGG\s*\((.+?),\s*('[^']*')\s*\)\s*WITHIN\s+GROUP\s*\(\s*ORDER\s+BY\s+(.+?)\)", re.IGNORECASE | re.DOTALL)
+_RE_FROM_DUAL = re.compile(r"\s+FROM\s+DUAL\b", re.IGNORECASE)
+_RE_FETCH_FIRST = re.compile(r"\bFETCH\s+(?:FIRST|NEXT)\s+(\S+)\s+ROWS?\s+ONLY\b", re.IGNORECASE)
+_RE_OFFSET = re.compile(r"\bOFFSET\s+(\S+)\s+ROWS?\b", re.IGNORECASE)
+_RE_BIND_POSICIONAL = re.compile(r"(?<![:\w]):(\d+)\b")
+_RE_USER_TABLES = re.compile(r"\bFROM\s+user_tables\b", re.IGNORECASE)
+
+
+def _traduzir_listagg(match):
+    expressao, separador, ordem = match.groups()
+    if _ORDEM_NO_GROUP_CONCAT:
+        return f"GROUP_CONCAT({expressao}, {separador} ORDER BY {ordem})"
+    return f"GROUP_CONCAT({expressao}, {separador})"
+
+
+@lru_cache(maxsize=256)
+def traduzir_sql(sql):
+    """Traduz um comando escrito para o Oracle; retorna (sql_sqlite, sequencia, tem_retorno).
+
+    'sequencia' é o nome da sequência quando o comando é um 'SELECT <seq>.NEXTVAL FROM DUAL'.
+    """
+    match = _RE_PROXIMO_VALOR.match(sql)
+    if match:
+        return None, match.group(1).upper(), False
+
+    traduzido = _RE_NEXTVAL.sub("NULL", sql)
+    tem_retorno = bool(_RE_RETORNO.search(traduzido))
+    traduzido = _RE_RETORNO.sub(r"RETURNING \1", traduzido)
+    traduzido = _RE_LISTAGG.sub(_traduzir_listagg, traduzido)
+    traduzido = _RE_FROM_DUAL.sub("", traduzido)
+    offset = _RE_OFFSET.search(traduzido)
+    traduzido = _RE_OFFSET.sub("", traduzido)
+    traduzido = _RE_FETCH_FIRST.sub(
+        lambda m: f"LIMIT {m.group(1)}" + (f" OFFSET {offset.group(1)}" if offset else ""), traduzido)
+    traduzido = _RE_USER_TABLES.sub(
+        "FROM (SELECT name AS table_name FROM sqlite_master WHERE type = 'table' AND name LIKE 'TB_MOT_%')", traduzido)
+    traduzido = _RE_BIND_POSICIONAL.sub(r"?\1", traduzido)
+    return traduzido, None, tem_retorno
+
+
+# --- Erros no formato do oracledb ---
+
+class ErroSQLite:
+    """Equivalente ao objeto _Error do oracledb (atributos code, message e offset)."""
+
+    def __init__(self, code, message, offset=0):
+        self.code = code
+        self.message = message
+        self.offset = offset
+
+    def __str__(self):
+        return self.message
+
+
+def _converter_erro(erro, offset=0):
+    mensagem = str(erro)
+    if isinstance(erro, sqlite3.IntegrityError):
+        if "FOREIGN KEY" in mensagem:
+            return oracledb.IntegrityError(ErroSQLite(
+                2291, f"ORA-02291: integrity constraint violated - parent key not found ({mensagem})", offset))
+        if "UNIQUE" in mensagem:
+            return oracledb.IntegrityError(ErroSQLite(1, f"ORA-00001: unique constraint violated ({mensagem})", offset))
+        if "NOT NULL" in mensagem:
+            return oracledb.IntegrityError(ErroSQLite(1400, f"ORA-01400: cannot insert NULL ({mensagem})", offset))
+        return oracledb.IntegrityError(ErroSQLite(2290, f"ORA-02290: check constraint violated ({mensagem})", offset))
+    return oracledb.DatabaseError(ErroSQLite(0, f"SQLite: {mensagem}", offset))
+
+
+# --- Conexão e cursor compatíveis com o oracledb ---
+
+class VariavelSQLite:
+    """Variável de saída (cursor.var) preenchida pelo RETURNING de cada linha do executemany."""
+
+    def __init__(self, arraysize=1):
+        self.valores = [[] for _ in range(arraysize)]
+
+    def getvalue(self, posicao=0):
+        return self.valores[posicao] if posicao < len(self.valores) else []
+
+
+class CursorSQLite:
+    def __init__(self, conexao):
+        self._conexao = conexao
+        self._cursor = conexao._conn.cursor()
+        self._tamanhos_entrada = ()
+        self._erros_lote = []
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self._linhas_prontas = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        if self._linhas_prontas is not None:
+            return iter(self._linhas_prontas)
+        return iter(self._cursor)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+    def var(self, tipo, arraysize=1):
+        return VariavelSQLite(arraysize)
+
+    def setinputsizes(self, *tamanhos):
+        self._tamanhos_entrada = tamanhos
+
+    def getbatcherrors(self):
+        return list(self._erros_lote)
+
+    def _proximo_valor(self, sequencia):
+        tabela = SEQUENCIAS.get(sequencia)
+        if tabela is None:
+            raise oracledb.DatabaseError(ErroSQLite(2289, f"ORA-02289: sequence does not exist ({sequencia})"))
+        self._cursor.execute("UPDATE sqlite_sequence SET seq = seq + 1 WHERE name = ? RETURNING seq", (tabela,))
+        return self._cursor.fetchone()[0]
+
+    def _parametros(self, parametros):
+        if parametros is None:
+            return ()
+        if isinstance(parametros, dict):
+            return {chave.lstrip(':'): valor for chave, valor in parametros.items()}
+        return tuple(parametros)
+
+    def execute(self, sql, parametros=None, **parametros_nomeados):
+        self._linhas_prontas = None
+        traduzido, sequencia, tem_retorno = traduzir_sql(sql)
+        if sequencia:
+            self._linhas_prontas = [(self._proximo_valor(sequencia),)]
+            return self
+        try:
+            self._cursor.execute(traduzido, self._parametros(parametros_nomeados or parametros))
+            if tem_retorno:
+                self._registrar_retorno(self._cursor.fetchall(), 0)
+        except sqlite3.Error as e:
+            raise _converter_erro(e) from e
+        return self
+
+    def _registrar_retorno(self, linhas, posicao):
+        for variavel in self._tamanhos_entrada:
+            if isinstance(variavel, VariavelSQLite):
+                while len(variavel.valores) <= posicao:
+                    variavel.valores.append([])
+                variavel.valores[posicao] = [linha[0] for linha in linhas]
+
+    def executemany(self, sql, linhas, batcherrors=False, **_):
+        self._linhas_prontas = None
+        self._erros_lote = []
+        traduzido, _, tem_retorno = traduzir_sql(sql)
+        linhas = [self._parametros(linha) for linha in linhas]
+        if not tem_retorno and not batcherrors:
+            try:
+                self._cursor.executemany(traduzido, linhas)
+            except sqlite3.Error as e:
+                raise _converter_erro(e) from e
+            return
+        for posicao, linha in enumerate(linhas):
+            try:
+                self._cursor.execute(traduzido, linha)
+                if tem_retorno:
+                    self._registrar_retorno(self._cursor.fetchall(), posicao)
+            except sqlite3.Error as e:
+                if not batcherrors:
+                    raise _converter_erro(e, posicao) from e
+                self._erros_lote.append(_converter_erro(e, posicao).args[0])
+
+    def fetchone(self):
+        if self._linhas_prontas is not None:
+            return self._linhas_prontas.pop(0) if self._linhas_prontas else None
+        return self._cursor.fetchone()
+
+    def fetchmany(self, tamanho=None):
+        if self._linhas_prontas is not None:
+            tamanho = tamanho or self.arraysize
+            linhas, self._linhas_prontas = self._linhas_prontas[:tamanho], self._linhas_prontas[tamanho:]
+            return linhas
+        return self._cursor.fetchmany(tamanho or self.arraysize)
+
+    def fetchall(self):
+        if self._linhas_prontas is not None:
+            linhas, self._linhas_prontas = self._linhas_prontas, []
+            return linhas
+        return self._cursor.fetchall()
+
+
+class ConexaoSQLite:
+    def __init__(self, caminho):
+        self._conn = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+
+    def cursor(self):
+        return CursorSQLite(self)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def criar_esquema(caminho=None):
+    """Cria as tabelas TB_MOT_*, os dados de referência fixos e as linhas das sequências."""
+    caminho = caminho or caminho_banco_local()
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    conn = sqlite3.connect(caminho)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(DDL_ESQUEMA)
+        conn.executemany("INSERT OR IGNORE INTO TB_MOT_NIVEL_COMPETENCIA VALUES (?, ?, ?, ?)", NIVEIS_PADRAO)
+        conn.executemany("INSERT OR IGNORE INTO TB_MOT_AREA_COMPETENCIA VALUES (?, ?, ?)", AREAS_PADRAO)
+        for tabela in SEQUENCIAS.values():
+            if not conn.execute("SELECT 1 FROM sqlite_sequence WHERE name = ?", (tabela,)).fetchone():
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, 0)", (tabela,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@contextmanager
+def conexao_sqlite(caminho=None):
+    """Equivalente local de database.conexao_banco(): cria o esquema na primeira vez e produz uma conexão."""
+    caminho = caminho or caminho_banco_local()
+    if caminho not in _esquema_criado:
+        with _esquema_lock:
+            if caminho not in _esquema_criado:
+                criar_esquema(caminho)
+                _esquema_criado.add(caminho)
+    conn = ConexaoSQLite(caminho)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+# --- Gerador de dados sintéticos ---
+
+_PALAVRAS_TEMA = [
+    "porcentagem", "frações", "lógica", "algoritmos", "probabilidade", "energia", "reciclagem", "música",
+    "futebol", "jogos", "orçamento", "mapas", "padrões", "estatística", "programação", "clima",
+    "geometria", "redes", "dados", "equações", "ritmo", "mercado", "transporte", "água",
+]
+_NOMES = ["Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabi", "Heitor", "Isa", "João",
+          "Kauã", "Larissa", "Marcos", "Nina", "Otávio", "Paula", "Rafa", "Sofia", "Tiago", "Vitória"]
+_SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Lima", "Pereira", "Costa", "Almeida", "Rocha", "Nunes"]
+
+
+def gerar_dados_sinteticos(alunos=200, desafios=1000, pontuacoes=10000, voluntarios=20, turmas=10,
+                           caminho=None, recriar=False, semente=42):
+    """Popula o banco local com dados sintéticos nas quantidades pedidas; retorna o caminho do arquivo."""
+    caminho = caminho or caminho_banco_local()
+    if recriar and os.path.exists(caminho):
+        os.remove(caminho)
+        _esquema_criado.discard(caminho)
+    criar_esquema(caminho)
+    _esquema_criado.add(caminho)
+    aleatorio = random.Random(semente)
+
+    conn = sqlite3.connect(caminho)
+    try:
+        proximo_usuario = (conn.execute("SELECT MAX(id_usuario) FROM TB_MOT_USUARIO").fetchone()[0] or 0) + 1
+        proxima_turma = (conn.execute("SELECT MAX(id_turma) FROM TB_MOT_TURMA").fetchone()[0] or 0) + 1
+        proximo_voluntario = (conn.execute("SELECT MAX(id_voluntario) FROM TB_MOT_VOLUNTARIO").fetchone()[0] or 0) + 1
+        proximo_aluno = (conn.execute("SELECT MAX(id_aluno) FROM TB_MOT_ALUNO").fetchone()[0] or 0) + 1
+
+        def nome():
+            return f"{aleatorio.choice(_NOMES)} {aleatorio.choice(_SOBRENOMES)}"
+
+        ids_turmas = list(range(proxima_turma, proxima_turma + turmas))
+        conn.executemany("INSERT INTO TB_MOT_TURMA VALUES (?, ?)",
+                         [(id_turma, f"Turma {id_turma:03d}") for id_turma in ids_turmas])
+
+        usuarios, ids_voluntarios = [], []
+        for deslocamento in range(voluntarios):
+            usuarios.append((proximo_usuario, nome(), None, 'S'))
+            ids_voluntarios.append((proximo_voluntario + deslocamento, proximo_usuario))
+            proximo_usuario += 1
+        alunos_linhas = []
+        for deslocamento in range(alunos):
+            ativo = 'S' if aleatorio.random() > 0.05 else 'N'
+            usuarios.append((proximo_usuario, nome(), None, ativo))
+            alunos_linhas.append((proximo_aluno + deslocamento, proximo_usuario, aleatorio.choice(ids_turmas),
+                                  aleatorio.choice(NIVEIS_PADRAO)[0], aleatorio.randint(0, 30)))
+            proximo_usuario += 1
+        conn.executemany("INSERT INTO TB_MOT_USUARIO VALUES (?, ?, ?, ?)", usuarios)
+        conn.executemany("INSERT INTO TB_MOT_VOLUNTARIO VALUES (?, ?)", ids_voluntarios)
+        conn.executemany("INSERT INTO TB_MOT_ALUNO VALUES (?, ?, ?, ?, ?)", alunos_linhas)
+
+        linhas_desafios = []
+        for _ in range(desafios):
+            tema = " ".join(aleatorio.sample(_PALAVRAS_TEMA, 2))
+            linhas_desafios.append((
+                f"Desafio: {tema}",
+                f"[Foco: Lógico-Analítico] Bora entender {tema} com exemplos do dia a dia.\n\nPERGUNTA: Como {tema} aparece no seu corre?",
+                "Resposta de referência",
+                "Explicação do acerto. \n💡 DICA MENTAL: quebre o problema em partes.",
+                'S' if aleatorio.random() > 0.1 else 'N',
+                aleatorio.choice(NIVEIS_PADRAO)[0],
+                aleatorio.choice(ids_voluntarios)[0],
+                aleatorio.choice(AREAS_PADRAO)[0],
+            ))
+        conn.executemany("""
+            INSERT INTO TB_MOT_DESAFIO (titulo, descricao, resposta_correta, feedback_explicacao, ativo,
+                                        id_nivel_dificuldade, id_voluntario_criador, id_area_competencia)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, linhas_desafios)
+
+        faixa_desafios = conn.execute("SELECT MIN(id_desafio), MAX(id_desafio) FROM TB_MOT_DESAFIO").fetchone()
+        if pontuacoes and alunos_linhas and faixa_desafios[0] is not None:
+            lote = []
+            for _ in range(pontuacoes):
+                acertou = 1 if aleatorio.random() < 0.65 else 0
+                lote.append((aleatorio.choice(alunos_linhas)[0], aleatorio.randint(*faixa_desafios),
+                             acertou, aleatorio.choice((10, 20, 30)) if acertou else 0))
+                if len(lote) >= 10000:
+                    conn.executemany("INSERT INTO TB_MOT_PONTUACAO (id_aluno, id_desafio, acertou, pontos) VALUES (?, ?, ?, ?)", lote)
+                    lote = []
+            if lote:
+                conn.executemany("INSERT INTO TB_MOT_PONTUACAO (id_aluno, id_desafio, acertou, pontos) VALUES (?, ?, ?, ?)", lote)
+        conn.commit()
+    finally:
+        conn.close()
+    return caminho
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Cria e popula o banco SQLite local do Motus")
+    parser.add_argument("--caminho", help=f"Arquivo do banco (padrão: MOTUS_SQLITE_CAMINHO ou {CAMINHO_PADRAO})")
+    parser.add_argument("--alunos", type=int, default=200)
+    parser.add_argument("--desafios", type=int, default=1000)
+    parser.add_argument("--pontuacoes", type=int, default=10000)
+    parser.add_argument("--voluntarios", type=int, default=20)
+    parser.add_argument("--turmas", type=int, default=10)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--recriar", action="store_true", help="Apaga o arquivo existente antes de popular")
+    args = parser.parse_args(argumentos)
+
+    caminho = gerar_dados_sinteticos(args.alunos, args.desafios, args.pontuacoes, args.voluntarios, args.turmas,
+                                     caminho=args.caminho, recriar=args.recriar, semente=args.semente)
+    print(f"Banco local populado: {caminho}")
+    print(f"   - Alunos: {args.alunos} | Desafios: {args.desafios} | Pontuações: {args.pontuacoes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""Micro-benchmarks dos caminhos críticos, sem rede e sem o Oracle.
+
+Uso: python benchmark.py [--tamanhos pequeno medio] [--iteracoes 30] [--comparar resultado_anterior.json]
+
+Usa o banco SQLite local (banco_sqlite.py) populado em cada tamanho e um cliente Gemini falso que
+devolve respostas no formato real. Para cada caso mede latência (p50/p90/p99), vazão e pico de
+memória (tracemalloc, em uma execução separada para não distorcer os tempos) e grava os resultados
+em JSON para comparação entre execuções.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+TAMANHOS = {
+    "pequeno": {"alunos": 100, "desafios": 500, "pontuacoes": 5000},
+    "medio": {"alunos": 1000, "desafios": 5000, "pontuacoes": 100000},
+    "grande": {"alunos": 5000, "desafios": 20000, "pontuacoes": 500000},
+}
+
+EXERCICIOS_EXEMPLO = [
+    {
+        "id_nivel_dificuldade": nivel,
+        "titulo": f"Título do nível {nivel}",
+        "material_explicativo": "[Foco: Lógico-Analítico] " + "Explicação com analogia do dia a dia. " * 8,
+        "pergunta_interativa": "Se o ingresso custa R$ 40 e tem 25% de desconto, quanto você paga?",
+        "resposta_correta": "R$ 30",
+        "feedback_explicacao": "25% de 40 é 10, então 40 - 10 = 30. \n💡 DICA MENTAL: desenhe no caderno.",
+    }
+    for nivel in (1, 2, 3)
+]
+
+# Consultas da exportação de estatísticas antes da leitura agrupada (três leituras de TB_MOT_DESAFIO),
+# mantidas só como referência de comparação para CONSULTA_DESAFIOS_AGRUPADOS.
+CONSULTAS_ESTATISTICAS_SEPARADAS = (
+    """SELECT COUNT(*), SUM(CASE WHEN ativo = 'S' THEN 1 ELSE 0 END), SUM(CASE WHEN ativo = 'N' THEN 1 ELSE 0 END),
+              COUNT(DISTINCT id_area_competencia), COUNT(DISTINCT id_nivel_dificuldade)
+       FROM TB_MOT_DESAFIO""",
+    """SELECT nc.codigo, COUNT(d.id_desafio) FROM TB_MOT_NIVEL_COMPETENCIA nc
+       LEFT JOIN TB_MOT_DESAFIO d ON nc.id_nivel = d.id_nivel_dificuldade
+       GROUP BY nc.codigo, nc.ordem ORDER BY nc.ordem""",
+    """SELECT ac.codigo, COUNT(d.id_desafio) FROM TB_MOT_AREA_COMPETENCIA ac
+       LEFT JOIN TB_MOT_DESAFIO d ON ac.id_area = d.id_area_competencia
+       GROUP BY ac.codigo ORDER BY ac.codigo""",
+)
+
+
+def resposta_simulada(texto_extra=0):
+    """Texto no formato devolvido pelo modelo: prosa, o array JSON e, opcionalmente, texto depois."""
+    corpo = json.dumps(EXERCICIOS_EXEMPLO, ensure_ascii=False, indent=2)
+    sufixo = ("\n\nObservação: [revise] os exemplos com a turma. " * texto_extra) if texto_extra else ""
+    return f"Claro! Aqui está o conteúdo:\n```json\n{corpo}\n```{sufixo}"
+
+
+class _RespostaFalsa:
+    def __init__(self, texto):
+        self.text = texto
+
+
+class ErroApiFalso(Exception):
+    """Erro com o atributo 'code', como os erros do google-genai."""
+
+    def __init__(self, code, mensagem):
+        super().__init__(f"{code} {mensagem}")
+        self.code = code
+
+
+class _CacheContextoFalso:
+    def __init__(self, name, expira_em):
+        self.name = name
+        self.expira_em = expira_em
+
+
+class CachesGeminiLocais:
+    """Substituto local de client.caches (context caching): guarda o prefixo em memória e respeita o TTL."""
+
+    def __init__(self):
+        self.criados = {}
+        self._sequencia = 0
+
+    def create(self, model, config):
+        self._sequencia += 1
+        ttl = float(str(config.ttl).rstrip("s"))
+        cache = _CacheContextoFalso(f"cachedContents/local-{self._sequencia}", time.monotonic() + ttl)
+        self.criados[cache.name] = cache
+        return cache
+
+    def validar(self, config):
+        """Falha como a API quando o cached_content informado não existe ou já expirou."""
+        nome = getattr(config, "cached_content", None)
+        if not nome:
+            return
+        cache = self.criados.get(nome)
+        if cache is None or time.monotonic() >= cache.expira_em:
+            raise ErroApiFalso(404, f"Cached content {nome} not found")
+
+
+class _ModelosFalsos:
+    def __init__(self, texto, caches):
+        self._texto = texto
+        self._caches = caches
+
+    def generate_content(self, model, contents, config=None, **_):
+        self._caches.validar(config)
+        return _RespostaFalsa(self._texto)
+
+    def generate_content_stream(self, model, contents, config=None, **_):
+        self._caches.validar(config)
+        for inicio in range(0, len(self._texto), 64):
+            yield _RespostaFalsa(self._texto[inicio:inicio + 64])
+
+
+class _ModelosFalsosAssincronos:
+    def __init__(self, modelos):
+        self._modelos = modelos
+
+    async def generate_content(self, model, contents, config=None, **_):
+        return self._modelos.generate_content(model, contents, config=config)
+
+
+class _AioFalso:
+    def __init__(self, modelos):
+        self.models = _ModelosFalsosAssincronos(modelos)
+
+
+class ClienteGeminiFalso:
+    """Substituto do genai.Client: responde na hora, sem rede, sempre com o mesmo texto."""
+
+    def __init__(self, texto=None):
+        self.caches = CachesGeminiLocais()
+        self.models = _ModelosFalsos(texto or resposta_simulada(), self.caches)
+        self.aio = _AioFalso(self.models)
+
+
+class _CursorDescricao:
+    """Guarda apenas a description do cursor, para medir _row_to_dict sem incluir a consulta."""
+
+    def __init__(self, description):
+        self.description = description
+
+
+def _percentil(valores_ordenados, percentual):
+    if not valores_ordenados:
+        return 0.0
+    posicao = (len(valores_ordenados) - 1) * percentual / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    return valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * (posicao - inferior)
+
+
+def medir(nome, tamanho, funcao, iteracoes, aquecimento=2, preparar=None):
+    """Executa a função várias vezes e devolve o dicionário de resultados do caso.
+
+    preparar, se informado, roda antes de cada execução, fora do tempo medido.
+    """
+    preparar = preparar or (lambda: None)
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        for _ in range(aquecimento):
+            preparar()
+            funcao()
+        tempos = []
+        for _ in range(iteracoes):
+            preparar()
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+
+        preparar()
+        tracemalloc.start()
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    tempos.sort()
+    total = sum(tempos)
+    return {
+        "caso": nome,
+        "tamanho": tamanho,
+        "iteracoes": iteracoes,
+        "media_ms": round(statistics.fmean(tempos) * 1000, 3),
+        "p50_ms": round(_percentil(tempos, 50) * 1000, 3),
+        "p90_ms": round(_percentil(tempos, 90) * 1000, 3),
+        "p99_ms": round(_percentil(tempos, 99) * 1000, 3),
+        "operacoes_por_s": round(iteracoes / total, 2) if total > 0 else 0,
+        "pico_memoria_kb": round(pico / 1024, 1),
+    }
+
+
+def _reiniciar_estado_local(diretorio, tamanho):
+    """Aponta os arquivos locais para o tamanho corrente e descarta os singletons do tamanho anterior.
+
+    Resumo de progresso, índices de busca e de duplicatas e o cache de referências são criados uma
+    vez por processo; sem isso, os tamanhos seguintes usariam marcas d'água e dados do primeiro banco.
+    """
+    import busca_desafios
+    import dados_referencia
+    import duplicatas
+    import resumo_progresso
+
+    for variavel, arquivo in (('MOTUS_BUSCA_CAMINHO', 'indice_busca.sqlite3'),
+                              ('MOTUS_DUPLICATAS_CAMINHO', 'indice_duplicatas.sqlite3'),
+                              ('MOTUS_EXPORTACAO_ESTADO', 'exportacao_incremental.json'),
+                              ('MOTUS_RESUMO_PROGRESSO_CAMINHO', 'resumo_progresso.sqlite3')):
+        os.environ[variavel] = os.path.join(diretorio, f"{tamanho}_{arquivo}")
+    busca_desafios._indice = None
+    duplicatas._indice = None
+    resumo_progresso._resumo = None
+    dados_referencia._cache_referencias = None
+
+
+def _casos(tamanho):
+    """Monta os casos (nome, função) para o tamanho corrente; o banco local já deve estar populado."""
+    import busca_desafios
+    import consultas_json
+    import crud_desafios
+    import duplicatas
+    from database import conexao_banco
+    from ia_educacao import GeradorConteudoMotus
+
+    gerador = GeradorConteudoMotus(client=ClienteGeminiFalso())
+    resposta_curta = resposta_simulada()
+    resposta_longa = resposta_simulada(texto_extra=500)
+
+    with conexao_banco() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(crud_desafios.CONSULTA_DESAFIO_POR_ID.replace("WHERE id_desafio = :1", ""))
+            linhas_desafios = cursor.fetchall()
+            cursor_descricao = _CursorDescricao(cursor.description)
+
+    def row_to_dict():
+        for linha in linhas_desafios:
+            crud_desafios._row_to_dict(cursor_descricao, linha)
+
+    def pagina_desafios():
+        with conexao_banco() as conn:
+            with conn.cursor() as cursor:
+                crud_desafios._buscar_pagina(cursor, crud_desafios._filtros_padrao(ativo='S'),
+                                             apos_id=len(linhas_desafios) // 2)
+
+    def estatisticas_separadas():
+        with conexao_banco() as conn:
+            with conn.cursor() as cursor:
+                for consulta in CONSULTAS_ESTATISTICAS_SEPARADAS:
+                    cursor.execute(consulta)
+                    cursor.fetchall()
+
+    def estatisticas_agrupadas():
+        grupos, _ = consultas_json._consultar_desafios_agrupados()
+        consultas_json._agregar_estatisticas(grupos, *consultas_json._referencias_para_grupos(grupos))
+
+    casos = [
+        ("extrair_json_da_resposta[curta]", lambda: gerador.extrair_json_da_resposta(resposta_curta)),
+        ("extrair_json_da_resposta[longa]", lambda: gerador.extrair_json_da_resposta(resposta_longa)),
+        ("gerar_conteudo_educacional[stub]", lambda: gerador.gerar_conteudo_educacional("Porcentagem", usar_cache=False)),
+        ("gerar_conteudo_streaming[stub]", lambda: list(gerador.gerar_conteudo_streaming("Porcentagem", usar_cache=False))),
+        ("salvar_conteudo_no_banco", lambda: gerador.salvar_conteudo_no_banco(EXERCICIOS_EXEMPLO, "Porcentagem", 1, 1,
+                                                                              ignorar_similares=True)),
+        ("exportar_desafios_nivel", consultas_json.exportar_desafios_nivel),
+        ("exportar_progresso_alunos[json]", lambda: consultas_json.exportar_progresso_alunos("json")),
+        ("exportar_progresso_alunos[jsonl]", lambda: consultas_json.exportar_progresso_alunos("jsonl")),
+        ("exportar_progresso_alunos[jsonl.gz]", lambda: consultas_json.exportar_progresso_alunos("jsonl.gz")),
+        ("exportar_estatisticas_desafios", consultas_json.exportar_estatisticas_desafios),
+        # Só a parte de banco da exportação: as três consultas antigas contra a leitura agrupada.
+        ("estatisticas_desafios[3 consultas]", estatisticas_separadas),
+        ("estatisticas_desafios[agrupada]", estatisticas_agrupadas),
+        # Completa: a marca d'água é zerada antes de cada execução. Sem novidades: mede só o custo fixo.
+        ("exportar_incremental[pontuacoes, completa]", lambda: consultas_json.exportar_incremental("pontuacoes"),
+         lambda: consultas_json.reiniciar_exportacao_incremental("pontuacoes")),
+        ("exportar_incremental[pontuacoes, sem novidades]", lambda: consultas_json.exportar_incremental("pontuacoes")),
+        ("pagina_desafios[keyset]", pagina_desafios),
+        ("buscar_desafios[bm25]", lambda: busca_desafios.buscar_desafios("porcentagem no futebol", limite=10)),
+        ("temas_similares[contencao]", lambda: duplicatas.temas_similares("Porcentagem no futebol")),
+        ("desafio_similar[lsh]", lambda: duplicatas.obter_indice_duplicatas().similares(
+            duplicatas.texto_exercicio(EXERCICIOS_EXEMPLO[0]), tipo='desafio', limiar=duplicatas.limiar_desafio())),
+        (f"_row_to_dict[{TAMANHOS[tamanho]['desafios']} linhas]", row_to_dict),
+    ]
+    return casos
+
+
+def executar(tamanhos, iteracoes, filtro=None):
+    diretorio_original = os.getcwd()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="motus_bench_") as diretorio:
+        os.chdir(diretorio)
+        os.environ['MOTUS_BANCO'] = 'sqlite'
+        # Sem limite de cota: o cliente falso responde na hora e o objetivo é medir o código local.
+        os.environ['MOTUS_GEMINI_RPM'] = '0'
+        os.environ['MOTUS_GEMINI_TPM'] = '0'
+        os.environ['MOTUS_CACHE_CAMINHO'] = os.path.join(diretorio, 'cache.sqlite3')
+        import banco_sqlite
+        try:
+            for tamanho in tamanhos:
+                caminho = os.path.join(diretorio, f"bench_{tamanho}.sqlite3")
+                os.environ['MOTUS_SQLITE_CAMINHO'] = caminho
+                print(f"Populando banco local '{tamanho}' {TAMANHOS[tamanho]}...")
+                banco_sqlite.gerar_dados_sinteticos(caminho=caminho, **TAMANHOS[tamanho])
+                _reiniciar_estado_local(diretorio, tamanho)
+                for nome, funcao, *preparar in _casos(tamanho):
+                    if filtro and filtro not in nome:
+                        continue
+                    resultado = medir(nome, tamanho, funcao, iteracoes, preparar=preparar[0] if preparar else None)
+                    resultados.append(resultado)
+                    print(f"  {nome:<40} p50 {resultado['p50_ms']:>9.2f} ms | p99 {resultado['p99_ms']:>9.2f} ms | "
+                          f"{resultado['operacoes_por_s']:>9.1f} op/s | pico {resultado['pico_memoria_kb']:>9.1f} KB")
+        finally:
+            os.chdir(diretorio_original)
+    return resultados
+
+
+def comparar(resultados, caminho_anterior):
+    """Imprime a variação de p50 e pico de memória em relação a uma execução anterior."""
+    with open(caminho_anterior, 'r', encoding='utf-8') as arquivo:
+        anteriores = {(r["caso"], r["tamanho"]): r for r in json.load(arquivo)["resultados"]}
+    print(f"\nComparação com {caminho_anterior}:")
+    for resultado in resultados:
+        anterior = anteriores.get((resultado["caso"], resultado["tamanho"]))
+        if not anterior or not anterior["p50_ms"]:
+            continue
+        variacao = (resultado["p50_ms"] - anterior["p50_ms"]) / anterior["p50_ms"] * 100
+        variacao_memoria = resultado["pico_memoria_kb"] - anterior["pico_memoria_kb"]
+        print(f"  {resultado['caso']:<40} [{resultado['tamanho']}] p50 {variacao:+7.1f}% | memória {variacao_memoria:+10.1f} KB")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks do Motus.IA (sem rede)")
+    parser.add_argument("--tamanhos", nargs="+", choices=list(TAMANHOS), default=["pequeno", "medio"])
+    parser.add_argument("--iteracoes", type=int, default=20)
+    parser.add_argument("--filtro", help="Executa apenas os casos cujo nome contém este texto")
+    parser.add_argument("--saida", help="Arquivo JSON de resultados (padrão: benchmark_<timestamp>.json)")
+    parser.add_argument("--comparar", help="Arquivo JSON de uma execução anterior para comparação")
+    args = parser.parse_args(argumentos)
+
+    resultados = executar(args.tamanhos, max(1, args.iteracoes), args.filtro)
+    saida = args.saida or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump({
+            "executado_em": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "iteracoes": args.iteracoes,
+            "resultados": resultados,
+        }, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em: {saida}")
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+from database import conexao_banco, identidade_banco, ler_inteiro_ambiente
+from metricas import registrar_consultas
+import oracledb
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+# --- Consultas SQL do Índice de Busca ---
+CONSULTA_DESAFIOS_PARA_INDICE = """
+    SELECT id_desafio, titulo, descricao, feedback_explicacao, ativo
+    FROM TB_MOT_DESAFIO
+    WHERE id_desafio > :1
+    ORDER BY id_desafio
+"""
+CONSULTA_DESAFIO_PARA_INDICE = """
+    SELECT id_desafio, titulo, descricao, feedback_explicacao, ativo
+    FROM TB_MOT_DESAFIO
+    WHERE id_desafio = :1
+"""
+# Quantidade, maior id e soma dos ids até a marca d'água (só a chave primária), comparados com os do
+# índice para perceber desafios removidos ou gravados abaixo da marca fora deste processo; a soma
+# pega um apagado e um atrasado no mesmo intervalo, que não mudam a quantidade.
+CONSULTA_CONTAGEM_DESAFIOS = """
+    SELECT COUNT(*), COALESCE(MAX(id_desafio), 0), COALESCE(SUM(id_desafio), 0)
+    FROM TB_MOT_DESAFIO
+    WHERE id_desafio <= :1
+"""
+CONSULTA_IDS_DESAFIOS = """
+    SELECT id_desafio
+    FROM TB_MOT_DESAFIO
+    WHERE id_desafio <= :1
+"""
+
+registrar_consultas(globals())
+
+# --- Configuração do Índice ---
+CAMINHO_PADRAO = os.path.join('.motus', 'indice_busca.sqlite3')
+BM25_K1 = 1.2
+BM25_B = 0.75
+PESO_TITULO = 3  # ocorrências no título contam como PESO_TITULO ocorrências no texto
+TAMANHO_LOTE_INDEXACAO = 500
+INTERVALO_VERIFICACAO_PADRAO = 300  # segundos entre as conferências de desafios removidos ou atrasados
+
+PALAVRAS_VAZIAS = frozenset("""
+a o as os um uma uns umas de do da dos das no na nos nas em por para pra pro pelo pela pelos pelas
+com sem sob sobre entre ate e ou mas nem que se ja nao sim como quando onde qual quais quem cujo
+ao aos a as isso isto esse essa este esta aquele aquela eles elas ele ela voce voces nos vos eu tu
+me te lhe lhes seu sua seus suas meu minha teu tua nosso nossa mais menos muito muita muitos muitas
+ser estar ter ha foi era sao esta estao tem vai vao pode cada todo toda todos todas tambem so
+""".split())
+
+DDL_INDICE = """
+CREATE TABLE IF NOT EXISTS documentos (
+    id_desafio INTEGER PRIMARY KEY,
+    titulo TEXT NOT NULL,
+    ativo TEXT NOT NULL,
+    comprimento INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    termo TEXT NOT NULL,
+    id_desafio INTEGER NOT NULL,
+    frequencia INTEGER NOT NULL,
+    PRIMARY KEY (termo, id_desafio)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_postings_desafio ON postings (id_desafio);
+CREATE TABLE IF NOT EXISTS pendentes (
+    id_desafio INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+
+def _sem_acentos(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+def _normalizar_termo(termo):
+    """Reduz plurais comuns do português ao singular (lições -> licao, papéis -> papel, jogos -> jogo)."""
+    if len(termo) <= 3:
+        return termo
+    for sufixo, troca in (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"), ("ns", "m")):
+        if termo.endswith(sufixo):
+            return termo[:-len(sufixo)] + troca
+    if termo.endswith("s") and not termo.endswith("ss"):
+        return termo[:-1]
+    return termo
+
+
+_RE_PALAVRA = re.compile(r"[a-z0-9]+")
+
+
+def tokenizar(texto):
+    """Tokens do texto: minúsculas, sem acentos, sem palavras vazias e com plurais reduzidos."""
+    if not texto:
+        return []
+    palavras = _RE_PALAVRA.findall(_sem_acentos(texto.lower()))
+    return [_normalizar_termo(p) for p in palavras if len(p) > 1 and p not in PALAVRAS_VAZIAS]
+
+
+def _texto(valor):
+    """Colunas CLOB chegam como LOB no oracledb; as demais já são str ou None."""
+    if valor is None:
+        return ""
+    return valor.read() if hasattr(valor, 'read') else str(valor)
+
+
+class IndiceBusca:
+    """Índice invertido local (SQLite) sobre título, descrição e feedback dos desafios, com ranking BM25.
+
+    A sincronização é incremental: lê do banco só os desafios com id_desafio acima da marca
+    d'água e os IDs notificados como alterados (notificar_alteracao), por isso cada busca custa
+    uma consulta pequena em vez de uma varredura da tabela. De tempos em tempos, conferir()
+    compara quantidade e ids com os do índice para achar desafios apagados ou confirmados
+    abaixo da marca e acerta só a diferença.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or os.getenv('MOTUS_BUSCA_CAMINHO', CAMINHO_PADRAO)
+        self.intervalo_verificacao = ler_inteiro_ambiente('MOTUS_BUSCA_INTERVALO_VERIFICACAO',
+                                                          INTERVALO_VERIFICACAO_PADRAO)
+        self._verificado_em = 0.0
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        colunas = [linha[1] for linha in self._conn.execute("PRAGMA table_info(documentos)")]
+        if "tamanho_texto" in colunas:
+            # Índice de uma versão anterior, que guardava o tamanho dos textos: é refeito do zero.
+            self._conn.executescript("DROP TABLE documentos; DROP TABLE postings; DROP TABLE pendentes; DROP TABLE meta;")
+        self._conn.executescript(DDL_INDICE)
+        self._lock = threading.Lock()
+        identidade = identidade_banco()
+        if self._meta("banco") != identidade:
+            self._limpar()
+            self._definir_meta("banco", identidade)
+            self._conn.commit()
+
+    # --- Metadados ---
+    def _meta(self, chave, padrao=None):
+        linha = self._conn.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else padrao
+
+    def _definir_meta(self, chave, valor):
+        self._conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)", (chave, str(valor)))
+
+    def _limpar(self):
+        for tabela in ("documentos", "postings", "pendentes", "meta"):
+            self._conn.execute(f"DELETE FROM {tabela}")
+
+    # --- Manutenção ---
+    def _remover(self, id_desafio):
+        self._conn.execute("DELETE FROM postings WHERE id_desafio = ?", (id_desafio,))
+        self._conn.execute("DELETE FROM documentos WHERE id_desafio = ?", (id_desafio,))
+
+    def _indexar(self, linha):
+        id_desafio, titulo, descricao, feedback, ativo = linha
+        titulo, descricao, feedback = _texto(titulo), _texto(descricao), _texto(feedback)
+        frequencias = Counter(tokenizar(descricao) + tokenizar(feedback))
+        for termo in tokenizar(titulo):
+            frequencias[termo] += PESO_TITULO
+        self._remover(id_desafio)
+        self._conn.execute("INSERT INTO documentos (id_desafio, titulo, ativo, comprimento) VALUES (?, ?, ?, ?)",
+                           (id_desafio, titulo, ativo, sum(frequencias.values())))
+        self._conn.executemany("INSERT INTO postings (termo, id_desafio, frequencia) VALUES (?, ?, ?)",
+                               [(termo, id_desafio, freq) for termo, freq in frequencias.items()])
+
+    def notificar_alteracao(self, id_desafio):
+        """Marca um desafio alterado (ex.: atualização ou inativação) para reindexar na próxima sincronização."""
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO pendentes (id_desafio) VALUES (?)", (id_desafio,))
+            self._conn.commit()
+
+    def sincronizar(self):
+        """Indexa os desafios novos e os notificados; retorna a quantidade reindexada (None se sem conexão)."""
+        with self._lock:
+            marca = int(self._meta("ultimo_id", 0))
+            pendentes = [linha[0] for linha in self._conn.execute("SELECT id_desafio FROM pendentes")]
+            indexados = 0
+            with conexao_banco() as conn:
+                if not conn:
+                    return None
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.arraysize = TAMANHO_LOTE_INDEXACAO
+                        cursor.execute(CONSULTA_DESAFIOS_PARA_INDICE, (marca,))
+                        for linha in cursor:
+                            self._indexar(linha)
+                            marca = max(marca, linha[0])
+                            indexados += 1
+                        for id_desafio in pendentes:
+                            if id_desafio > marca:
+                                continue
+                            cursor.execute(CONSULTA_DESAFIO_PARA_INDICE, (id_desafio,))
+                            linha = cursor.fetchone()
+                            if linha:
+                                self._indexar(linha)
+                            else:
+                                self._remover(id_desafio)
+                            indexados += 1
+                except oracledb.DatabaseError as e:
+                    self._conn.rollback()
+                    print(f"Erro ao atualizar o índice de busca: {e}")
+                    return None
+            self._conn.execute("DELETE FROM pendentes")
+            self._definir_meta("ultimo_id", marca)
+            self._conn.commit()
+            return indexados
+
+    def reconstruir(self):
+        """Descarta o índice e indexa todos os desafios novamente."""
+        with self._lock:
+            self._limpar()
+            self._definir_meta("banco", identidade_banco())
+            self._conn.commit()
+        return self.sincronizar()
+
+    def conferir(self, forcar=False):
+        """Acha desafios apagados ou gravados abaixo da marca d'água e acerta só esses no índice.
+
+        Roda no máximo a cada MOTUS_BUSCA_INTERVALO_VERIFICACAO segundos (padrão 300): compara
+        quantidade, maior id e soma dos ids até a marca com os do índice e, só se divergirem, lê os
+        ids da tabela. Retorna quantos desafios foram indexados ou removidos (None se sem conexão).
+        """
+        agora = time.monotonic()
+        if not forcar and agora - self._verificado_em < self.intervalo_verificacao:
+            return 0
+        self._verificado_em = agora
+        with self._lock:
+            marca = int(self._meta("ultimo_id", 0))
+            contagem_local = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(id_desafio), 0), COALESCE(SUM(id_desafio), 0) FROM documentos "
+                "WHERE id_desafio <= ?",
+                (marca,)).fetchone()
+            alterados = 0
+            with conexao_banco() as conn:
+                if not conn:
+                    return None
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute(CONSULTA_CONTAGEM_DESAFIOS, (marca,))
+                        if tuple(int(valor) for valor in cursor.fetchone()) == tuple(contagem_local):
+                            return 0
+                        cursor.arraysize = TAMANHO_LOTE_INDEXACAO
+                        cursor.execute(CONSULTA_IDS_DESAFIOS, (marca,))
+                        ids_banco = {linha[0] for linha in cursor}
+                        ids_locais = {linha[0] for linha in self._conn.execute(
+                            "SELECT id_desafio FROM documentos WHERE id_desafio <= ?", (marca,))}
+                        for id_desafio in ids_locais - ids_banco:
+                            self._remover(id_desafio)
+                            alterados += 1
+                        for id_desafio in sorted(ids_banco - ids_locais):
+                            cursor.execute(CONSULTA_DESAFIO_PARA_INDICE, (id_desafio,))
+                            linha = cursor.fetchone()
+                            if linha:
+                                self._indexar(linha)
+                                alterados += 1
+                except oracledb.DatabaseError as e:
+                    self._conn.rollback()
+                    print(f"Erro ao conferir o índice de busca: {e}")
+                    return None
+            self._conn.commit()
+            return alterados
+
+    # --- Consulta ---
+    def buscar(self, consulta, limite=10, somente_ativos=False):
+        """Retorna até 'limite' resultados (id_desafio, titulo, ativo, pontuação) ordenados por BM25."""
+        termos = list(dict.fromkeys(tokenizar(consulta)))
+        if not termos:
+            return []
+        with self._lock:
+            total_documentos, comprimento_total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(comprimento), 0) FROM documentos").fetchone()
+            if not total_documentos:
+                return []
+            comprimento_medio = comprimento_total / total_documentos
+            pontuacoes = {}
+            for termo in termos:
+                postings = self._conn.execute(
+                    "SELECT p.id_desafio, p.frequencia, d.comprimento FROM postings p "
+                    "JOIN documentos d ON d.id_desafio = p.id_desafio WHERE p.termo = ?", (termo,)).fetchall()
+                if not postings:
+                    continue
+                idf = math.log(1 + (total_documentos - len(postings) + 0.5) / (len(postings) + 0.5))
+                for id_desafio, frequencia, comprimento in postings:
+                    normalizacao = BM25_K1 * (1 - BM25_B + BM25_B * comprimento / comprimento_medio)
+                    pontuacoes[id_desafio] = pontuacoes.get(id_desafio, 0.0) + idf * frequencia * (BM25_K1 + 1) / (frequencia + normalizacao)
+            if not pontuacoes:
+                return []
+            ordenados = sorted(pontuacoes.items(), key=lambda item: (-item[1], item[0]))
+            resultados = []
+            for id_desafio, pontuacao in ordenados:
+                titulo, ativo = self._conn.execute(
+                    "SELECT titulo, ativo FROM documentos WHERE id_desafio = ?", (id_desafio,)).fetchone()
+                if somente_ativos and ativo != 'S':
+                    continue
+                resultados.append((id_desafio, titulo, ativo, round(pontuacao, 3)))
+                if len(resultados) >= limite:
+                    break
+            return resultados
+
+    def estatisticas(self):
+        with self._lock:
+            documentos = self._conn.execute("SELECT COUNT(*) FROM documentos").fetchone()[0]
+            termos = self._conn.execute("SELECT COUNT(DISTINCT termo) FROM postings").fetchone()[0]
+            return {"documentos": documentos, "termos": termos, "ultimo_id": int(self._meta("ultimo_id", 0))}
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def obter_indice():
+    """Índice de busca compartilhado pelo processo (None se o disco não estiver disponível)."""
+    global _indice
+    if _indice is None:
+        with _indice_lock:
+            if _indice is None:
+                try:
+                    _indice = IndiceBusca()
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Índice de busca indisponível: {e}")
+                    return None
+    return _indice
+
+
+def notificar_alteracao(id_desafio):
+    """Avisa o índice de que um desafio mudou (chamado pelo CRUD após UPDATE)."""
+    indice = obter_indice()
+    if indice:
+        indice.notificar_alteracao(id_desafio)
+
+
+def buscar_desafios(consulta, limite=10, somente_ativos=False):
+    """Sincroniza o índice com o banco e executa a busca; retorna a lista de resultados."""
+    indice = obter_indice()
+    if not indice:
+        return []
+    if indice.sincronizar() is not None:
+        indice.conferir()
+    return indice.buscar(consulta, limite, somente_ativos)
+
+
+def exibir_busca(consulta, limite=10, somente_ativos=False):
+    """Busca e imprime os resultados; retorna True se algo foi encontrado."""
+    resultados = buscar_desafios(consulta, limite, somente_ativos)
+    if not resultados:
+        print("Nenhum desafio encontrado para essa busca.")
+        return False
+    print(f"\n--- Resultados para '{consulta}' ---")
+    for id_desafio, titulo, ativo, pontuacao in resultados:
+        status = "Ativo" if ativo == 'S' else "Inativo"
+        print(f"ID: {id_desafio} - {titulo} ({status}) [relevância {pontuacao:.2f}]")
+    return True
+
+
+def menu_busca():
+    """Busca interativa pelo menu de desafios."""
+    print("\n--- Buscar Desafios ---")
+    print("Digite as palavras da busca, 'R' para reconstruir o índice ou Enter para voltar.")
+    while True:
+        consulta = input("\nBuscar: ").strip()
+        if not consulta:
+            return
+        if consulta.upper() == 'R':
+            indice = obter_indice()
+            if indice:
+                total = indice.reconstruir()
+                if total is not None:
+                    print(f"Índice reconstruído: {total} desafios indexados.")
+            continue
+        exibir_busca(consulta)
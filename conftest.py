@@ -0,0 +1,33 @@
+import pytest
+
+import banco_sqlite
+import busca_desafios
+import dados_referencia
+import duplicatas
+import resumo_progresso
+
+# Arquivos locais de cada componente, apontados para o diretório temporário do teste.
+ARQUIVOS_LOCAIS = (
+    ('MOTUS_BUSCA_CAMINHO', 'indice_busca.sqlite3'),
+    ('MOTUS_DUPLICATAS_CAMINHO', 'indice_duplicatas.sqlite3'),
+    ('MOTUS_EXPORTACAO_ESTADO', 'exportacao_incremental.json'),
+    ('MOTUS_RESUMO_PROGRESSO_CAMINHO', 'resumo_progresso.sqlite3'),
+    ('MOTUS_CACHE_CAMINHO', 'cache.sqlite3'),
+)
+
+
+@pytest.fixture
+def banco_local(tmp_path, monkeypatch):
+    """Banco SQLite local populado com dados sintéticos; retorna o caminho do arquivo."""
+    monkeypatch.chdir(tmp_path)
+    caminho = str(tmp_path / 'motus_local.sqlite3')
+    monkeypatch.setenv('MOTUS_BANCO', 'sqlite')
+    monkeypatch.setenv('MOTUS_SQLITE_CAMINHO', caminho)
+    for variavel, arquivo in ARQUIVOS_LOCAIS:
+        monkeypatch.setenv(variavel, str(tmp_path / arquivo))
+    monkeypatch.setattr(busca_desafios, '_indice', None)
+    monkeypatch.setattr(duplicatas, '_indice', None)
+    monkeypatch.setattr(resumo_progresso, '_resumo', None)
+    monkeypatch.setattr(dados_referencia, '_cache_referencias', None)
+    banco_sqlite.gerar_dados_sinteticos(caminho=caminho, alunos=20, desafios=60, pontuacoes=300)
+    return caminho
@@ -1,25 +1,64 @@
 import oracledb
+import gzip
+import importlib
+import io
+import itertools
 import json
+import os
+import time
 from datetime import datetime
-from database import conectar_banco
+from database import conexao_banco, identidade_banco, ler_inteiro_ambiente
+from dados_referencia import invalidar_referencias, obter_referencias
+from resumo_progresso import reconstruir_resumo_progresso, totais_progresso
+from metricas import cronometrar, medido, registrar_consultas
+
+# Linhas buscadas do banco por round trip nas exportações em streaming
+TAMANHO_LOTE_EXPORTACAO = 1000
+
+# Formatos de saída das exportações de desafios por nível e de progresso dos alunos.
+# jsonl.zst depende do pacote zstandard; arrow e parquet, do pyarrow (dependências opcionais).
+FORMATOS_EXPORTACAO = {
+    "json": "JSON",
+    "jsonl": "JSON Lines",
+    "jsonl.gz": "JSON Lines comprimido com gzip",
+    "jsonl.zst": "JSON Lines comprimido com zstd (requer zstandard)",
+    "arrow": "Arrow IPC (requer pyarrow)",
+    "parquet": "Parquet com zstd (requer pyarrow)",
+}
+FORMATOS_COLUNARES = ("arrow", "parquet")
+DEPENDENCIAS_FORMATOS = {"jsonl.zst": "zstandard", "arrow": "pyarrow.ipc", "parquet": "pyarrow.parquet"}
+
+# Colunas (nome, tipo pyarrow) das exportações colunares e das linhas JSON Lines de desafios.
+ESQUEMA_DESAFIOS_NIVEL = (
+    ("id_nivel", "int64"), ("nivel_codigo", "string"), ("nivel_descricao", "string"), ("nivel_ordem", "int64"),
+    ("id_desafio", "int64"), ("titulo", "string"), ("ativo", "string"),
+)
+ESQUEMA_PROGRESSO_ALUNOS = (
+    ("nome", "string"), ("turma", "string"), ("nivel_atual", "string"), ("streak", "int64"),
+    ("total_desafios", "int64"), ("desafios_acertados", "int64"), ("taxa_acerto", "float64"), ("pontos_totais", "int64"),
+)
+
+# Marcas d'água das exportações incrementais (último id exportado e tamanho confirmado de cada arquivo)
+CAMINHO_ESTADO_INCREMENTAL = os.path.join('.motus', 'exportacao_incremental.json')
+# Ids abaixo da marca d'água relidos a cada exportação. Ids de sequência são reservados no INSERT e
+# não na confirmação, então uma transação mais lenta pode confirmar um id menor depois que a marca
+# já passou dele; a janela cobre esses atrasos e os ids já exportados dentro dela não se repetem.
+JANELA_IDS_INCREMENTAL = 1000
 
 # --- Consultas SQL Globais ---
 
 CONSULTA_DESAFIOS_POR_NIVEL = """
       SELECT nc.id_nivel,
-             nc.codigo                                      as nivel_codigo,
-             nc.descricao                                   as nivel_descricao,
-             nc.ordem                                       as nivel_ordem,
-             COUNT(d.id_desafio)                            as total_desafios,
-             SUM(CASE WHEN d.ativo = 'S' THEN 1 ELSE 0 END) as desafios_ativos,
-             SUM(CASE WHEN d.ativo = 'N' THEN 1 ELSE 0 END) as desafios_inativos,
-             LISTAGG(d.id_desafio || ':' || d.titulo, '; ')
-                WITHIN GROUP (ORDER BY d.id_desafio) as desafios_lista
+             nc.codigo       as nivel_codigo,
+             nc.descricao    as nivel_descricao,
+             nc.ordem        as nivel_ordem,
+             d.id_desafio,
+             d.titulo,
+             d.ativo
       FROM TB_MOT_NIVEL_COMPETENCIA nc
           LEFT JOIN TB_MOT_DESAFIO d
       ON nc.id_nivel = d.id_nivel_dificuldade
-      GROUP BY nc.id_nivel, nc.codigo, nc.descricao, nc.ordem
-      ORDER BY nc.ordem
+      ORDER BY nc.ordem, nc.id_nivel, d.id_desafio
       """
 
 CONSULTA_PROGRESSO_ALUNOS = """
@@ -40,31 +79,61 @@ CONSULTA_PROGRESSO_ALUNOS = """
       ORDER BY t.nome, u.nome
       """
 
-CONSULTA_ESTATISTICAS_GERAIS_DESAFIOS = """
-      SELECT COUNT(*)                                     as total_desafios,
-             SUM(CASE WHEN ativo = 'S' THEN 1 ELSE 0 END) as desafios_ativos,
-             SUM(CASE WHEN ativo = 'N' THEN 1 ELSE 0 END) as desafios_inativos,
-             COUNT(DISTINCT id_area_competencia)          as areas_diferentes,
-             COUNT(DISTINCT id_nivel_dificuldade)         as niveis_diferentes
-      FROM TB_MOT_DESAFIO
+# Só os alunos ativos; os totais de pontuação vêm do resumo incremental (resumo_progresso.py).
+CONSULTA_ALUNOS_PROGRESSO = """
+      SELECT a.id_aluno,
+             u.nome        as nome_aluno,
+             t.nome        as turma,
+             nc.codigo     as nivel_atual,
+             a.streak_atual
+      FROM TB_MOT_ALUNO a
+               JOIN TB_MOT_USUARIO u ON a.id_usuario = u.id_usuario
+               JOIN TB_MOT_TURMA t ON a.id_turma = t.id_turma
+               LEFT JOIN TB_MOT_NIVEL_COMPETENCIA nc ON a.id_nivel_atual = nc.id_nivel
+      WHERE u.ativo = 'S'
+      ORDER BY t.nome, u.nome, a.id_aluno
       """
 
-CONSULTA_DESAFIOS_AGRUPADOS_POR_NIVEL = """
-     SELECT nc.codigo, COUNT(d.id_desafio) as total
-     FROM TB_MOT_NIVEL_COMPETENCIA nc
-              LEFT JOIN TB_MOT_DESAFIO d ON nc.id_nivel = d.id_nivel_dificuldade
-     GROUP BY nc.codigo, nc.ordem
-     ORDER BY nc.ordem
-     """
-
-CONSULTA_DESAFIOS_AGRUPADOS_POR_AREA = """
-    SELECT ac.codigo, COUNT(d.id_desafio) as total
-    FROM TB_MOT_AREA_COMPETENCIA ac
-             LEFT JOIN TB_MOT_DESAFIO d ON ac.id_area = d.id_area_competencia
-    GROUP BY ac.codigo
-    ORDER BY ac.codigo
+# Uma única leitura de TB_MOT_DESAFIO: as estatísticas gerais, por nível e por área saem destes grupos.
+CONSULTA_DESAFIOS_AGRUPADOS = """
+    SELECT id_nivel_dificuldade, id_area_competencia, ativo, COUNT(*) as total
+    FROM TB_MOT_DESAFIO
+    GROUP BY id_nivel_dificuldade, id_area_competencia, ativo
+    """
+
+CONSULTA_DESAFIOS_INCREMENTAL = """
+    SELECT id_desafio, titulo, descricao, resposta_correta, feedback_explicacao, ativo,
+           id_nivel_dificuldade, id_area_competencia, id_voluntario_criador
+    FROM TB_MOT_DESAFIO
+    WHERE id_desafio > :1
+    ORDER BY id_desafio
     """
 
+CONSULTA_PONTUACOES_INCREMENTAL = """
+    SELECT id_pontuacao, id_aluno, id_desafio, acertou, pontos
+    FROM TB_MOT_PONTUACAO
+    WHERE id_pontuacao > :1
+    ORDER BY id_pontuacao
+    """
+
+registrar_consultas(globals())
+
+# Tipos de exportação incremental: consulta por marca d'água (a primeira coluna é o id), nomes das
+# colunas no JSON e arquivo de destino.
+EXPORTACOES_INCREMENTAIS = {
+    "desafios": {
+        "consulta": CONSULTA_DESAFIOS_INCREMENTAL,
+        "colunas": ("id_desafio", "titulo", "descricao", "resposta_correta", "feedback_explicacao", "ativo",
+                    "id_nivel_dificuldade", "id_area_competencia", "id_voluntario_criador"),
+        "arquivo": "desafios_incremental.jsonl",
+    },
+    "pontuacoes": {
+        "consulta": CONSULTA_PONTUACOES_INCREMENTAL,
+        "colunas": ("id_pontuacao", "id_aluno", "id_desafio", "acertou", "pontos"),
+        "arquivo": "pontuacoes_incremental.jsonl",
+    },
+}
+
 
 def exportar_dados_json():
     """Menu para exportação de dados em formato JSON."""
@@ -72,212 +141,680 @@ def exportar_dados_json():
     print("1. Exportar desafios por nível")
     print("2. Exportar progresso dos alunos")
     print("3. Exportar estatísticas de desafios")
-    print("4. Voltar")
+    print("4. Exportação incremental (JSON Lines)")
+    print("5. Reconstruir resumo de progresso dos alunos")
+    print("6. Voltar")
 
     opcao = input("Escolha uma opção: ")
 
     if opcao == "1":
-        exportar_desafios_nivel()
+        _exportar_em_formatos(exportar_desafios_nivel, _escolher_formatos(tuple(FORMATOS_EXPORTACAO)))
     elif opcao == "2":
-        exportar_progresso_alunos()
+        _exportar_em_formatos(exportar_progresso_alunos, _escolher_formatos(tuple(FORMATOS_EXPORTACAO)))
     elif opcao == "3":
         exportar_estatisticas_desafios()
     elif opcao == "4":
+        menu_exportacao_incremental()
+    elif opcao == "5":
+        somadas = reconstruir_resumo_progresso()
+        if somadas is None:
+            print("Não foi possível reconstruir o resumo de progresso.")
+        else:
+            print(f"Resumo de progresso reconstruído: {somadas} pontuação(ões) somada(s).")
+    elif opcao == "6":
         return
     else:
         print("Opção inválida!")
 
 
-def exportar_desafios_nivel():
-    """Exporta desafios agrupados por nível de dificuldade para um arquivo JSON."""
-    print("\n--- Exportar Desafios por Nível ---")
-    conn = conectar_banco()
-    if not conn:
-        print("Erro: Não foi possível conectar ao banco de dados.")
-        return
-
+def _importar_opcional(modulo, formato):
+    """Importa a dependência opcional de um formato, com uma mensagem clara se ela faltar."""
     try:
-        with conn.cursor() as cursor:
-            cursor.execute(CONSULTA_DESAFIOS_POR_NIVEL)
-            resultados = cursor.fetchall()
-
-            if not resultados:
-                print("Nenhum dado encontrado para exportar!")
-                return
-
-            dados_exportacao = {
-                "metadata": {
-                    "exportacao_tipo": "desafios_por_nivel",
-                    "data_exportacao": datetime.now().isoformat(),
-                    "total_niveis": len(resultados),
-                    "sistema": "Sistema de Educação Adaptativa"
-                },
-                "niveis": []
+        return importlib.import_module(modulo)
+    except ImportError:
+        pacote = modulo.split('.')[0]
+        raise RuntimeError(f"O formato {formato} requer o pacote '{pacote}' (pip install {pacote})") from None
+
+
+def _abrir_saida_texto(nome_arquivo):
+    """Abre o arquivo de saída em modo texto, comprimindo conforme a extensão (.gz ou .zst)."""
+    if nome_arquivo.endswith(".gz"):
+        return gzip.open(nome_arquivo, 'wt', encoding='utf-8', compresslevel=6)
+    if nome_arquivo.endswith(".zst"):
+        zstandard = _importar_opcional("zstandard", "jsonl.zst")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(nome_arquivo, 'wb')), encoding='utf-8')
+    return open(nome_arquivo, 'w', encoding='utf-8')
+
+
+class GravadorColunar:
+    """Grava lotes de linhas em Arrow IPC ou Parquet (zstd) com esquema fixo, sem manter tudo em memória."""
+
+    def __init__(self, nome_arquivo, formato, esquema):
+        self.pa = _importar_opcional("pyarrow", formato)
+        self.esquema = self.pa.schema([(nome, getattr(self.pa, tipo)()) for nome, tipo in esquema])
+        if formato == "parquet":
+            parquet = _importar_opcional("pyarrow.parquet", formato)
+            self._escritor = parquet.ParquetWriter(nome_arquivo, self.esquema, compression="zstd")
+        else:
+            ipc = _importar_opcional("pyarrow.ipc", formato)
+            self._escritor = ipc.new_file(nome_arquivo, self.esquema)
+        self.linhas = 0
+
+    def escrever_linhas(self, linhas):
+        """Grava uma lista de tuplas na ordem das colunas do esquema."""
+        colunas = list(zip(*linhas)) or [[] for _ in self.esquema]
+        self.escrever_tabela(self.pa.Table.from_arrays(
+            [self.pa.array(coluna, type=campo.type) for coluna, campo in zip(colunas, self.esquema)], schema=self.esquema))
+
+    def escrever_tabela(self, tabela):
+        """Grava uma tabela pyarrow (por exemplo, um lote do fetch_df_batches do oracledb)."""
+        if tabela.schema != self.esquema:
+            tabela = tabela.rename_columns(self.esquema.names).cast(self.esquema)
+        self._escritor.write_table(tabela)
+        self.linhas += tabela.num_rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self._escritor.close()
+        return False
+
+
+def _relatorio_gravacao(nome_arquivo, formato, linhas, segundos):
+    print(f"Formato {formato}: {linhas} linhas | {os.path.getsize(nome_arquivo) / 1024:.1f} KB | "
+          f"gravação {segundos * 1000:.1f} ms")
+
+
+def _escolher_formatos(formatos, permitir_todos=True):
+    """Pergunta o formato de saída; com permitir_todos, a última opção exporta em todos para comparar."""
+    print("Formato de saída:")
+    for numero, formato in enumerate(formatos, 1):
+        print(f"{numero}. {FORMATOS_EXPORTACAO[formato]}")
+    if permitir_todos:
+        print(f"{len(formatos) + 1}. Todos (comparar tamanho e tempo)")
+    escolha = input("Escolha o formato [padrão: 1]: ").strip()
+    if permitir_todos and escolha == str(len(formatos) + 1):
+        return list(formatos)
+    if escolha.isdigit() and 1 <= int(escolha) <= len(formatos):
+        return [formatos[int(escolha) - 1]]
+    return [formatos[0]]
+
+
+def _exportar_em_formatos(exportar, formatos):
+    """Chama exportar(formato) para cada formato e, se houver mais de um, compara tamanho e tempo.
+
+    As dependências opcionais são importadas antes, para não somar o import ao tempo do primeiro
+    formato que as usa; formatos sem a dependência instalada são pulados com um aviso.
+    """
+    resultados = []
+    for formato in formatos:
+        if formato in DEPENDENCIAS_FORMATOS:
+            try:
+                _importar_opcional(DEPENDENCIAS_FORMATOS[formato], formato)
+            except RuntimeError as e:
+                print(f"\n{e}")
+                continue
+        inicio = time.perf_counter()
+        nome_arquivo = exportar(formato)
+        if nome_arquivo:
+            resultados.append((formato, os.path.getsize(nome_arquivo), time.perf_counter() - inicio))
+    if len(resultados) > 1:
+        print("\nComparação de formatos:")
+        for formato, tamanho, segundos in sorted(resultados, key=lambda r: r[1]):
+            print(f"   - {formato:<10} {tamanho / 1024:>10.1f} KB | {segundos * 1000:>8.1f} ms")
+
+
+def _agrupar_desafios_por_nivel(cursor):
+    """Agrupa as linhas ordenadas de CONSULTA_DESAFIOS_POR_NIVEL em uma única passada.
+
+    Gera um dicionário por nível, com a lista de desafios e as estatísticas calculadas
+    durante a própria leitura do cursor.
+    """
+    nivel_data = None
+    for id_nivel, nivel_codigo, nivel_descricao, nivel_ordem, id_desafio, titulo, ativo in cursor:
+        if nivel_data is None or nivel_data["id_nivel"] != id_nivel:
+            if nivel_data is not None:
+                yield _finalizar_estatisticas_nivel(nivel_data)
+            nivel_data = {
+                "id_nivel": id_nivel,
+                "codigo": nivel_codigo,
+                "descricao": nivel_descricao,
+                "ordem": nivel_ordem,
+                "estatisticas": {"total_desafios": 0, "desafios_ativos": 0, "desafios_inativos": 0},
+                "desafios": []
             }
-            total_desafios_geral = 0
-            total_ativos_geral = 0
-
-            for linha in resultados:
-                id_nivel, nivel_codigo, nivel_descricao, nivel_ordem, total_desafios, ativos, inativos, desafios_lista = linha
-                desafios_detalhados = []
-                if desafios_lista:
-                    for desafio_info in desafios_lista.split('; '):
-                        if ':' in desafio_info:
-                            desafio_id, desafio_titulo = desafio_info.split(':', 1)
-                            desafios_detalhados.append({"id": int(desafio_id), "titulo": desafio_titulo.strip()})
-
-                nivel_data = {
-                    "id_nivel": id_nivel,
-                    "codigo": nivel_codigo,
-                    "descricao": nivel_descricao,
-                    "ordem": nivel_ordem,
-                    "estatisticas": {
-                        "total_desafios": total_desafios or 0,
-                        "desafios_ativos": ativos or 0,
-                        "desafios_inativos": inativos or 0,
-                        "taxa_ativos": round((ativos / total_desafios * 100), 2) if total_desafios and total_desafios > 0 else 0
-                    },
-                    "desafios": desafios_detalhados
-                }
-                dados_exportacao["niveis"].append(nivel_data)
-                total_desafios_geral += (total_desafios or 0)
-                total_ativos_geral += (ativos or 0)
-
-            dados_exportacao["metadata"]["total_desafios"] = total_desafios_geral
-            dados_exportacao["metadata"]["total_ativos"] = total_ativos_geral
-            dados_exportacao["metadata"]["taxa_ativos_geral"] = round((total_ativos_geral / total_desafios_geral * 100), 2) if total_desafios_geral > 0 else 0
-
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nome_arquivo = f"desafios_por_nivel_{timestamp}.json"
-
-            with open(nome_arquivo, 'w', encoding='utf-8') as arquivo_json:
-                json.dump(dados_exportacao, arquivo_json, ensure_ascii=False, indent=2)
-
-            print(f"Sucesso: Dados exportados para o arquivo: {nome_arquivo}")
-            print("\nResumo da Exportação:")
-            print(f"   - Níveis de competência: {len(resultados)}")
-            print(f"   - Total de desafios: {total_desafios_geral}")
-            print(f"   - Desafios ativos: {total_ativos_geral}")
-            print(f"   - Taxa de ativos: {dados_exportacao['metadata']['taxa_ativos_geral']}%")
-            print("\nDetalhes por Nível:")
-            for nivel in dados_exportacao["niveis"]:
-                stats = nivel["estatisticas"]
-                print(f"   - {nivel['codigo']} ({nivel['descricao']}): {stats['desafios_ativos']} ativos / {stats['total_desafios']} total")
-
-    except oracledb.Error as e:
-        print(f"Erro ao executar consulta no banco: {e}")
-    except Exception as e:
-        print(f"Erro durante exportação: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-
-def exportar_progresso_alunos():
-    """Exporta o progresso dos alunos para um arquivo JSON."""
-    print("\n--- Exportar Progresso dos Alunos ---")
-    conn = conectar_banco()
-    if not conn:
-        print("Erro: Não foi possível conectar ao banco de dados.")
+        if id_desafio is None:
+            continue
+        stats = nivel_data["estatisticas"]
+        stats["total_desafios"] += 1
+        if ativo == 'S':
+            stats["desafios_ativos"] += 1
+        elif ativo == 'N':
+            stats["desafios_inativos"] += 1
+        nivel_data["desafios"].append({"id": id_desafio, "titulo": titulo})
+    if nivel_data is not None:
+        yield _finalizar_estatisticas_nivel(nivel_data)
+
+
+def _finalizar_estatisticas_nivel(nivel_data):
+    stats = nivel_data["estatisticas"]
+    total = stats["total_desafios"]
+    stats["taxa_ativos"] = round((stats["desafios_ativos"] / total * 100), 2) if total > 0 else 0
+    return nivel_data
+
+
+def _exportar_desafios_detalhados(formato):
+    """Grava as linhas de CONSULTA_DESAFIOS_POR_NIVEL (um desafio por linha) em JSON Lines ou formato colunar.
+
+    Em Arrow/Parquet com o Oracle, os lotes vêm do fetch_df_batches do oracledb já no esquema
+    ESQUEMA_DESAFIOS_NIVEL, sem criar tuplas Python. Retorna o nome do arquivo gerado, ou None.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nome_arquivo = f"desafios_por_nivel_{timestamp}.{formato}"
+    colunas = [nome for nome, _ in ESQUEMA_DESAFIOS_NIVEL]
+    with conexao_banco() as conn:
+        if not conn:
+            print("Erro: Não foi possível conectar ao banco de dados.")
+            return None
+
+        try:
+            inicio = time.perf_counter()
+            if formato in FORMATOS_COLUNARES:
+                with GravadorColunar(nome_arquivo, formato, ESQUEMA_DESAFIOS_NIVEL) as gravador:
+                    if hasattr(conn, "fetch_df_batches"):
+                        for lote in conn.fetch_df_batches(CONSULTA_DESAFIOS_POR_NIVEL, size=TAMANHO_LOTE_EXPORTACAO,
+                                                          requested_schema=gravador.esquema):
+                            gravador.escrever_tabela(gravador.pa.table(lote))
+                    else:
+                        with conn.cursor() as cursor:
+                            cursor.arraysize = TAMANHO_LOTE_EXPORTACAO
+                            cursor.execute(CONSULTA_DESAFIOS_POR_NIVEL)
+                            for lote in iter(cursor.fetchmany, []):
+                                gravador.escrever_linhas(lote)
+                total_linhas = gravador.linhas
+            else:
+                total_linhas = 0
+                with conn.cursor() as cursor, _abrir_saida_texto(nome_arquivo) as arquivo:
+                    cursor.arraysize = TAMANHO_LOTE_EXPORTACAO
+                    cursor.prefetchrows = TAMANHO_LOTE_EXPORTACAO + 1
+                    cursor.execute(CONSULTA_DESAFIOS_POR_NIVEL)
+                    for linha in cursor:
+                        arquivo.write(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + "\n")
+                        total_linhas += 1
+            segundos = time.perf_counter() - inicio
+        except Exception as e:
+            print(f"Erro durante exportação: {e}")
+            if os.path.exists(nome_arquivo):
+                os.remove(nome_arquivo)
+            return None
+
+    print(f"Sucesso: Dados exportados para o arquivo: {nome_arquivo}")
+    _relatorio_gravacao(nome_arquivo, formato, total_linhas, segundos)
+    return nome_arquivo
+
+
+@medido("motus_etapa_segundos", etapa="exportacao", exportador="desafios_nivel")
+def exportar_desafios_nivel(formato="json"):
+    """Exporta desafios agrupados por nível de dificuldade para um arquivo JSON.
+
+    Os desafios são lidos como linhas de detalhe ordenadas por nível e agrupados no cliente,
+    sem concatenação de strings no banco. Nos demais formatos de FORMATOS_EXPORTACAO as linhas
+    de detalhe são gravadas sem agrupamento. No JSON, cada nível vai para o arquivo assim que
+    fica completo. Retorna o nome do arquivo gerado, ou None.
+    """
+    print("\n--- Exportar Desafios por Nível ---")
+    if formato != "json":
+        return _exportar_desafios_detalhados(formato)
+    with conexao_banco() as conn:
+        if not conn:
+            print("Erro: Não foi possível conectar ao banco de dados.")
+            return None
+
+        nome_arquivo = None
+        try:
+            with conn.cursor() as cursor:
+                cursor.arraysize = TAMANHO_LOTE_EXPORTACAO
+                cursor.prefetchrows = TAMANHO_LOTE_EXPORTACAO + 1
+                cursor.execute(CONSULTA_DESAFIOS_POR_NIVEL)
+
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                nome_arquivo = f"desafios_por_nivel_{timestamp}.json"
+
+                # Cada nível é gravado assim que o gerador o completa; só o resumo de cada nível
+                # fica em memória, e os totais gerais vão no metadata, ao final do arquivo.
+                resumo_niveis = []
+                inicio = time.perf_counter()
+                with open(nome_arquivo, 'w', encoding='utf-8') as arquivo_json, \
+                        cronometrar("motus_etapa_segundos", etapa="json_dump", exportador="desafios_nivel"):
+                    arquivo_json.write('{\n  "niveis": [')
+                    for nivel in _agrupar_desafios_por_nivel(cursor):
+                        registro = json.dumps(nivel, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+                        arquivo_json.write(("\n    " if not resumo_niveis else ",\n    ") + registro)
+                        stats = nivel["estatisticas"]
+                        resumo_niveis.append((nivel["codigo"], nivel["descricao"], stats["desafios_ativos"],
+                                              stats["total_desafios"]))
+
+                    total_desafios_geral = sum(total for _, _, _, total in resumo_niveis)
+                    total_ativos_geral = sum(ativos for _, _, ativos, _ in resumo_niveis)
+                    metadata = {
+                        "exportacao_tipo": "desafios_por_nivel",
+                        "data_exportacao": datetime.now().isoformat(),
+                        "total_niveis": len(resumo_niveis),
+                        "sistema": "Sistema de Educação Adaptativa",
+                        "total_desafios": total_desafios_geral,
+                        "total_ativos": total_ativos_geral,
+                        "taxa_ativos_geral": round((total_ativos_geral / total_desafios_geral * 100), 2) if total_desafios_geral > 0 else 0
+                    }
+                    arquivo_json.write('\n  ],\n  "metadata": '
+                                       + json.dumps(metadata, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+                                       + '\n}\n')
+
+                if not resumo_niveis:
+                    os.remove(nome_arquivo)
+                    print("Nenhum dado encontrado para exportar!")
+                    return None
+
+                print(f"Sucesso: Dados exportados para o arquivo: {nome_arquivo}")
+                _relatorio_gravacao(nome_arquivo, formato, total_desafios_geral, time.perf_counter() - inicio)
+                print("\nResumo da Exportação:")
+                print(f"   - Níveis de competência: {len(resumo_niveis)}")
+                print(f"   - Total de desafios: {total_desafios_geral}")
+                print(f"   - Desafios ativos: {total_ativos_geral}")
+                print(f"   - Taxa de ativos: {metadata['taxa_ativos_geral']}%")
+                print("\nDetalhes por Nível:")
+                for codigo, descricao, ativos, total in resumo_niveis:
+                    print(f"   - {codigo} ({descricao}): {ativos} ativos / {total} total")
+                return nome_arquivo
+
+        except oracledb.Error as e:
+            print(f"Erro ao executar consulta no banco: {e}")
+        except Exception as e:
+            print(f"Erro durante exportação: {e}")
+        if nome_arquivo and os.path.exists(nome_arquivo):
+            os.remove(nome_arquivo)
+        return None
+
+
+def _aluno_para_dict(linha):
+    """Converte uma linha de CONSULTA_PROGRESSO_ALUNOS no registro exportado."""
+    nome, turma, nivel, streak, total_desafios, acertos, pontos = linha
+    taxa_acerto = round((acertos / total_desafios) * 100, 1) if total_desafios and total_desafios > 0 else 0
+    return {
+        "nome": nome,
+        "turma": turma,
+        "nivel_atual": nivel or "Não definido",
+        "streak": streak or 0,
+        "desempenho": {
+            "total_desafios": total_desafios or 0,
+            "desafios_acertados": acertos or 0,
+            "taxa_acerto": taxa_acerto,
+            "pontos_totais": pontos or 0
+        }
+    }
+
+
+def _linhas_progresso(cursor):
+    """Linhas no formato de CONSULTA_PROGRESSO_ALUNOS.
+
+    Com o resumo incremental disponível, lê só os alunos e junta os totais pré-calculados (custo
+    proporcional ao número de alunos); senão, agrega todas as pontuações no banco.
+    """
+    totais = totais_progresso()
+    if totais is None:
+        cursor.execute(CONSULTA_PROGRESSO_ALUNOS)
+        yield from cursor
         return
+    cursor.execute(CONSULTA_ALUNOS_PROGRESSO)
+    for id_aluno, nome, turma, nivel, streak in cursor:
+        yield (nome, turma, nivel, streak) + tuple(totais.get(id_aluno, (0, 0, 0)))
+
+
+def _aluno_para_linha(aluno_data):
+    """Registro de _aluno_para_dict achatado na ordem de ESQUEMA_PROGRESSO_ALUNOS."""
+    desempenho = aluno_data["desempenho"]
+    return (aluno_data["nome"], aluno_data["turma"], aluno_data["nivel_atual"], aluno_data["streak"],
+            desempenho["total_desafios"], desempenho["desafios_acertados"], desempenho["taxa_acerto"],
+            desempenho["pontos_totais"])
+
+
+def _gravar_progresso_texto(nome_arquivo, formato, linhas):
+    """Grava os alunos em JSON ou JSON Lines (comprimido conforme a extensão); retorna (total, primeiro)."""
+    total_alunos = 0
+    primeiro = None
+    with _abrir_saida_texto(nome_arquivo) as arquivo:
+        if formato == "json":
+            arquivo.write('{\n  "exportado_em": ' + json.dumps(datetime.now().isoformat()) + ',\n  "alunos": [')
+        for linha in linhas:
+            aluno_data = _aluno_para_dict(linha)
+            registro = json.dumps(aluno_data, ensure_ascii=False)
+            if formato == "json":
+                arquivo.write(("\n    " if total_alunos == 0 else ",\n    ") + registro)
+            else:
+                arquivo.write(registro + "\n")
+            if primeiro is None:
+                primeiro = aluno_data
+            total_alunos += 1
+        if formato == "json":
+            arquivo.write(f'\n  ],\n  "total_alunos": {total_alunos}\n}}\n')
+    return total_alunos, primeiro
+
+
+def _gravar_progresso_colunar(nome_arquivo, formato, linhas):
+    """Grava os alunos em Arrow/Parquet em lotes de TAMANHO_LOTE_EXPORTACAO; retorna (total, primeiro)."""
+    primeiro = None
+    with GravadorColunar(nome_arquivo, formato, ESQUEMA_PROGRESSO_ALUNOS) as gravador:
+        alunos = map(_aluno_para_dict, linhas)
+        for lote in iter(lambda: list(itertools.islice(alunos, TAMANHO_LOTE_EXPORTACAO)), []):
+            primeiro = primeiro or lote[0]
+            gravador.escrever_linhas([_aluno_para_linha(aluno_data) for aluno_data in lote])
+    return gravador.linhas, primeiro
+
+
+@medido("motus_etapa_segundos", etapa="exportacao", exportador="progresso_alunos")
+def exportar_progresso_alunos(formato=None):
+    """Exporta o progresso dos alunos em streaming, gravando cada aluno assim que é lido do banco.
+
+    O cursor é percorrido em lotes de TAMANHO_LOTE_EXPORTACAO linhas. Os totais de cada aluno vêm
+    do resumo incremental de pontuações, então o custo não cresce com o número de pontuações.
+    formato: "json" (objeto com a lista de alunos), "jsonl" (também comprimido: "jsonl.gz" ou
+    "jsonl.zst") ou colunar ("arrow", "parquet", com o desempenho em colunas próprias).
+    Retorna o nome do arquivo gerado, ou None.
+    """
+    print("\n--- Exportar Progresso dos Alunos ---")
+    if formato is None:
+        formato = _escolher_formatos(tuple(FORMATOS_EXPORTACAO), permitir_todos=False)[0]
+    with conexao_banco() as conn:
+        if not conn:
+            print("Erro: Não foi possível conectar ao banco de dados.")
+            return None
+
+        nome_arquivo = None
+        try:
+            with conn.cursor() as cursor:
+                cursor.arraysize = TAMANHO_LOTE_EXPORTACAO
+                cursor.prefetchrows = TAMANHO_LOTE_EXPORTACAO + 1
+                linhas = _linhas_progresso(cursor)
+
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                nome_arquivo = f"progresso_alunos_{timestamp}.{formato}"
+                inicio = time.perf_counter()
+                if formato in FORMATOS_COLUNARES:
+                    total_alunos, primeiro = _gravar_progresso_colunar(nome_arquivo, formato, linhas)
+                else:
+                    total_alunos, primeiro = _gravar_progresso_texto(nome_arquivo, formato, linhas)
+                segundos = time.perf_counter() - inicio
+
+                if not total_alunos:
+                    os.remove(nome_arquivo)
+                    print("Nenhum aluno encontrado!")
+                    return None
+
+                print(f"Sucesso: Exportado para o arquivo: {nome_arquivo}")
+                print(f"Alunos exportados: {total_alunos}")
+                _relatorio_gravacao(nome_arquivo, formato, total_alunos, segundos)
+                print(f"Exemplo: {primeiro['nome']} - {primeiro['desempenho']['taxa_acerto']}% de acerto")
+                return nome_arquivo
 
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(CONSULTA_PROGRESSO_ALUNOS)
-            resultados = cursor.fetchall()
+        except Exception as e:
+            print(f"Erro: {e}")
+            if nome_arquivo and os.path.exists(nome_arquivo):
+                os.remove(nome_arquivo)
+            return None
 
-            if not resultados:
-                print("Nenhum aluno encontrado!")
-                return
 
-            dados_exportacao = {
-                "exportado_em": datetime.now().isoformat(),
-                "total_alunos": len(resultados),
-                "alunos": []
-            }
+def _consultar_desafios_agrupados():
+    """Executa CONSULTA_DESAFIOS_AGRUPADOS em uma conexão própria do pool; retorna (linhas, segundos)."""
+    inicio = time.perf_counter()
+    with conexao_banco() as conn:
+        if not conn:
+            raise oracledb.Error("Não foi possível conectar ao banco de dados.")
+        with conn.cursor() as cursor:
+            cursor.execute(CONSULTA_DESAFIOS_AGRUPADOS)
+            return cursor.fetchall(), time.perf_counter() - inicio
+
+
+def _contar_grupos(grupos):
+    """Soma os grupos (nível, área, ativo, total); retorna (totais, por_nivel, por_area)."""
+    totais = {"total": 0, "ativos": 0, "inativos": 0}
+    por_nivel = {}
+    por_area = {}
+    for id_nivel, id_area, ativo, quantidade in grupos:
+        totais["total"] += quantidade
+        if ativo == 'S':
+            totais["ativos"] += quantidade
+        elif ativo == 'N':
+            totais["inativos"] += quantidade
+        por_nivel[id_nivel] = por_nivel.get(id_nivel, 0) + quantidade
+        por_area[id_area] = por_area.get(id_area, 0) + quantidade
+    return totais, por_nivel, por_area
+
+
+def _contagens_por_referencia(contagens, referencias, campo):
+    """Uma entrada por referência do cache (total 0 se não houver desafios), na ordem do cache,
+    seguida das que só aparecem nos desafios (id fora do cache ou nulo), com o código None e o id."""
+    conhecidos = set()
+    entradas = []
+    for id_referencia, codigo, _ in referencias:
+        conhecidos.add(id_referencia)
+        entradas.append({campo: codigo, "total": contagens.get(id_referencia, 0)})
+    for id_referencia, quantidade in contagens.items():
+        if id_referencia not in conhecidos:
+            entradas.append({campo: None, f"id_{campo}": id_referencia, "total": quantidade})
+    return entradas
+
+
+def _agregar_estatisticas(grupos, niveis, areas):
+    """Monta as estatísticas gerais, por nível e por área a partir dos grupos (nível, área, ativo)."""
+    totais, por_nivel, por_area = _contar_grupos(grupos)
+    return {
+        "exportado_em": datetime.now().isoformat(),
+        "estatisticas_gerais": {
+            "total_desafios": totais["total"],
+            "desafios_ativos": totais["ativos"],
+            "desafios_inativos": totais["inativos"],
+            # Como o COUNT(DISTINCT) das consultas antigas, o grupo de id nulo não conta.
+            "areas_diferentes": sum(1 for id_area in por_area if id_area is not None),
+            "niveis_diferentes": sum(1 for id_nivel in por_nivel if id_nivel is not None)
+        },
+        "desafios_por_nivel": _contagens_por_referencia(por_nivel, niveis, "nivel"),
+        "desafios_por_area": _contagens_por_referencia(por_area, areas, "area")
+    }
+
+
+def _referencias_para_grupos(grupos):
+    """Níveis e áreas do cache; recarrega uma vez se os desafios usarem algum id que ele não tem."""
+    niveis, areas = obter_referencias("niveis"), obter_referencias("areas")
+    ids_niveis = {linha[0] for linha in niveis}
+    ids_areas = {linha[0] for linha in areas}
+    if any(id_nivel not in ids_niveis or id_area not in ids_areas
+           for id_nivel, id_area, _, _ in grupos if id_nivel is not None and id_area is not None):
+        invalidar_referencias()
+        niveis, areas = obter_referencias("niveis"), obter_referencias("areas")
+    return niveis, areas
+
+
+@medido("motus_etapa_segundos", etapa="exportacao", exportador="estatisticas_desafios")
+def exportar_estatisticas_desafios():
+    """Exporta estatísticas gerais dos desafios para um arquivo JSON.
 
-            for linha in resultados:
-                nome, turma, nivel, streak, total_desafios, acertos, pontos = linha
-                taxa_acerto = round((acertos / total_desafios) * 100, 1) if total_desafios and total_desafios > 0 else 0
-
-                aluno_data = {
-                    "nome": nome,
-                    "turma": turma,
-                    "nivel_atual": nivel or "Não definido",
-                    "streak": streak or 0,
-                    "desempenho": {
-                        "total_desafios": total_desafios or 0,
-                        "desafios_acertados": acertos or 0,
-                        "taxa_acerto": taxa_acerto,
-                        "pontos_totais": pontos or 0
-                    }
-                }
-                dados_exportacao["alunos"].append(aluno_data)
+    Os desafios são lidos uma única vez, agrupados por nível, área e status (antes eram três
+    consultas, cada uma lendo a tabela inteira). Códigos e ordem de níveis e áreas vêm do cache de
+    referências, que é recarregado se algum id dos desafios não estiver nele.
+    Retorna o nome do arquivo gerado, ou None.
+    """
+    print("\n--- Exportar Estatísticas dos Desafios ---")
+    inicio = time.perf_counter()
+    try:
+        grupos, tempo_consulta = _consultar_desafios_agrupados()
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nome_arquivo = f"progresso_alunos_{timestamp}.json"
+        inicio_referencias = time.perf_counter()
+        niveis, areas = _referencias_para_grupos(grupos)
+        tempo_referencias = time.perf_counter() - inicio_referencias
 
-            with open(nome_arquivo, 'w', encoding='utf-8') as arquivo_json:
-                json.dump(dados_exportacao, arquivo_json, ensure_ascii=False, indent=2)
+        inicio_agregacao = time.perf_counter()
+        dados_exportacao = _agregar_estatisticas(grupos, niveis, areas)
+        tempo_agregacao = time.perf_counter() - inicio_agregacao
 
-            print(f"Sucesso: Exportado para o arquivo: {nome_arquivo}")
-            print(f"Alunos exportados: {len(resultados)}")
-            if resultados:
-                primeiro = dados_exportacao["alunos"][0]
-                print(f"Exemplo: {primeiro['nome']} - {primeiro['desempenho']['taxa_acerto']}% de acerto")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nome_arquivo = f"estatisticas_desafios_{timestamp}.json"
 
+        inicio_gravacao = time.perf_counter()
+        with open(nome_arquivo, 'w', encoding='utf-8') as arquivo_json, \
+                cronometrar("motus_etapa_segundos", etapa="json_dump", exportador="estatisticas_desafios"):
+            json.dump(dados_exportacao, arquivo_json, ensure_ascii=False, indent=2)
+        tempo_gravacao = time.perf_counter() - inicio_gravacao
     except Exception as e:
         print(f"Erro: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-
-def exportar_estatisticas_desafios():
-    """Exporta estatísticas gerais dos desafios para um arquivo JSON."""
-    print("\n--- Exportar Estatísticas dos Desafios ---")
-    conn = conectar_banco()
-    if not conn:
-        print("Erro: Não foi possível conectar ao banco de dados.")
-        return
+        return None
 
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(CONSULTA_ESTATISTICAS_GERAIS_DESAFIOS)
-            stats_gerais = cursor.fetchone()
-
-            cursor.execute(CONSULTA_DESAFIOS_AGRUPADOS_POR_NIVEL)
-            por_nivel = cursor.fetchall()
-
-            cursor.execute(CONSULTA_DESAFIOS_AGRUPADOS_POR_AREA)
-            por_area = cursor.fetchall()
-
-            dados_exportacao = {
-                "exportado_em": datetime.now().isoformat(),
-                "estatisticas_gerais": {
-                    "total_desafios": stats_gerais[0],
-                    "desafios_ativos": stats_gerais[1],
-                    "desafios_inativos": stats_gerais[2],
-                    "areas_diferentes": stats_gerais[3],
-                    "niveis_diferentes": stats_gerais[4]
-                },
-                "desafios_por_nivel": [{"nivel": nivel, "total": total} for nivel, total in por_nivel],
-                "desafios_por_area": [{"area": area, "total": total} for area, total in por_area]
-            }
+    stats_gerais = dados_exportacao["estatisticas_gerais"]
+    print(f"Sucesso: Exportado para o arquivo: {nome_arquivo}")
+    print(f"Total de desafios: {stats_gerais['total_desafios']}")
+    print(f"Ativos: {stats_gerais['desafios_ativos']} | Inativos: {stats_gerais['desafios_inativos']}")
+    print(f"Níveis: {stats_gerais['niveis_diferentes']} | Áreas: {stats_gerais['areas_diferentes']}")
+    print("\nTempos:")
+    print(f"   - Consulta agrupada ({len(grupos)} grupos, 1 leitura da tabela): {tempo_consulta * 1000:.1f} ms")
+    print(f"   - Níveis e áreas (cache de referências): {tempo_referencias * 1000:.1f} ms")
+    print(f"   - Agregação no cliente: {tempo_agregacao * 1000:.1f} ms | Gravação: {tempo_gravacao * 1000:.1f} ms")
+    print(f"   - Total: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    return nome_arquivo
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nome_arquivo = f"estatisticas_desafios_{timestamp}.json"
 
-            with open(nome_arquivo, 'w', encoding='utf-8') as arquivo_json:
-                json.dump(dados_exportacao, arquivo_json, ensure_ascii=False, indent=2)
+# --- Exportação Incremental ---
+def _caminho_estado_incremental():
+    return os.getenv('MOTUS_EXPORTACAO_ESTADO', CAMINHO_ESTADO_INCREMENTAL)
 
-            print(f"Sucesso: Exportado para o arquivo: {nome_arquivo}")
-            print(f"Total de desafios: {stats_gerais[0]}")
-            print(f"Ativos: {stats_gerais[1]} | Inativos: {stats_gerais[2]}")
-            print(f"Níveis: {stats_gerais[4]} | Áreas: {stats_gerais[3]}")
 
-    except Exception as e:
-        print(f"Erro: {e}")
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+def _ler_estado_incremental():
+    """Estado das exportações incrementais; é descartado se pertencer a outro banco."""
+    identidade = identidade_banco()
+    try:
+        with open(_caminho_estado_incremental(), encoding='utf-8') as arquivo:
+            estado = json.load(arquivo)
+    except (OSError, ValueError):
+        estado = {}
+    if estado.get("banco") != identidade:
+        estado = {"banco": identidade, "tipos": {}}
+    return estado
+
+
+def _gravar_estado_incremental(estado):
+    """Grava o estado em um arquivo temporário e o troca de lugar, para nunca ficar pela metade."""
+    caminho = _caminho_estado_incremental()
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    temporario = caminho + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(estado, arquivo, ensure_ascii=False, indent=2)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+
+
+def _valor_exportado(valor):
+    """Colunas CLOB chegam como LOB no oracledb; as demais já são serializáveis."""
+    return valor.read() if hasattr(valor, 'read') else valor
+
+
+@medido("motus_etapa_segundos", etapa="exportacao", exportador="incremental")
+def exportar_incremental(tipo):
+    """Acrescenta ao arquivo JSON Lines do tipo apenas as linhas criadas desde a última exportação.
+
+    A marca d'água (maior id exportado) e o tamanho do arquivo ficam em .motus/ e só avançam
+    depois que as linhas foram gravadas em disco; se uma execução for interrompida no meio, o
+    arquivo é truncado de volta ao último tamanho confirmado na execução seguinte, então nenhuma
+    linha aparece duas vezes. A consulta começa MOTUS_EXPORTACAO_JANELA_IDS ids abaixo da marca,
+    para pegar linhas confirmadas fora de ordem, e pula os ids da janela já exportados (guardados
+    no estado); uma linha assim entra no fim do arquivo, fora da ordem de id. Linhas alteradas no
+    lugar (UPDATE) não são reexportadas.
+    Retorna (nome do arquivo, linhas acrescentadas), ou None em caso de erro.
+    """
+    definicao = EXPORTACOES_INCREMENTAIS[tipo]
+    estado = _ler_estado_incremental()
+    janela = ler_inteiro_ambiente('MOTUS_EXPORTACAO_JANELA_IDS', JANELA_IDS_INCREMENTAL)
+    marca = estado["tipos"].get(tipo, {"ultimo_id": 0, "tamanho_arquivo": 0, "arquivo": definicao["arquivo"]})
+    nome_arquivo = marca["arquivo"]
+    tamanho_atual = os.path.getsize(nome_arquivo) if os.path.exists(nome_arquivo) else 0
+    if tamanho_atual < marca["tamanho_arquivo"]:
+        # O arquivo foi removido ou encurtado fora do sistema: recomeça do início.
+        print(f"Arquivo {nome_arquivo} diferente da última exportação; exportando {tipo} desde o início.")
+        marca = {"ultimo_id": 0, "tamanho_arquivo": 0, "arquivo": nome_arquivo}
+    # Ids acima do piso já exportados. Estados sem a lista (de antes da janela) partem da marca.
+    piso = marca.get("piso_janela", marca["ultimo_id"])
+    exportados = set(marca.get("ids_janela", ()))
+    with conexao_banco() as conn:
+        if not conn:
+            print("Erro: Não foi possível conectar ao banco de dados.")
+            return None
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.arraysize = TAMANHO_LOTE_EXPORTACAO
+                cursor.prefetchrows = TAMANHO_LOTE_EXPORTACAO + 1
+                cursor.execute(definicao["consulta"], (piso,))
+
+                ultimo_id = marca["ultimo_id"]
+                novas = 0
+                modo = 'r+b' if os.path.exists(nome_arquivo) else 'wb'
+                with open(nome_arquivo, modo) as arquivo:
+                    arquivo.truncate(marca["tamanho_arquivo"])
+                    arquivo.seek(marca["tamanho_arquivo"])
+                    for linha in cursor:
+                        if linha[0] in exportados:
+                            continue
+                        registro = dict(zip(definicao["colunas"], map(_valor_exportado, linha)))
+                        arquivo.write((json.dumps(registro, ensure_ascii=False) + "\n").encode('utf-8'))
+                        exportados.add(linha[0])
+                        ultimo_id = max(ultimo_id, linha[0])
+                        novas += 1
+                    arquivo.flush()
+                    os.fsync(arquivo.fileno())
+                    tamanho = arquivo.tell()
+        except (oracledb.Error, OSError) as e:
+            print(f"Erro na exportação incremental de {tipo}: {e}")
+            return None
+
+    piso = max(piso, ultimo_id - janela)
+    estado["tipos"][tipo] = {
+        "ultimo_id": ultimo_id,
+        "piso_janela": piso,
+        "ids_janela": sorted(id_linha for id_linha in exportados if id_linha > piso),
+        "tamanho_arquivo": tamanho,
+        "arquivo": nome_arquivo,
+        "atualizado_em": datetime.now().isoformat(),
+    }
+    _gravar_estado_incremental(estado)
+    return nome_arquivo, novas
+
+
+def reiniciar_exportacao_incremental(tipo):
+    """Zera a marca d'água do tipo: a próxima exportação reescreve o arquivo desde o início."""
+    estado = _ler_estado_incremental()
+    if estado["tipos"].pop(tipo, None) is not None:
+        _gravar_estado_incremental(estado)
+
+
+def menu_exportacao_incremental():
+    """Exporta as linhas novas de desafios e/ou pontuações em arquivos JSON Lines."""
+    print("\n--- Exportação Incremental (JSON Lines) ---")
+    print("1. Desafios")
+    print("2. Pontuações")
+    print("3. Desafios e pontuações")
+    print("4. Reiniciar marcas d'água")
+    opcao = input("Escolha uma opção [padrão: 3]: ").strip() or "3"
+    tipos = {"1": ["desafios"], "2": ["pontuacoes"], "3": ["desafios", "pontuacoes"]}.get(opcao)
+    if opcao == "4":
+        for tipo in EXPORTACOES_INCREMENTAIS:
+            reiniciar_exportacao_incremental(tipo)
+        print("Marcas d'água reiniciadas: a próxima exportação inclui todas as linhas.")
+        return
+    if not tipos:
+        print("Opção inválida!")
+        return
+    for tipo in tipos:
+        resultado = exportar_incremental(tipo)
+        if resultado:
+            nome_arquivo, novas = resultado
+            print(f"{tipo}: {novas} linha(s) nova(s) acrescentada(s) em {nome_arquivo}")
@@ -1,10 +1,11 @@
-from database import conectar_banco
+from database import conexao_banco
+from dados_referencia import selecionar_referencia, validar_ids_desafio
+from metricas import registrar_consultas
+from busca_desafios import exibir_busca, menu_busca, notificar_alteracao
+from duplicatas import reindexar_desafio
 import oracledb
 
 # --- Consultas SQL Globais ---
-CONSULTA_NIVEL_DIFICULDADE = "SELECT id_nivel, codigo, descricao FROM TB_MOT_NIVEL_COMPETENCIA ORDER BY ordem"
-CONSULTA_VOLUNTARIOS_ATIVOS = "SELECT id_voluntario, nome FROM TB_MOT_VOLUNTARIO v JOIN TB_MOT_USUARIO u ON v.id_usuario = u.id_usuario WHERE u.ativo = 'S'"
-CONSULTA_AREAS_COMPETENCIA = "SELECT id_area, codigo, descricao FROM TB_MOT_AREA_COMPETENCIA ORDER BY codigo"
 CONSULTA_PROXIMO_ID_DESAFIO = "SELECT SQ_MOT_DESAFIO.NEXTVAL FROM DUAL"
 INSERIR_DESAFIO = """
     INSERT INTO TB_MOT_DESAFIO (
@@ -12,13 +13,38 @@ INSERIR_DESAFIO = """
         ativo, id_nivel_dificuldade, id_voluntario_criador, id_area_competencia
     ) VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9)
 """
-CONSULTA_DESAFIOS_ATIVOS = "SELECT id_desafio, titulo FROM TB_MOT_DESAFIO WHERE ativo = 'S'"
-CONSULTA_TODOS_DESAFIOS_DETALHADO = """
+INSERIR_DESAFIO_RETORNANDO_ID = """
+    INSERT INTO TB_MOT_DESAFIO (
+        id_desafio, titulo, descricao, resposta_correta, feedback_explicacao,
+        ativo, id_nivel_dificuldade, id_voluntario_criador, id_area_competencia
+    ) VALUES (SQ_MOT_DESAFIO.NEXTVAL, :1, :2, :3, :4, :5, :6, :7, :8)
+    RETURNING id_desafio INTO :9
+"""
+# Paginação por chave (keyset) sobre id_desafio: cada página lê no máximo :tamanho linhas pelo
+# índice da chave primária, sem OFFSET. Filtros com valor NULL são ignorados.
+CONSULTA_PAGINA_DESAFIOS = """
     SELECT d.id_desafio, d.titulo, d.ativo, n.descricao as nivel, a.descricao as area
     FROM TB_MOT_DESAFIO d
     JOIN TB_MOT_NIVEL_COMPETENCIA n ON d.id_nivel_dificuldade = n.id_nivel
     JOIN TB_MOT_AREA_COMPETENCIA a ON d.id_area_competencia = a.id_area
+    WHERE d.id_desafio > :ultimo_id
+      AND (:id_nivel IS NULL OR d.id_nivel_dificuldade = :id_nivel)
+      AND (:id_area IS NULL OR d.id_area_competencia = :id_area)
+      AND (:ativo IS NULL OR d.ativo = :ativo)
     ORDER BY d.id_desafio
+    FETCH FIRST :tamanho ROWS ONLY
+"""
+CONSULTA_PAGINA_DESAFIOS_ANTERIOR = """
+    SELECT d.id_desafio, d.titulo, d.ativo, n.descricao as nivel, a.descricao as area
+    FROM TB_MOT_DESAFIO d
+    JOIN TB_MOT_NIVEL_COMPETENCIA n ON d.id_nivel_dificuldade = n.id_nivel
+    JOIN TB_MOT_AREA_COMPETENCIA a ON d.id_area_competencia = a.id_area
+    WHERE d.id_desafio < :primeiro_id
+      AND (:id_nivel IS NULL OR d.id_nivel_dificuldade = :id_nivel)
+      AND (:id_area IS NULL OR d.id_area_competencia = :id_area)
+      AND (:ativo IS NULL OR d.ativo = :ativo)
+    ORDER BY d.id_desafio DESC
+    FETCH FIRST :tamanho ROWS ONLY
 """
 CONSULTA_DESAFIO_POR_ID = """
     SELECT id_desafio, titulo, descricao, resposta_correta, feedback_explicacao,
@@ -32,18 +58,21 @@ ATUALIZAR_DESAFIO = """
         ativo = :5, id_nivel_dificuldade = :6, id_area_competencia = :7
     WHERE id_desafio = :8
 """
-CONSULTA_DESAFIOS_ATIVOS_DETALHADO = """
-    SELECT d.id_desafio, d.titulo, n.descricao as nivel, a.descricao as area
-    FROM TB_MOT_DESAFIO d
-    JOIN TB_MOT_NIVEL_COMPETENCIA n ON d.id_nivel_dificuldade = n.id_nivel
-    JOIN TB_MOT_AREA_COMPETENCIA a ON d.id_area_competencia = a.id_area
-    WHERE d.ativo = 'S'
-    ORDER BY d.id_desafio
-"""
 CONSULTA_DESAFIO_SIMPLES_POR_ID = "SELECT id_desafio, titulo, ativo FROM TB_MOT_DESAFIO WHERE id_desafio = :1"
 CONTAR_PONTUACOES_POR_DESAFIO = "SELECT COUNT(*) as total FROM TB_MOT_PONTUACAO WHERE id_desafio = :1"
 DESATIVAR_DESAFIO = "UPDATE TB_MOT_DESAFIO SET ativo = 'N' WHERE id_desafio = :1"
 
+registrar_consultas(globals())
+
+TAMANHO_PAGINA_PADRAO = 20
+TAMANHO_PAGINA_MAXIMO = 200
+
+# Campos de um desafio aceitos pelas funções de serviço, na ordem de INSERIR_DESAFIO_RETORNANDO_ID.
+CAMPOS_DESAFIO = ("titulo", "descricao", "resposta_correta", "feedback_explicacao", "ativo",
+                  "id_nivel_dificuldade", "id_voluntario_criador", "id_area_competencia")
+CAMPOS_OBRIGATORIOS = ("titulo", "descricao", "resposta_correta", "id_nivel_dificuldade",
+                       "id_voluntario_criador", "id_area_competencia")
+
 # --- Funções Auxiliares ---
 
 def _obter_input_obrigatorio(prompt):
@@ -96,6 +125,124 @@ def _exibir_lista_opcoes(cursor, titulo, consulta_sql, parametros=None):
         print(f"Erro ao buscar dados para '{titulo}': {e}")
         return False
 
+def _perguntar_filtros(ativo_padrao=None):
+    """Pergunta os filtros da listagem paginada; retorna o dicionário usado por _buscar_pagina."""
+    print("\nFiltros (Enter para não filtrar):")
+    filtros = {"id_nivel": None, "id_area": None, "ativo": ativo_padrao, "tamanho": TAMANHO_PAGINA_PADRAO}
+    nivel = input("ID do nível de dificuldade: ").strip()
+    if nivel.isdigit():
+        filtros["id_nivel"] = int(nivel)
+    area = input("ID da área de competência: ").strip()
+    if area.isdigit():
+        filtros["id_area"] = int(area)
+    situacao = input(f"Situação (S = ativos, N = inativos, T = todos) [padrão: {ativo_padrao or 'T'}]: ").strip().upper()
+    if situacao in ('S', 'N'):
+        filtros["ativo"] = situacao
+    elif situacao == 'T':
+        filtros["ativo"] = None
+    tamanho = input(f"Desafios por página [padrão: {TAMANHO_PAGINA_PADRAO}]: ").strip()
+    if tamanho.isdigit() and int(tamanho) > 0:
+        filtros["tamanho"] = min(int(tamanho), TAMANHO_PAGINA_MAXIMO)
+    return filtros
+
+def _filtros_padrao(ativo=None):
+    return {"id_nivel": None, "id_area": None, "ativo": ativo, "tamanho": TAMANHO_PAGINA_PADRAO}
+
+def _buscar_pagina(cursor, filtros, apos_id=0, antes_id=None):
+    """Busca uma página de desafios após apos_id (ou antes de antes_id); retorna (linhas, ha_mais).
+
+    Uma linha extra é lida para saber se existe outra página na mesma direção.
+    """
+    binds = {
+        "id_nivel": filtros["id_nivel"],
+        "id_area": filtros["id_area"],
+        "ativo": filtros["ativo"],
+        "tamanho": filtros["tamanho"] + 1,
+    }
+    if antes_id is not None:
+        cursor.execute(CONSULTA_PAGINA_DESAFIOS_ANTERIOR, dict(binds, primeiro_id=antes_id))
+        linhas = cursor.fetchall()
+        return list(reversed(linhas[:filtros["tamanho"]])), len(linhas) > filtros["tamanho"]
+    cursor.execute(CONSULTA_PAGINA_DESAFIOS, dict(binds, ultimo_id=apos_id))
+    linhas = cursor.fetchall()
+    return linhas[:filtros["tamanho"]], len(linhas) > filtros["tamanho"]
+
+def navegar_desafios(cursor, titulo, filtros, permitir_selecao=False):
+    """Exibe os desafios página a página, com próxima/anterior e salto para um ID.
+
+    Com permitir_selecao, digitar um número devolve esse ID. Retorna None ao voltar ou se a
+    lista estiver vazia; o custo de cada página é limitado pelo tamanho dela, não pela tabela.
+    """
+    pagina, ha_proxima = _buscar_pagina(cursor, filtros)
+    if not pagina:
+        print("Nenhum desafio encontrado.")
+        return None
+    comandos = "[Enter] próxima | [A] anterior | [I] ir para o ID | [B] buscar | [V] voltar"
+    if permitir_selecao:
+        comandos = "Digite o ID do desafio, ou " + comandos
+    exibir_pagina = True
+    while True:
+        if exibir_pagina:
+            print(f"\n--- {titulo} ---")
+            for id_desafio, titulo_desafio, ativo, nivel, area in pagina:
+                status = "Ativo" if ativo == 'S' else "Inativo"
+                print(f"ID: {id_desafio} - {titulo_desafio} ({status})\n   Nível: {nivel} | Área: {area}")
+            if not ha_proxima:
+                print("(fim da lista)")
+        exibir_pagina = True
+        comando = input(f"\n{comandos}: ").strip().upper()
+
+        if comando.isdigit() and permitir_selecao:
+            return int(comando)
+        if comando == '':
+            if ha_proxima:
+                pagina, ha_proxima = _buscar_pagina(cursor, filtros, apos_id=pagina[-1][0])
+            else:
+                print("Esta é a última página.")
+        elif comando == 'A':
+            anterior, _ = _buscar_pagina(cursor, filtros, antes_id=pagina[0][0])
+            if anterior:
+                pagina, ha_proxima = anterior, True
+            else:
+                print("Esta é a primeira página.")
+        elif comando == 'I':
+            id_inicial = _obter_input_numerico("Ir para o ID: ")
+            encontrados, mais = _buscar_pagina(cursor, filtros, apos_id=id_inicial - 1)
+            if encontrados:
+                pagina, ha_proxima = encontrados, mais
+            else:
+                print("Nenhum desafio a partir desse ID com os filtros atuais.")
+        elif comando == 'B':
+            consulta = input("Palavras da busca: ").strip()
+            if consulta:
+                exibir_busca(consulta, somente_ativos=filtros["ativo"] == 'S')
+                # Mantém os resultados na tela; a página é reexibida no próximo comando de navegação.
+                exibir_pagina = False
+        elif comando == 'V':
+            return None
+        else:
+            print("Opção inválida!")
+
+def inserir_desafios_em_lote(cursor, registros):
+    """Insere vários desafios com um único executemany e retorna (ids, erros).
+
+    Cada registro segue a ordem de INSERIR_DESAFIO_RETORNANDO_ID, sem o ID. A lista de IDs
+    acompanha a ordem dos registros (None nas linhas que falharam) e os erros vêm como pares
+    (índice, mensagem). Uma linha inválida não interrompe as demais; o commit é de quem chama.
+    """
+    if not registros:
+        return [], []
+    ids_var = cursor.var(int, arraysize=len(registros))
+    cursor.setinputsizes(None, None, None, None, None, None, None, None, ids_var)
+    cursor.executemany(INSERIR_DESAFIO_RETORNANDO_ID, registros, batcherrors=True)
+    erros = {erro.offset: erro.message for erro in cursor.getbatcherrors()}
+
+    ids = []
+    for indice in range(len(registros)):
+        valor = None if indice in erros else ids_var.getvalue(indice)
+        ids.append(valor[0] if valor else None)
+    return ids, sorted(erros.items())
+
 # --- Funções de Gerenciamento ---
 
 def gerenciar_desafios():
@@ -106,197 +253,332 @@ def gerenciar_desafios():
         print("2. Listar desafios")
         print("3. Atualizar desafio")
         print("4. Excluir desafio (inativar)")
-        print("5. Voltar ao menu principal")
+        print("5. Buscar desafios")
+        print("6. Voltar ao menu principal")
         opcao = input("Escolha uma opção: ")
         if opcao == "1": criar_desafio()
         elif opcao == "2": listar_desafios()
         elif opcao == "3": atualizar_desafio()
         elif opcao == "4": excluir_desafio()
-        elif opcao == "5": break
+        elif opcao == "5": menu_busca()
+        elif opcao == "6": break
         else: print("Opção inválida! Tente novamente.")
 
 
 def criar_desafio():
     """Orquestra a criação de um novo desafio."""
     print("\n--- Criar Novo Desafio ---")
-    conn = conectar_banco()
-    if not conn: return
-
-    try:
-        with conn.cursor() as cursor:
-            titulo = _obter_input_obrigatorio("Título do desafio: ")
-            descricao = _obter_input_obrigatorio("Descrição do desafio: ")
-            resposta_correta = _obter_input_obrigatorio("Resposta correta: ")
+    with conexao_banco() as conn:
+        if not conn: return
+
+        try:
+            with conn.cursor() as cursor:
+                titulo = _obter_input_obrigatorio("Título do desafio: ")
+                descricao = _obter_input_obrigatorio("Descrição do desafio: ")
+                resposta_correta = _obter_input_obrigatorio("Resposta correta: ")
             
-            feedback_explicacao = input("Feedback/explicação (opcional): ").strip() or None
-            ativo = input("Desafio ativo? (S/N) [padrão: S]: ").strip().upper()
-            ativo = ativo if ativo in ['S', 'N'] else 'S'
+                feedback_explicacao = input("Feedback/explicação (opcional): ").strip() or None
+                ativo = input("Desafio ativo? (S/N) [padrão: S]: ").strip().upper()
+                ativo = ativo if ativo in ['S', 'N'] else 'S'
 
-            if not _exibir_lista_opcoes(cursor, "Níveis de Dificuldade", CONSULTA_NIVEL_DIFICULDADE): return
-            id_nivel = _obter_input_numerico("\nID do nível de dificuldade: ")
+                id_nivel = selecionar_referencia("niveis", "Níveis de Dificuldade", "\nID do nível de dificuldade: ")
+                if id_nivel is None: return
 
-            if not _exibir_lista_opcoes(cursor, "Voluntários Disponíveis", CONSULTA_VOLUNTARIOS_ATIVOS): return
-            id_voluntario = _obter_input_numerico("\nID do voluntário criador: ")
+                id_voluntario = selecionar_referencia("voluntarios", "Voluntários Disponíveis", "\nID do voluntário criador: ")
+                if id_voluntario is None: return
 
-            if not _exibir_lista_opcoes(cursor, "Áreas de Competência", CONSULTA_AREAS_COMPETENCIA): return
-            id_area = _obter_input_numerico("\nID da área de competência: ")
+                id_area = selecionar_referencia("areas", "Áreas de Competência", "\nID da área de competência: ")
+                if id_area is None: return
 
-            cursor.execute(CONSULTA_PROXIMO_ID_DESAFIO)
-            id_desafio = cursor.fetchone()[0]
+                cursor.execute(CONSULTA_PROXIMO_ID_DESAFIO)
+                id_desafio = cursor.fetchone()[0]
 
-            cursor.execute(INSERIR_DESAFIO, (
-                id_desafio, titulo, descricao, resposta_correta, feedback_explicacao, ativo,
-                id_nivel, id_voluntario, id_area
-            ))
-            conn.commit()
-            print(f"Desafio criado com sucesso! ID: {id_desafio}")
+                cursor.execute(INSERIR_DESAFIO, (
+                    id_desafio, titulo, descricao, resposta_correta, feedback_explicacao, ativo,
+                    id_nivel, id_voluntario, id_area
+                ))
+                conn.commit()
+                print(f"Desafio criado com sucesso! ID: {id_desafio}")
 
-    except oracledb.DatabaseError as e:
-        conn.rollback()
-        error, = e.args
-        if error.code == 2291: print("Erro: Um dos IDs (nível, voluntário ou área) é inválido.")
-        else: print(f"Erro de banco de dados: {e}")
-    except Exception as e:
-        conn.rollback()
-        print(f"Erro inesperado: {e}")
-    finally:
-        if conn: conn.close()
+        except oracledb.DatabaseError as e:
+            conn.rollback()
+            error, = e.args
+            if error.code == 2291: print("Erro: Um dos IDs (nível, voluntário ou área) é inválido.")
+            else: print(f"Erro de banco de dados: {e}")
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro inesperado: {e}")
 
 
 def listar_desafios():
-    """Lista todos os desafios ativos no banco de dados."""
-    print("\n--- Listar Desafios Ativos ---")
-    conn = conectar_banco()
-    if not conn: return
+    """Lista os desafios página a página, com filtros por nível, área e situação (padrão: ativos)."""
+    print("\n--- Listar Desafios ---")
+    filtros = _perguntar_filtros(ativo_padrao='S')
+    with conexao_banco() as conn:
+        if not conn: return
 
-    try:
-        with conn.cursor() as cursor:
-            if not _exibir_lista_opcoes(cursor, "Desafios Ativos", CONSULTA_DESAFIOS_ATIVOS):
-                print("Nenhum desafio ativo encontrado.")
-    except oracledb.DatabaseError as e:
-        print(f"Erro de banco de dados: {e}")
-    except Exception as e:
-        print(f"Erro inesperado: {e}")
-    finally:
-        if conn: conn.close()
+        try:
+            with conn.cursor() as cursor:
+                navegar_desafios(cursor, "Desafios", filtros)
+        except oracledb.DatabaseError as e:
+            print(f"Erro de banco de dados: {e}")
+        except Exception as e:
+            print(f"Erro inesperado: {e}")
 
 
 def atualizar_desafio():
     """Orquestra a atualização de um desafio existente."""
     print("\n--- Atualizar Desafio ---")
-    conn = conectar_banco()
-    if not conn: return
-
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(CONSULTA_TODOS_DESAFIOS_DETALHADO)
-            rows = cursor.fetchall()
-            if not rows:
-                print("Nenhum desafio cadastrado para atualizar!")
-                return
-
-            col_names = [d[0].lower() for d in cursor.description]
-            desafios = [dict(zip(col_names, row)) for row in rows]
-
-            print("\n--- Desafios Disponíveis ---")
-            for d in desafios:
-                status = "Ativo" if d['ativo'] == 'S' else "Inativo"
-                print(f"ID: {d['id_desafio']} - {d['titulo']} ({status})\n   Nível: {d['nivel']} | Área: {d['area']}\n")
-
-            id_desafio = _obter_input_numerico("Digite o ID do desafio que deseja atualizar: ")
-
-            cursor.execute(CONSULTA_DESAFIO_POR_ID, (id_desafio,))
-            desafio_atual = _row_to_dict(cursor, cursor.fetchone())
-            if not desafio_atual:
-                print("Desafio não encontrado!")
-                return
-
-            print(f"\nAtualizando desafio: {desafio_atual['titulo']}")
-            print("Deixe em branco para manter o valor atual.\n")
-
-            titulo = _obter_input_opcional(f"Título [{desafio_atual['titulo']}]: ", desafio_atual['titulo'])
-            descricao = _obter_input_opcional(f"Descrição [{desafio_atual['descricao'][:50]}...]: ", desafio_atual['descricao'])
-            resposta = _obter_input_opcional(f"Resposta [{desafio_atual['resposta_correta']}]: ", desafio_atual['resposta_correta'])
-            feedback = _obter_input_opcional(f"Feedback [{desafio_atual['feedback_explicacao'] or '(vazio)'}]: ", desafio_atual['feedback_explicacao'])
-            ativo = _obter_input_opcional(f"Ativo (S/N) [{desafio_atual['ativo']}]: ", desafio_atual['ativo']).upper()
-
-            if not _exibir_lista_opcoes(cursor, "Níveis de Dificuldade", CONSULTA_NIVEL_DIFICULDADE): return
-            id_nivel = _obter_input_opcional(f"ID do nível [{desafio_atual['id_nivel_dificuldade']}]: ", desafio_atual['id_nivel_dificuldade'])
-
-            if not _exibir_lista_opcoes(cursor, "Áreas de Competência", CONSULTA_AREAS_COMPETENCIA): return
-            id_area = _obter_input_opcional(f"ID da área [{desafio_atual['id_area_competencia']}]: ", desafio_atual['id_area_competencia'])
-
-            confirmar = input("\nConfirmar atualização? (S/N): ").strip().upper()
-            if confirmar != 'S':
-                print("Atualização cancelada.")
-                return
-
-            cursor.execute(ATUALIZAR_DESAFIO, (
-                titulo, descricao, resposta, feedback, ativo,
-                int(id_nivel), int(id_area), id_desafio
-            ))
-            conn.commit()
-            print(f"Desafio ID {id_desafio} atualizado com sucesso!")
-
-    except oracledb.DatabaseError as e:
-        conn.rollback()
-        error, = e.args
-        if error.code == 2291: print("Erro: ID de nível ou área inválido.")
-        else: print(f"Erro de banco de dados: {e}")
-    except (ValueError, TypeError):
-        conn.rollback()
-        print("Erro de validação: Verifique se os IDs são números inteiros.")
-    except Exception as e:
-        conn.rollback()
-        print(f"Erro inesperado: {e}")
-    finally:
-        if conn: conn.close()
+    with conexao_banco() as conn:
+        if not conn: return
+
+        try:
+            with conn.cursor() as cursor:
+                filtrar = input("Filtrar a lista de desafios? (S/N) [padrão: N]: ").strip().upper()
+                filtros = _perguntar_filtros() if filtrar == 'S' else _filtros_padrao()
+                id_desafio = navegar_desafios(cursor, "Desafios Disponíveis", filtros, permitir_selecao=True)
+                if id_desafio is None:
+                    return
+
+                cursor.execute(CONSULTA_DESAFIO_POR_ID, (id_desafio,))
+                desafio_atual = _row_to_dict(cursor, cursor.fetchone())
+                if not desafio_atual:
+                    print("Desafio não encontrado!")
+                    return
+
+                print(f"\nAtualizando desafio: {desafio_atual['titulo']}")
+                print("Deixe em branco para manter o valor atual.\n")
+
+                titulo = _obter_input_opcional(f"Título [{desafio_atual['titulo']}]: ", desafio_atual['titulo'])
+                descricao = _obter_input_opcional(f"Descrição [{desafio_atual['descricao'][:50]}...]: ", desafio_atual['descricao'])
+                resposta = _obter_input_opcional(f"Resposta [{desafio_atual['resposta_correta']}]: ", desafio_atual['resposta_correta'])
+                feedback = _obter_input_opcional(f"Feedback [{desafio_atual['feedback_explicacao'] or '(vazio)'}]: ", desafio_atual['feedback_explicacao'])
+                ativo = _obter_input_opcional(f"Ativo (S/N) [{desafio_atual['ativo']}]: ", desafio_atual['ativo']).upper()
+
+                id_nivel = selecionar_referencia("niveis", "Níveis de Dificuldade",
+                                                 f"ID do nível [{desafio_atual['id_nivel_dificuldade']}]: ", desafio_atual['id_nivel_dificuldade'])
+                if id_nivel is None: return
+
+                id_area = selecionar_referencia("areas", "Áreas de Competência",
+                                                f"ID da área [{desafio_atual['id_area_competencia']}]: ", desafio_atual['id_area_competencia'])
+                if id_area is None: return
+
+                confirmar = input("\nConfirmar atualização? (S/N): ").strip().upper()
+                if confirmar != 'S':
+                    print("Atualização cancelada.")
+                    return
+
+                cursor.execute(ATUALIZAR_DESAFIO, (
+                    titulo, descricao, resposta, feedback, ativo,
+                    int(id_nivel), int(id_area), id_desafio
+                ))
+                conn.commit()
+                notificar_alteracao(id_desafio)
+                reindexar_desafio(cursor, id_desafio)
+                print(f"Desafio ID {id_desafio} atualizado com sucesso!")
+
+        except oracledb.DatabaseError as e:
+            conn.rollback()
+            error, = e.args
+            if error.code == 2291: print("Erro: ID de nível ou área inválido.")
+            else: print(f"Erro de banco de dados: {e}")
+        except (ValueError, TypeError):
+            conn.rollback()
+            print("Erro de validação: Verifique se os IDs são números inteiros.")
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro inesperado: {e}")
 
 
 def excluir_desafio():
     """Orquestra a exclusão lógica (inativação) de um desafio."""
     print("\n--- Excluir (Inativar) Desafio ---")
-    conn = conectar_banco()
-    if not conn: return
-
-    try:
-        with conn.cursor() as cursor:
-            if not _exibir_lista_opcoes(cursor, "Desafios Ativos Disponíveis", CONSULTA_DESAFIOS_ATIVOS_DETALHADO):
-                print("Nenhum desafio ativo encontrado para excluir!")
-                return
-
-            id_desafio = _obter_input_numerico("\nDigite o ID do desafio que deseja excluir: ")
-
-            cursor.execute(CONSULTA_DESAFIO_SIMPLES_POR_ID, (id_desafio,))
-            desafio = _row_to_dict(cursor, cursor.fetchone())
-            if not desafio:
-                print("Desafio não encontrado!")
-                return
-            if desafio['ativo'] == 'N':
-                print("Este desafio já está inativo!")
-                return
-
-            cursor.execute(CONTAR_PONTUACOES_POR_DESAFIO, (id_desafio,))
-            count_pontuacoes = cursor.fetchone()[0]
-
-            print(f"\nInformações do Desafio: ID: {desafio['id_desafio']}, Título: {desafio['titulo']}")
-            if count_pontuacoes > 0:
-                print(f"Atenção: Este desafio possui {count_pontuacoes} pontuação(ões) registrada(s).")
+    with conexao_banco() as conn:
+        if not conn: return
+
+        try:
+            with conn.cursor() as cursor:
+                id_desafio = navegar_desafios(cursor, "Desafios Ativos Disponíveis", _filtros_padrao(ativo='S'),
+                                              permitir_selecao=True)
+                if id_desafio is None:
+                    return
+
+                cursor.execute(CONSULTA_DESAFIO_SIMPLES_POR_ID, (id_desafio,))
+                desafio = _row_to_dict(cursor, cursor.fetchone())
+                if not desafio:
+                    print("Desafio não encontrado!")
+                    return
+                if desafio['ativo'] == 'N':
+                    print("Este desafio já está inativo!")
+                    return
+
+                cursor.execute(CONTAR_PONTUACOES_POR_DESAFIO, (id_desafio,))
+                count_pontuacoes = cursor.fetchone()[0]
+
+                print(f"\nInformações do Desafio: ID: {desafio['id_desafio']}, Título: {desafio['titulo']}")
+                if count_pontuacoes > 0:
+                    print(f"Atenção: Este desafio possui {count_pontuacoes} pontuação(ões) registrada(s).")
             
-            confirmar = input("\nDigite 'EXCLUIR' para confirmar a inativação: ").strip().upper()
-            if confirmar != 'EXCLUIR':
-                print("Exclusão cancelada.")
-                return
+                confirmar = input("\nDigite 'EXCLUIR' para confirmar a inativação: ").strip().upper()
+                if confirmar != 'EXCLUIR':
+                    print("Exclusão cancelada.")
+                    return
+
+                cursor.execute(DESATIVAR_DESAFIO, (id_desafio,))
+                conn.commit()
+                notificar_alteracao(id_desafio)
+                reindexar_desafio(cursor, id_desafio)
+                print(f"Desafio ID {id_desafio} foi inativado com sucesso!")
+
+        except oracledb.DatabaseError as e:
+            conn.rollback()
+            print(f"Erro de banco de dados ao excluir desafio: {e}")
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro inesperado ao excluir desafio: {e}")
+
+
+# --- Funções de Serviço (sem interação) ---
+# Usadas pelo serviço HTTP: erros de validação levantam ValueError, a falta de conexão levanta
+# RuntimeError e um desafio inexistente devolve None.
+
+def _validar_dados_desafio(dados):
+    """Normaliza os campos de um desafio completo; levanta ValueError com os problemas encontrados."""
+    erros = [f"Campo obrigatório ausente: {campo}" for campo in CAMPOS_OBRIGATORIOS
+             if dados.get(campo) in (None, "")]
+    desconhecidos = sorted(set(dados) - set(CAMPOS_DESAFIO))
+    if desconhecidos:
+        erros.append(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+    if erros:
+        raise ValueError("; ".join(erros))
+
+    desafio = {campo: dados.get(campo) for campo in CAMPOS_DESAFIO}
+    for campo in ("titulo", "descricao", "resposta_correta", "feedback_explicacao"):
+        if desafio[campo] is not None:
+            desafio[campo] = str(desafio[campo]).strip() or None
+    desafio["ativo"] = str(desafio["ativo"] or 'S').upper()
+    if desafio["ativo"] not in ('S', 'N'):
+        erros.append("ativo deve ser 'S' ou 'N'")
+    for campo in ("id_nivel_dificuldade", "id_voluntario_criador", "id_area_competencia"):
+        try:
+            desafio[campo] = int(desafio[campo])
+        except (TypeError, ValueError):
+            erros.append(f"{campo} deve ser um número inteiro")
+    if not erros:
+        erros = validar_ids_desafio(desafio["id_nivel_dificuldade"], desafio["id_voluntario_criador"],
+                                    desafio["id_area_competencia"])
+    if erros:
+        raise ValueError("; ".join(erros))
+    return desafio
+
+
+def _erro_integridade(e):
+    """Converte o ORA-02291 (chave estrangeira inexistente) em ValueError; os demais erros seguem."""
+    error, = e.args
+    if getattr(error, "code", None) == 2291:
+        return ValueError("Um dos IDs (nível, voluntário ou área) é inválido.")
+    return e
+
+
+def listar_pagina_desafios(filtros=None, apos_id=0, antes_id=None):
+    """Uma página de desafios como dicionários; retorna (desafios, ha_mais)."""
+    filtros = dict(_filtros_padrao(), **(filtros or {}))
+    filtros["tamanho"] = max(1, min(int(filtros["tamanho"]), TAMANHO_PAGINA_MAXIMO))
+    with conexao_banco() as conn:
+        if not conn:
+            raise RuntimeError("Sem conexão com o banco de dados.")
+        with conn.cursor() as cursor:
+            pagina, ha_mais = _buscar_pagina(cursor, filtros, apos_id, antes_id)
+    colunas = ("id_desafio", "titulo", "ativo", "nivel", "area")
+    return [dict(zip(colunas, linha)) for linha in pagina], ha_mais
 
-            cursor.execute(DESATIVAR_DESAFIO, (id_desafio,))
-            conn.commit()
-            print(f"Desafio ID {id_desafio} foi inativado com sucesso!")
 
-    except oracledb.DatabaseError as e:
-        conn.rollback()
-        print(f"Erro de banco de dados ao excluir desafio: {e}")
-    except Exception as e:
-        conn.rollback()
-        print(f"Erro inesperado ao excluir desafio: {e}")
-    finally:
-        if conn: conn.close()
\ No newline at end of file
+def obter_desafio(id_desafio):
+    """Todos os campos do desafio, ou None se ele não existir."""
+    with conexao_banco() as conn:
+        if not conn:
+            raise RuntimeError("Sem conexão com o banco de dados.")
+        with conn.cursor() as cursor:
+            cursor.execute(CONSULTA_DESAFIO_POR_ID, (id_desafio,))
+            return _row_to_dict(cursor, cursor.fetchone())
+
+
+def criar_desafio_dados(dados):
+    """Valida e insere um desafio a partir de um dicionário com CAMPOS_DESAFIO; retorna o ID criado."""
+    desafio = _validar_dados_desafio(dados)
+    with conexao_banco() as conn:
+        if not conn:
+            raise RuntimeError("Sem conexão com o banco de dados.")
+        try:
+            with conn.cursor() as cursor:
+                ids, erros = inserir_desafios_em_lote(cursor, [tuple(desafio[campo] for campo in CAMPOS_DESAFIO)])
+                if erros:
+                    raise ValueError(erros[0][1])
+                conn.commit()
+        except oracledb.DatabaseError as e:
+            conn.rollback()
+            raise _erro_integridade(e)
+        except ValueError:
+            conn.rollback()
+            raise
+    return ids[0]
+
+
+def atualizar_desafio_dados(id_desafio, dados):
+    """Aplica uma atualização parcial (campos ausentes mantêm o valor atual).
+
+    O voluntário criador não muda. Retorna o desafio atualizado, ou None se ele não existir.
+    """
+    if "id_voluntario_criador" in dados:
+        raise ValueError("O voluntário criador de um desafio não pode ser alterado.")
+    with conexao_banco() as conn:
+        if not conn:
+            raise RuntimeError("Sem conexão com o banco de dados.")
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(CONSULTA_DESAFIO_POR_ID, (id_desafio,))
+                atual = _row_to_dict(cursor, cursor.fetchone())
+                if not atual:
+                    return None
+                atual.pop("id_desafio")
+                desafio = _validar_dados_desafio(dict(atual, **dados))
+                cursor.execute(ATUALIZAR_DESAFIO, (
+                    desafio["titulo"], desafio["descricao"], desafio["resposta_correta"],
+                    desafio["feedback_explicacao"], desafio["ativo"], desafio["id_nivel_dificuldade"],
+                    desafio["id_area_competencia"], id_desafio
+                ))
+                conn.commit()
+                notificar_alteracao(id_desafio)
+                reindexar_desafio(cursor, id_desafio)
+        except oracledb.DatabaseError as e:
+            conn.rollback()
+            raise _erro_integridade(e)
+    return dict(desafio, id_desafio=id_desafio)
+
+
+def inativar_desafio(id_desafio):
+    """Inativa o desafio (exclusão lógica); inativar de novo não tem efeito.
+
+    Retorna {"id_desafio", "titulo", "pontuacoes", "ja_inativo"}, ou None se ele não existir.
+    """
+    with conexao_banco() as conn:
+        if not conn:
+            raise RuntimeError("Sem conexão com o banco de dados.")
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(CONSULTA_DESAFIO_SIMPLES_POR_ID, (id_desafio,))
+                desafio = _row_to_dict(cursor, cursor.fetchone())
+                if not desafio:
+                    return None
+                cursor.execute(CONTAR_PONTUACOES_POR_DESAFIO, (id_desafio,))
+                resultado = {"id_desafio": id_desafio, "titulo": desafio["titulo"],
+                             "pontuacoes": cursor.fetchone()[0], "ja_inativo": desafio["ativo"] == 'N'}
+                if not resultado["ja_inativo"]:
+                    cursor.execute(DESATIVAR_DESAFIO, (id_desafio,))
+                    conn.commit()
+                    notificar_alteracao(id_desafio)
+                    reindexar_desafio(cursor, id_desafio)
+        except oracledb.DatabaseError:
+            conn.rollback()
+            raise
+    return resultado
@@ -0,0 +1,187 @@
+from database import conexao_banco
+from metricas import registrar_consultas
+import oracledb
+import os
+import threading
+import time
+
+# --- Consultas SQL de Dados de Referência ---
+CONSULTA_NIVEL_DIFICULDADE = "SELECT id_nivel, codigo, descricao FROM TB_MOT_NIVEL_COMPETENCIA ORDER BY ordem"
+CONSULTA_VOLUNTARIOS_ATIVOS = "SELECT id_voluntario, nome FROM TB_MOT_VOLUNTARIO v JOIN TB_MOT_USUARIO u ON v.id_usuario = u.id_usuario WHERE u.ativo = 'S' ORDER BY u.nome"
+CONSULTA_AREAS_COMPETENCIA = "SELECT id_area, codigo, descricao FROM TB_MOT_AREA_COMPETENCIA ORDER BY codigo"
+# Impressão digital barata (quantidade e soma dos IDs) usada para detectar inclusões, remoções e inativações.
+CONSULTA_VERSAO_REFERENCIAS = """
+    SELECT 'niveis', COUNT(*), SUM(id_nivel) FROM TB_MOT_NIVEL_COMPETENCIA
+    UNION ALL
+    SELECT 'areas', COUNT(*), SUM(id_area) FROM TB_MOT_AREA_COMPETENCIA
+    UNION ALL
+    SELECT 'voluntarios', COUNT(*), SUM(v.id_voluntario)
+    FROM TB_MOT_VOLUNTARIO v JOIN TB_MOT_USUARIO u ON v.id_usuario = u.id_usuario
+    WHERE u.ativo = 'S'
+"""
+
+CONSULTAS_REFERENCIA = {
+    "niveis": CONSULTA_NIVEL_DIFICULDADE,
+    "areas": CONSULTA_AREAS_COMPETENCIA,
+    "voluntarios": CONSULTA_VOLUNTARIOS_ATIVOS,
+}
+DESCRICAO_REFERENCIA = {
+    "niveis": "nível de dificuldade",
+    "areas": "área de competência",
+    "voluntarios": "voluntário",
+}
+
+registrar_consultas(globals())
+
+
+class CacheReferencias:
+    """Cache em memória de níveis, áreas e voluntários ativos, compartilhado pelo processo.
+
+    Os três conjuntos são carregados juntos, com uma única conexão, e recarregados quando o TTL
+    expira ou após invalidar(). Com detectar_mudancas ativo, a cada intervalo_verificacao segundos
+    uma consulta leve compara a impressão digital das tabelas e força a recarga se algo mudou.
+    """
+
+    def __init__(self, ttl_segundos=None, detectar_mudancas=None, intervalo_verificacao=None):
+        self.ttl_segundos = ttl_segundos or int(os.getenv('MOTUS_REFERENCIAS_TTL_SEGUNDOS', 3600))
+        if detectar_mudancas is None:
+            detectar_mudancas = os.getenv('MOTUS_REFERENCIAS_DETECTAR_MUDANCAS', 'S').upper() in ('S', '1', 'TRUE')
+        self.detectar_mudancas = detectar_mudancas
+        self.intervalo_verificacao = intervalo_verificacao or int(os.getenv('MOTUS_REFERENCIAS_INTERVALO_VERIFICACAO', 60))
+        self._dados = None
+        self._indices = {}
+        self._versao = None
+        self._carregado_em = 0.0
+        self._verificado_em = 0.0
+        self._lock = threading.Lock()
+
+    def _consultar_versao(self, cursor):
+        cursor.execute(CONSULTA_VERSAO_REFERENCIAS)
+        return {tipo: (total, soma) for tipo, total, soma in cursor.fetchall()}
+
+    def _carregar(self):
+        with conexao_banco() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cursor:
+                dados = {}
+                for tipo, consulta_sql in CONSULTAS_REFERENCIA.items():
+                    cursor.execute(consulta_sql)
+                    dados[tipo] = cursor.fetchall()
+                versao = self._consultar_versao(cursor) if self.detectar_mudancas else None
+        self._dados = dados
+        self._indices = {tipo: {linha[0]: linha for linha in linhas} for tipo, linhas in dados.items()}
+        self._versao = versao
+        self._carregado_em = self._verificado_em = time.monotonic()
+        return True
+
+    def _mudou_no_banco(self):
+        with conexao_banco() as conn:
+            if not conn:
+                return False
+            with conn.cursor() as cursor:
+                return self._consultar_versao(cursor) != self._versao
+
+    def _garantir_atualizado(self):
+        agora = time.monotonic()
+        if self._dados is None or agora - self._carregado_em > self.ttl_segundos:
+            return self._carregar()
+        if self.detectar_mudancas and agora - self._verificado_em > self.intervalo_verificacao:
+            self._verificado_em = agora
+            if self._mudou_no_banco():
+                return self._carregar()
+        return True
+
+    def _atualizar(self):
+        """Garante dados carregados; em erro de banco mantém a última versão, se houver."""
+        try:
+            return self._garantir_atualizado()
+        except oracledb.DatabaseError as e:
+            print(f"Erro ao carregar dados de referência: {e}")
+            return self._dados is not None
+
+    def obter(self, tipo):
+        """Retorna as linhas (tuplas) do tipo pedido: 'niveis', 'areas' ou 'voluntarios'."""
+        with self._lock:
+            if not self._atualizar():
+                return []
+            return list(self._dados[tipo])
+
+    def contem(self, tipo, id_referencia):
+        """Indica se o ID existe entre os dados de referência do tipo."""
+        with self._lock:
+            if not self._atualizar():
+                return False
+            return id_referencia in self._indices[tipo]
+
+    def invalidar(self):
+        """Descarta o conteúdo em cache; a próxima leitura consulta o banco novamente."""
+        with self._lock:
+            self._dados = None
+
+
+_cache_referencias = None
+_cache_referencias_lock = threading.Lock()
+
+
+def _obter_cache():
+    """Cria o cache na primeira utilização, depois que o .env já foi carregado."""
+    global _cache_referencias
+    if _cache_referencias is None:
+        with _cache_referencias_lock:
+            if _cache_referencias is None:
+                _cache_referencias = CacheReferencias()
+    return _cache_referencias
+
+
+def obter_referencias(tipo):
+    """Linhas em cache de 'niveis', 'areas' ou 'voluntarios'."""
+    return _obter_cache().obter(tipo)
+
+
+def invalidar_referencias():
+    """Força a recarga dos dados de referência na próxima consulta."""
+    _obter_cache().invalidar()
+
+
+def validar_ids_desafio(id_nivel=None, id_voluntario=None, id_area=None):
+    """Valida no cliente os IDs de um desafio antes do INSERT/UPDATE (evita o ORA-02291).
+
+    Parâmetros None não são verificados. Retorna a lista de mensagens de erro (vazia se tudo ok).
+    """
+    erros = []
+    for tipo, valor in (("niveis", id_nivel), ("voluntarios", id_voluntario), ("areas", id_area)):
+        if valor is not None and not _obter_cache().contem(tipo, valor):
+            erros.append(f"ID de {DESCRICAO_REFERENCIA[tipo]} inválido: {valor}")
+    return erros
+
+
+def exibir_opcoes_referencia(tipo, titulo):
+    """Exibe a lista de opções em cache no mesmo formato de _exibir_lista_opcoes."""
+    print(f"\n--- {titulo} ---")
+    items = obter_referencias(tipo)
+    if not items:
+        print(f"Nenhuma opção disponível em '{titulo}'.")
+        return False
+    for item in items:
+        if len(item) >= 3:
+            print(f"ID: {item[0]} - {item[1]} - {item[2]}")
+        else:
+            print(f"ID: {item[0]} - {item[1]}")
+    return True
+
+
+def selecionar_referencia(tipo, titulo, prompt, valor_atual=None):
+    """Exibe as opções e pede um ID até que seja válido.
+
+    Com valor_atual informado, uma entrada vazia mantém o valor atual. Retorna None se não houver opções.
+    """
+    if not exibir_opcoes_referencia(tipo, titulo):
+        return None
+    while True:
+        valor_str = input(prompt).strip()
+        if not valor_str and valor_atual is not None:
+            return valor_atual
+        if valor_str.isdigit() and _obter_cache().contem(tipo, int(valor_str)):
+            return int(valor_str)
+        print(f"Entrada inválida. Digite um ID de {DESCRICAO_REFERENCIA[tipo]} da lista.")
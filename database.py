@@ -1,41 +1,186 @@
 import oracledb
-import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from metricas import incrementar, instrumentar_conexao, observar
+
+# --- Configuração do Pool de Sessões ---
+# Todos os valores podem ser sobrescritos por variáveis de ambiente (ex.: no arquivo .env).
+CONFIG_POOL_PADRAO = {
+    "min": 1,
+    "max": 8,
+    "increment": 1,
+    "ping_interval": 60,
+    "stmtcachesize": 40,
+    "wait_timeout": 5000,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_estatisticas_aquisicao = {
+    "aquisicoes": 0,
+    "falhas": 0,
+    "espera_total": 0.0,
+    "espera_maxima": 0.0,
+}
+_estatisticas_lock = threading.Lock()
+
+
+def ler_inteiro_ambiente(nome, padrao):
+    """Valor inteiro não negativo da variável de ambiente, ou o padrão se ela faltar ou não for um número."""
+    valor = os.getenv(nome)
+    return int(valor) if valor and valor.strip().isdigit() else padrao
+
+
+def ler_config_pool():
+    """Lê a configuração do pool a partir das variáveis de ambiente MOTUS_POOL_*."""
+    return {chave: ler_inteiro_ambiente(f"MOTUS_POOL_{chave.upper()}", padrao)
+            for chave, padrao in CONFIG_POOL_PADRAO.items()}
+
+
+def _criar_pool():
+    """Cria o pool de sessões do Oracle com os parâmetros configurados."""
+    config = ler_config_pool()
+    return oracledb.create_pool(
+        user=os.getenv('ORACLE_USER', ''),
+        password=os.getenv('ORACLE_PASSWORD', ''),
+        host=os.getenv('ORACLE_HOST', 'oracle.fiap.com.br'),
+        port=ler_inteiro_ambiente('ORACLE_PORT', 1521),
+        sid=os.getenv('ORACLE_SID', 'ORCL'),
+        min=config["min"],
+        max=config["max"],
+        increment=config["increment"],
+        ping_interval=config["ping_interval"],
+        stmtcachesize=config["stmtcachesize"],
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        wait_timeout=config["wait_timeout"],
+    )
+
+
+def obter_pool():
+    """Retorna o pool de sessões do processo, criando-o na primeira chamada."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _criar_pool()
+    return _pool
+
+
+def fechar_pool():
+    """Fecha o pool de sessões (chamado ao encerrar a aplicação)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            try:
+                _pool.close(force=True)
+            except oracledb.Error as e:
+                print(f"Erro ao fechar o pool de conexões: {e}")
+            _pool = None
+
+
+def _registrar_aquisicao(espera, sucesso):
+    with _estatisticas_lock:
+        if sucesso:
+            _estatisticas_aquisicao["aquisicoes"] += 1
+        else:
+            _estatisticas_aquisicao["falhas"] += 1
+        _estatisticas_aquisicao["espera_total"] += espera
+        _estatisticas_aquisicao["espera_maxima"] = max(_estatisticas_aquisicao["espera_maxima"], espera)
+
 
 def conectar_banco():
+    """Obtém uma conexão do pool. Chamar conn.close() devolve a sessão ao pool."""
+    inicio = time.perf_counter()
     try:
-
-        conn = oracledb.connect(
-            user='',
-            password='',
-            host='oracle.fiap.com.br',
-            port=1521,
-            sid='ORCL'
-        )
+        conn = obter_pool().acquire()
+        espera = time.perf_counter() - inicio
+        _registrar_aquisicao(espera, True)
+        observar("motus_db_aquisicao_segundos", espera)
         return conn
-
-    except FileNotFoundError:
-        print("Erro: Arquivo credenciais.json não encontrado!")
-        return None
-    except json.JSONDecodeError:
-        print("Erro: Problema ao ler o arquivo JSON!")
-        return None
     except oracledb.Error as e:
+        _registrar_aquisicao(time.perf_counter() - inicio, False)
+        incrementar("motus_db_aquisicao_falhas_total")
         print(f"Erro de conexão com o banco: {e}")
         return None
 
 
-def testar_conexao():
+def backend_banco():
+    """Banco em uso: 'oracle' (padrão) ou 'sqlite' (implementação local em banco_sqlite.py)."""
+    return os.getenv('MOTUS_BANCO', 'oracle').strip().lower()
+
+
+def identidade_banco():
+    """Identifica o banco de origem, para que os arquivos locais (índices, resumos, marcas d'água) não misturem bancos."""
+    if backend_banco() == 'sqlite':
+        from banco_sqlite import caminho_banco_local
+        return "sqlite:" + os.path.abspath(caminho_banco_local())
+    return f"oracle:{os.getenv('ORACLE_USER', '')}@{os.getenv('ORACLE_HOST', 'oracle.fiap.com.br')}/{os.getenv('ORACLE_SID', 'ORCL')}"
+
+
+@contextmanager
+def conexao_banco():
+    """Context manager que empresta uma conexão do pool e a devolve ao final.
+
+    Produz None se não for possível obter a conexão, no mesmo estilo de conectar_banco().
+    Com MOTUS_BANCO=sqlite, produz uma conexão do banco local com a mesma interface.
+    """
+    if backend_banco() == 'sqlite':
+        from banco_sqlite import conexao_sqlite
+        with conexao_sqlite() as conn:
+            yield instrumentar_conexao(conn)
+        return
     conn = conectar_banco()
-    if conn:
-        try:
-            with conn.cursor() as cursor:
-                sql = "SELECT table_name FROM user_tables ORDER BY table_name"
-                cursor.execute(sql)
-                print("--- Tabelas deste usuário ---")
-                resultado_query = cursor.fetchall()
-                for linha in resultado_query:
-                    print(linha[0])
-        except oracledb.Error as e:
-            print(f"Erro ao executar consulta: {e}")
-        finally:
-            conn.close()
\ No newline at end of file
+    try:
+        yield instrumentar_conexao(conn)
+    finally:
+        if conn:
+            conn.close()
+
+
+def estatisticas_pool():
+    """Retorna um dicionário com o uso atual do pool e os tempos de espera por conexão."""
+    with _estatisticas_lock:
+        stats = dict(_estatisticas_aquisicao)
+    total = stats["aquisicoes"] + stats["falhas"]
+    stats["espera_media"] = stats["espera_total"] / total if total else 0.0
+    if _pool is not None:
+        stats.update({
+            "ocupadas": _pool.busy,
+            "abertas": _pool.opened,
+            "minimo": _pool.min,
+            "maximo": _pool.max,
+        })
+    return stats
+
+
+def exibir_estatisticas_pool():
+    """Imprime as estatísticas do pool de conexões."""
+    if backend_banco() == 'sqlite':
+        print("\nBanco local SQLite em uso (sem pool de sessões).")
+        return
+    stats = estatisticas_pool()
+    print("\n--- Estatísticas do Pool de Conexões ---")
+    if "abertas" in stats:
+        print(f"Sessões ocupadas/abertas: {stats['ocupadas']}/{stats['abertas']} (mín. {stats['minimo']}, máx. {stats['maximo']})")
+    else:
+        print("Pool ainda não inicializado.")
+    print(f"Aquisições: {stats['aquisicoes']} | Falhas: {stats['falhas']}")
+    print(f"Espera por conexão: média {stats['espera_media'] * 1000:.1f} ms | máxima {stats['espera_maxima'] * 1000:.1f} ms")
+
+
+def testar_conexao():
+    with conexao_banco() as conn:
+        if conn:
+            try:
+                with conn.cursor() as cursor:
+                    sql = "SELECT table_name FROM user_tables ORDER BY table_name"
+                    cursor.execute(sql)
+                    print("--- Tabelas deste usuário ---")
+                    resultado_query = cursor.fetchall()
+                    for linha in resultado_query:
+                        print(linha[0])
+            except oracledb.Error as e:
+                print(f"Erro ao executar consulta: {e}")
+            exibir_estatisticas_pool()
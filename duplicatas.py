@@ -0,0 +1,362 @@
+from database import conexao_banco, identidade_banco
+from busca_desafios import CONSULTA_DESAFIO_PARA_INDICE, CONSULTA_DESAFIOS_PARA_INDICE, _texto, tokenizar
+import oracledb
+import hashlib
+import operator
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+# --- Configuração do MinHash/LSH ---
+# Assinatura de NUM_POSICOES valores (one permutation hashing: um único hash por shingle, custo
+# linear no tamanho do texto) dividida em BANDAS faixas de LINHAS_POR_BANDA valores para o LSH.
+# Um par com similaridade s vira candidato com probabilidade 1 - (1 - s^3)^32: com 32 x 3 o limiar
+# do LSH fica em ~0,31 (1/32)^(1/3), abaixo de LIMIAR_TEMA_PADRAO; em s = 0,5 são ~98,6% dos pares
+# e em s >= 0,6 mais de 99,9%. Faixas de 2 valores dariam o mesmo recall, mas com tantos candidatos
+# por consulta que a busca de desafios parecidos ficaria cem vezes mais lenta.
+NUM_POSICOES = 96
+BANDAS = 32
+LINHAS_POR_BANDA = NUM_POSICOES // BANDAS
+
+
+def _ordem_fontes(posicao):
+    """Ordem fixa (pseudoaleatória) em que uma posição vazia procura outra preenchida para copiar."""
+    return sorted(range(NUM_POSICOES), key=lambda fonte: hashlib.blake2b(
+        f"{posicao}:{fonte}".encode(), digest_size=8).digest())
+
+
+# Uma ordem independente por posição (densificação "ótima"): em textos curtos, com muitas posições
+# vazias, as linhas de uma mesma faixa não copiam todas do mesmo vizinho.
+_FONTES = [_ordem_fontes(posicao) for posicao in range(NUM_POSICOES)]
+
+CAMINHO_PADRAO = os.path.join('.motus', 'indice_duplicatas.sqlite3')
+LIMIAR_TEMA_PADRAO = 0.5
+LIMIAR_DESAFIO_PADRAO = 0.7
+
+DDL_DUPLICATAS = """
+CREATE TABLE IF NOT EXISTS assinaturas (
+    tipo TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    descricao TEXT NOT NULL,
+    assinatura BLOB NOT NULL,
+    PRIMARY KEY (tipo, chave)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+
+def shingles(texto):
+    """Conjunto de termos e pares de termos consecutivos do texto (já normalizados por tokenizar)."""
+    termos = tokenizar(texto)
+    conjunto = set(termos)
+    conjunto.update(f"{a} {b}" for a, b in zip(termos, termos[1:]))
+    return conjunto
+
+
+def calcular_assinatura(texto):
+    """Assinatura MinHash (tupla de NUM_POSICOES inteiros) do texto, ou None se não houver termos."""
+    conjunto = shingles(texto)
+    if not conjunto:
+        return None
+    posicoes = [None] * NUM_POSICOES
+    for shingle in conjunto:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        posicao = h % NUM_POSICOES
+        valor = h // NUM_POSICOES
+        atual = posicoes[posicao]
+        if atual is None or valor < atual:
+            posicoes[posicao] = valor
+    assinatura = list(posicoes)
+    for posicao, valor in enumerate(posicoes):
+        if valor is None:
+            assinatura[posicao] = next(posicoes[fonte] for fonte in _FONTES[posicao] if posicoes[fonte] is not None)
+    return tuple(assinatura)
+
+
+def similaridade(assinatura_a, assinatura_b):
+    """Estimativa da similaridade de Jaccard entre dois textos a partir das assinaturas."""
+    return sum(map(operator.eq, assinatura_a, assinatura_b)) / NUM_POSICOES
+
+
+def _bandas(assinatura):
+    return [(banda, assinatura[banda * LINHAS_POR_BANDA:(banda + 1) * LINHAS_POR_BANDA]) for banda in range(BANDAS)]
+
+
+def texto_exercicio(exercicio):
+    """Texto de um exercício gerado, no mesmo formato gravado em TB_MOT_DESAFIO (título + descrição)."""
+    return (f"{exercicio.get('titulo', '')}\n{exercicio.get('material_explicativo', '')}\n\n"
+            f"PERGUNTA: {exercicio.get('pergunta_interativa', '')}")
+
+
+class IndiceDuplicatas:
+    """Índice LSH em memória de desafios existentes e temas já gerados, persistido em SQLite.
+
+    Desafios entram pela marca d'água de id_desafio (sincronização incremental a cada
+    intervalo_sincronizacao segundos) ou direto por adicionar_desafios() após um INSERT; temas
+    entram por registrar_tema() após cada geração. A consulta calcula a assinatura do texto,
+    lê os buckets das BANDAS faixas e compara só os candidatos encontrados. Só desafios ativos
+    ficam no índice; um tema pedido é comparado por contenção com os temas e títulos (contendo_tema).
+    """
+
+    def __init__(self, caminho=None, intervalo_sincronizacao=None):
+        self.caminho = caminho or os.getenv('MOTUS_DUPLICATAS_CAMINHO', CAMINHO_PADRAO)
+        self.intervalo_sincronizacao = intervalo_sincronizacao or int(os.getenv('MOTUS_DUPLICATAS_INTERVALO_S', 30))
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.executescript(DDL_DUPLICATAS)
+        self._lock = threading.RLock()
+        self._assinaturas = {}
+        self._descricoes = {}
+        self._buckets = {}
+        # Shingles dos textos curtos (título dos desafios e texto dos temas) e, por shingle, os itens
+        # que o têm: temas são comparados por contenção nesses textos (ver contendo_tema).
+        self._shingles_curtos = {}
+        self._curtos_por_shingle = {}
+        self._sincronizado_em = 0.0
+
+        identidade = identidade_banco()
+        linha = self._conn.execute("SELECT valor FROM meta WHERE chave = 'banco'").fetchone()
+        if not linha or linha[0] != identidade:
+            # Temas continuam válidos; desafios e a marca d'água pertencem ao banco anterior.
+            self._conn.execute("DELETE FROM assinaturas WHERE tipo = 'desafio'")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.execute("INSERT INTO meta (chave, valor) VALUES ('banco', ?)", (identidade,))
+            self._conn.execute("INSERT INTO meta (chave, valor) VALUES ('somente_ativos', 'S')")
+            self._conn.commit()
+        if not self._conn.execute("SELECT 1 FROM meta WHERE chave = 'somente_ativos'").fetchone():
+            # Índice de uma versão que também guardava desafios inativos: os desafios são relidos.
+            self._conn.execute("DELETE FROM assinaturas WHERE tipo = 'desafio'")
+            self._conn.execute("DELETE FROM meta WHERE chave = 'ultimo_id'")
+            self._conn.execute("INSERT INTO meta (chave, valor) VALUES ('somente_ativos', 'S')")
+            self._conn.commit()
+        self._migrar_assinaturas()
+        for tipo, chave, descricao, blob in self._conn.execute("SELECT tipo, chave, descricao, assinatura FROM assinaturas"):
+            self._adicionar_memoria((tipo, chave), descricao, tuple(array('Q', blob)))
+
+    def _migrar_assinaturas(self):
+        """Recalcula as assinaturas gravadas com outro NUM_POSICOES.
+
+        Temas são recalculados a partir do texto guardado; desafios (que guardam só o título) saem
+        do índice junto com a marca d'água e voltam na próxima sincronização.
+        """
+        tamanho = NUM_POSICOES * array('Q').itemsize
+        antigas = self._conn.execute("SELECT tipo, chave, descricao FROM assinaturas WHERE LENGTH(assinatura) <> ?",
+                                     (tamanho,)).fetchall()
+        if not antigas:
+            return
+        for tipo, chave, descricao in antigas:
+            assinatura = calcular_assinatura(descricao) if tipo == 'tema' else None
+            if assinatura:
+                self._conn.execute("UPDATE assinaturas SET assinatura = ? WHERE tipo = ? AND chave = ?",
+                                   (array('Q', assinatura).tobytes(), tipo, chave))
+            else:
+                self._conn.execute("DELETE FROM assinaturas WHERE tipo = ? AND chave = ?", (tipo, chave))
+        if any(tipo == 'desafio' for tipo, _, _ in antigas):
+            self._conn.execute("DELETE FROM meta WHERE chave = 'ultimo_id'")
+        self._conn.commit()
+
+    # --- Estrutura em memória ---
+    def _remover_memoria(self, chave):
+        anterior = self._assinaturas.pop(chave, None)
+        if anterior is not None:
+            for banda in _bandas(anterior):
+                self._buckets.get(banda, set()).discard(chave)
+        self._descricoes.pop(chave, None)
+        for shingle in self._shingles_curtos.pop(chave, ()):
+            self._curtos_por_shingle.get(shingle, set()).discard(chave)
+
+    def _adicionar_memoria(self, chave, descricao, assinatura):
+        self._remover_memoria(chave)
+        self._assinaturas[chave] = assinatura
+        self._descricoes[chave] = descricao
+        for banda in _bandas(assinatura):
+            self._buckets.setdefault(banda, set()).add(chave)
+        self._shingles_curtos[chave] = shingles(descricao)
+        for shingle in self._shingles_curtos[chave]:
+            self._curtos_por_shingle.setdefault(shingle, set()).add(chave)
+
+    def _gravar(self, tipo, chave, descricao, assinatura):
+        self._conn.execute("INSERT OR REPLACE INTO assinaturas (tipo, chave, descricao, assinatura) VALUES (?, ?, ?, ?)",
+                           (tipo, chave, descricao, array('Q', assinatura).tobytes()))
+        self._adicionar_memoria((tipo, chave), descricao, assinatura)
+
+    def _remover_desafio(self, id_desafio):
+        self._conn.execute("DELETE FROM assinaturas WHERE tipo = 'desafio' AND chave = ?", (str(id_desafio),))
+        self._remover_memoria(('desafio', str(id_desafio)))
+
+    # --- Alimentação ---
+    def adicionar_desafios(self, itens):
+        """Indexa desafios recém-gravados, dados como (id_desafio, titulo, assinatura), sem esperar a sincronização."""
+        with self._lock:
+            for id_desafio, titulo, assinatura in itens:
+                self._gravar('desafio', str(id_desafio), titulo, assinatura)
+            self._conn.commit()
+
+    def reindexar_desafio(self, cursor, id_desafio):
+        """Relê um desafio alterado pelo CRUD e atualiza a assinatura dele; inativos ou apagados saem do índice."""
+        cursor.execute(CONSULTA_DESAFIO_PARA_INDICE, (id_desafio,))
+        linha = cursor.fetchone()
+        titulo = _texto(linha[1]) if linha else ""
+        assinatura = calcular_assinatura(f"{titulo}\n{_texto(linha[2])}") if linha and linha[4] == 'S' else None
+        if assinatura:
+            self.adicionar_desafios([(id_desafio, titulo, assinatura)])
+            return
+        with self._lock:
+            self._remover_desafio(id_desafio)
+            self._conn.commit()
+
+    def registrar_tema(self, tema):
+        """Guarda um tema já gerado, para avisar quando um tema parecido for pedido de novo."""
+        assinatura = calcular_assinatura(tema)
+        if assinatura:
+            with self._lock:
+                self._gravar('tema', ' '.join(tokenizar(tema)), tema, assinatura)
+                self._conn.commit()
+
+    def sincronizar(self, forcar=False):
+        """Indexa os desafios acima da marca d'água, no máximo a cada intervalo_sincronizacao segundos."""
+        with self._lock:
+            agora = time.monotonic()
+            if not forcar and agora - self._sincronizado_em < self.intervalo_sincronizacao:
+                return 0
+            self._sincronizado_em = agora
+            linha = self._conn.execute("SELECT valor FROM meta WHERE chave = 'ultimo_id'").fetchone()
+            marca = int(linha[0]) if linha else 0
+            indexados = 0
+            with conexao_banco() as conn:
+                if not conn:
+                    return 0
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.arraysize = 500
+                        cursor.execute(CONSULTA_DESAFIOS_PARA_INDICE, (marca,))
+                        for id_desafio, titulo, descricao, _, ativo in cursor:
+                            titulo = _texto(titulo)
+                            assinatura = calcular_assinatura(f"{titulo}\n{_texto(descricao)}") if ativo == 'S' else None
+                            if assinatura:
+                                self._gravar('desafio', str(id_desafio), titulo, assinatura)
+                            marca = max(marca, id_desafio)
+                            indexados += 1
+                except oracledb.DatabaseError as e:
+                    print(f"Erro ao atualizar o índice de duplicatas: {e}")
+            self._conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('ultimo_id', ?)", (str(marca),))
+            self._conn.commit()
+            return indexados
+
+    # --- Consulta ---
+    def similares_assinatura(self, assinatura, tipo=None, limiar=0.5, limite=5):
+        """Itens do índice com similaridade >= limiar, do mais parecido para o menos."""
+        if not assinatura:
+            return []
+        with self._lock:
+            candidatos = set()
+            for banda in _bandas(assinatura):
+                candidatos.update(self._buckets.get(banda, ()))
+            resultados = []
+            for chave in candidatos:
+                if tipo and chave[0] != tipo:
+                    continue
+                pontuacao = similaridade(assinatura, self._assinaturas[chave])
+                if pontuacao >= limiar:
+                    resultados.append({
+                        "tipo": chave[0],
+                        "id_desafio": int(chave[1]) if chave[0] == 'desafio' else None,
+                        "descricao": self._descricoes[chave],
+                        "similaridade": round(pontuacao, 3),
+                    })
+        resultados.sort(key=lambda r: -r["similaridade"])
+        return resultados[:limite]
+
+    def similares(self, texto, tipo=None, limiar=0.5, limite=5):
+        return self.similares_assinatura(calcular_assinatura(texto), tipo, limiar, limite)
+
+    def contendo_tema(self, tema, limiar=0.5, limite=5):
+        """Temas já gerados e desafios ativos que contêm a fração >= limiar do tema: |tema ∩ texto| / |tema|.
+
+        O texto comparado é o do tema ou o título do desafio. Contra o texto inteiro de um desafio,
+        a similaridade de Jaccard de um tema de poucas palavras nunca chega ao limiar.
+        """
+        termos = shingles(tema)
+        if not termos:
+            return []
+        with self._lock:
+            candidatos = set()
+            for shingle in termos:
+                candidatos.update(self._curtos_por_shingle.get(shingle, ()))
+            resultados = []
+            for chave in candidatos:
+                pontuacao = len(termos & self._shingles_curtos[chave]) / len(termos)
+                if pontuacao >= limiar:
+                    resultados.append({
+                        "tipo": chave[0],
+                        "id_desafio": int(chave[1]) if chave[0] == 'desafio' else None,
+                        "descricao": self._descricoes[chave],
+                        "similaridade": round(pontuacao, 3),
+                    })
+        resultados.sort(key=lambda r: (-r["similaridade"], r["descricao"]))
+        return resultados[:limite]
+
+    def estatisticas(self):
+        with self._lock:
+            tipos = [chave[0] for chave in self._assinaturas]
+            return {"desafios": tipos.count('desafio'), "temas": tipos.count('tema'), "buckets": len(self._buckets)}
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def obter_indice_duplicatas():
+    """Índice de duplicatas do processo (None se desativado com MOTUS_DUPLICATAS=N ou sem disco)."""
+    global _indice
+    if os.getenv('MOTUS_DUPLICATAS', 'S').upper() not in ('S', '1', 'TRUE'):
+        return None
+    if _indice is None:
+        with _indice_lock:
+            if _indice is None:
+                try:
+                    _indice = IndiceDuplicatas()
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Índice de duplicatas indisponível: {e}")
+                    return None
+    return _indice
+
+
+def reindexar_desafio(cursor, id_desafio):
+    """Atualiza o índice após um UPDATE em TB_MOT_DESAFIO (chamado pelo CRUD com o cursor da alteração)."""
+    indice = obter_indice_duplicatas()
+    if indice:
+        try:
+            indice.reindexar_desafio(cursor, id_desafio)
+        except oracledb.DatabaseError as e:
+            print(f"Erro ao atualizar o índice de duplicatas: {e}")
+
+
+def limiar_tema():
+    return float(os.getenv('MOTUS_DUPLICATAS_LIMIAR_TEMA', LIMIAR_TEMA_PADRAO))
+
+
+def limiar_desafio():
+    return float(os.getenv('MOTUS_DUPLICATAS_LIMIAR_DESAFIO', LIMIAR_DESAFIO_PADRAO))
+
+
+def temas_similares(tema, limite=5):
+    """Temas já gerados e desafios ativos que contêm o tema pedido (no texto do tema ou no título)."""
+    indice = obter_indice_duplicatas()
+    if not indice:
+        return []
+    indice.sincronizar()
+    return indice.contendo_tema(tema, limiar=limiar_tema(), limite=limite)
+
+
+def exibir_similares(similares):
+    for item in similares:
+        origem = f"Desafio ID {item['id_desafio']}" if item["tipo"] == 'desafio' else "Tema já gerado"
+        print(f"   - {origem}: {item['descricao']} (similaridade {item['similaridade']:.0%})")
@@ -1,63 +1,224 @@
 from google import genai
+from google.genai import types
 from dotenv import load_dotenv
 import os
 import json
-import re
-from database import conectar_banco
-import oracledb
+import sys
+import time
+import asyncio
+import argparse
+import hashlib
+import itertools
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+from database import conexao_banco
+from crud_desafios import inserir_desafios_em_lote
+from dados_referencia import selecionar_referencia, validar_ids_desafio
+from duplicatas import (calcular_assinatura, exibir_similares, limiar_desafio, obter_indice_duplicatas,
+                        similaridade, temas_similares, texto_exercicio)
+from limite_taxa import obter_limitador
+from metricas import cronometrar, observar
 
-load_dotenv()
+# --- Funções Auxiliares de UI ---
+def _selecionar_voluntario_e_area():
+    """Exibe as opções e retorna (id_voluntario, id_area), ou None se não for possível."""
+    id_voluntario = selecionar_referencia("voluntarios", "Voluntário Criador", "Digite o ID do voluntário criador: ")
+    if id_voluntario is None:
+        return None
+    id_area = selecionar_referencia("areas", "Área de Competência", "Digite o ID da área de competência: ")
+    if id_area is None:
+        return None
+    return id_voluntario, id_area
 
-# --- Consultas SQL Auxiliares ---
-CONSULTA_VOLUNTARIOS_ATIVOS = "SELECT id_voluntario, nome FROM TB_MOT_VOLUNTARIO v JOIN TB_MOT_USUARIO u ON v.id_usuario = u.id_usuario WHERE u.ativo = 'S' ORDER BY u.nome"
-CONSULTA_AREAS_COMPETENCIA = "SELECT id_area, codigo, descricao FROM TB_MOT_AREA_COMPETENCIA ORDER BY codigo"
+def ler_temas_arquivo(caminho):
+    """Lê um arquivo de temas (um por linha), ignorando linhas vazias e comentários (#)."""
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        temas = [linha.strip() for linha in arquivo]
+    return [tema for tema in temas if tema and not tema.startswith('#')]
 
-# --- Funções Auxiliares de UI ---
-def _obter_input_numerico(prompt):
-    """Solicita um número ao usuário e garante que a entrada seja um inteiro válido."""
-    while True:
-        valor_str = input(prompt).strip()
-        if valor_str.isdigit():
-            return int(valor_str)
-        else:
-            print("Entrada inválida. Por favor, digite um número inteiro.")
-
-def _exibir_lista_opcoes(cursor, titulo, consulta_sql):
-    """Executa uma consulta e exibe uma lista formatada de opções para o usuário."""
-    print(f"\n--- {titulo} ---")
+class CacheConteudo:
+    """Cache em disco (SQLite) do JSON validado gerado pela IA, com TTL e despejo LRU por tamanho.
+
+    A chave combina o tema normalizado, o modelo e o hash do prompt estruturado, de modo que
+    mudanças no prompt ou no modelo invalidam naturalmente as entradas antigas.
+    """
+
+    def __init__(self, caminho=None, ttl_segundos=None, tamanho_maximo_bytes=None):
+        self.caminho = caminho or os.getenv('MOTUS_CACHE_CAMINHO', os.path.join('.motus', 'cache_conteudo.sqlite3'))
+        self.ttl_segundos = ttl_segundos or int(os.getenv('MOTUS_CACHE_TTL_SEGUNDOS', 7 * 24 * 3600))
+        self.tamanho_maximo_bytes = tamanho_maximo_bytes or int(os.getenv('MOTUS_CACHE_MAX_MB', 50)) * 1024 * 1024
+        self.acertos = 0
+        self.faltas = 0
+        self.despejos = 0
+        self._lock = threading.Lock()
+
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_conteudo (
+                chave TEXT PRIMARY KEY,
+                tema TEXT NOT NULL,
+                modelo TEXT NOT NULL,
+                conteudo TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                criado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_acesso ON cache_conteudo (acessado_em)")
+        self._conn.commit()
+
+    @staticmethod
+    def normalizar_tema(tema):
+        """Remove acentos, caixa e espaços repetidos para que variações do mesmo tema coincidam."""
+        sem_acentos = unicodedata.normalize('NFKD', tema).encode('ascii', 'ignore').decode('ascii')
+        return ' '.join(sem_acentos.casefold().split())
+
+    @staticmethod
+    def gerar_chave(tema_normalizado, modelo, prompt):
+        impressao_prompt = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        return hashlib.sha256(f"{tema_normalizado}\x1f{modelo}\x1f{impressao_prompt}".encode('utf-8')).hexdigest()
+
+    def contem(self, chave):
+        """Indica se há uma entrada válida para a chave, sem alterar contadores nem a ordem LRU."""
+        with self._lock:
+            linha = self._conn.execute("SELECT criado_em FROM cache_conteudo WHERE chave = ?", (chave,)).fetchone()
+        return bool(linha) and time.time() - linha[0] <= self.ttl_segundos
+
+    def obter(self, chave):
+        """Retorna o conteúdo em cache (ou None), descartando entradas expiradas."""
+        agora = time.time()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT conteudo, criado_em FROM cache_conteudo WHERE chave = ?", (chave,)).fetchone()
+            if linha and agora - linha[1] > self.ttl_segundos:
+                self._conn.execute("DELETE FROM cache_conteudo WHERE chave = ?", (chave,))
+                self._conn.commit()
+                linha = None
+            if not linha:
+                self.faltas += 1
+                return None
+            self._conn.execute("UPDATE cache_conteudo SET acessado_em = ? WHERE chave = ?", (agora, chave))
+            self._conn.commit()
+            self.acertos += 1
+        return json.loads(linha[0])
+
+    def salvar(self, chave, tema, modelo, conteudo):
+        """Grava o conteúdo e despeja as entradas menos usadas se o limite de tamanho for excedido."""
+        texto = json.dumps(conteudo, ensure_ascii=False)
+        agora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_conteudo VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chave, tema, modelo, texto, len(texto.encode('utf-8')), agora, agora))
+            self._conn.execute("DELETE FROM cache_conteudo WHERE criado_em < ?", (agora - self.ttl_segundos,))
+            total = self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM cache_conteudo").fetchone()[0]
+            if total > self.tamanho_maximo_bytes:
+                for chave_antiga, tamanho in self._conn.execute(
+                        "SELECT chave, tamanho FROM cache_conteudo ORDER BY acessado_em").fetchall():
+                    if total <= self.tamanho_maximo_bytes or chave_antiga == chave:
+                        break
+                    self._conn.execute("DELETE FROM cache_conteudo WHERE chave = ?", (chave_antiga,))
+                    total -= tamanho
+                    self.despejos += 1
+            self._conn.commit()
+
+    def estatisticas(self):
+        with self._lock:
+            entradas, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM cache_conteudo").fetchone()
+        consultas = self.acertos + self.faltas
+        return {
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "taxa_acerto": round(self.acertos / consultas * 100, 1) if consultas else 0,
+            "despejos": self.despejos,
+            "entradas": entradas,
+            "tamanho_bytes": total,
+        }
+
+_cache_conteudo = None
+_cache_conteudo_lock = threading.Lock()
+
+def obter_cache_conteudo():
+    """Retorna o cache de conteúdo compartilhado pelo processo (None se o disco não estiver disponível)."""
+    global _cache_conteudo
+    if _cache_conteudo is None:
+        with _cache_conteudo_lock:
+            if _cache_conteudo is None:
+                try:
+                    _cache_conteudo = CacheConteudo()
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Cache de conteúdo indisponível: {e}")
+                    return None
+    return _cache_conteudo
+
+# --- Cliente Gemini Compartilhado ---
+# Um único genai.Client por processo: as conexões HTTP (TLS, keep-alive) são reaproveitadas entre
+# chamadas, em vez de abrir um cliente novo a cada aula gerada.
+MODELO_PADRAO = "gemini-2.5-flash"
+TIMEOUT_PADRAO_MS = 60000
+# Estimativa de tokens de saída de uma aula completa, reservada na cota antes da chamada.
+TOKENS_SAIDA_ESTIMADOS = 3000
+
+_cliente_gemini = None
+_cliente_gemini_lock = threading.Lock()
+
+def modelo_gemini():
+    """Nome do modelo usado na geração (MOTUS_GEMINI_MODELO)."""
+    return os.getenv('MOTUS_GEMINI_MODELO', MODELO_PADRAO).strip() or MODELO_PADRAO
+
+def obter_cliente_gemini():
+    """Retorna o cliente Gemini do processo, criando-o na primeira chamada (None se não for possível)."""
+    global _cliente_gemini
+    if _cliente_gemini is None:
+        with _cliente_gemini_lock:
+            if _cliente_gemini is None:
+                timeout = os.getenv('MOTUS_GEMINI_TIMEOUT_MS', '')
+                try:
+                    _cliente_gemini = genai.Client(
+                        api_key=os.getenv('GEMINI_API_KEY'),
+                        http_options=types.HttpOptions(
+                            timeout=int(timeout) if timeout.strip().isdigit() else TIMEOUT_PADRAO_MS),
+                    )
+                    print("Conectado à API Gemini")
+                except Exception as e:
+                    print(f"Erro ao conectar com Gemini: {e}")
+                    return None
+    return _cliente_gemini
+
+def _aquecer_cliente():
+    cliente = obter_cliente_gemini()
+    if cliente is None:
+        return
     try:
-        cursor.execute(consulta_sql)
-        items = cursor.fetchall()
-        if not items:
-            print(f"Nenhuma opção disponível em '{titulo}'.")
-            return False
-        
-        for item in items:
-            if len(item) >= 3:
-                 print(f"ID: {item[0]} - {item[1]} - {item[2]}")
-            else:
-                 print(f"ID: {item[0]} - {item[1]}")
-        return True
-    except oracledb.DatabaseError as e:
-        print(f"Erro ao buscar dados para '{titulo}': {e}")
-        return False
+        # Consulta leve que já abre a conexão TLS usada pelas próximas gerações.
+        cliente.models.get(model=modelo_gemini())
+    except Exception:
+        pass
 
-class GeradorConteudoMotus:
-    def __init__(self):
-        """Inicializa o cliente da API Gemini"""
-        try:
-            self.client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-            self.model = "gemini-2.5-flash"
-            print("Conectado à API Gemini")
-        except Exception as e:
-            print(f"Erro ao conectar com Gemini: {e}")
-            self.client = None
+def aquecer_cliente_gemini(em_segundo_plano=True):
+    """Cria o cliente e abre a conexão com a API antes da primeira geração.
 
-    def criar_prompt_estruturado(self, tema):
-        """Cria o prompt fusionado para geração de conteúdo"""
-        prompt = f"""
+    Por padrão roda em uma thread em segundo plano, para não atrasar a abertura do menu.
+    """
+    if not em_segundo_plano:
+        _aquecer_cliente()
+        return None
+    thread = threading.Thread(target=_aquecer_cliente, name="aquecimento-gemini", daemon=True)
+    thread.start()
+    return thread
+
+# --- Prompt do Mentor ---
+# Parte fixa do prompt (persona, estrutura WEF e formato de saída). Só o tema varia entre as
+# chamadas, por isso o prefixo pode ficar em cache no Gemini (PrefixoEmCache).
+PROMPT_MENTOR_PREFIXO = """
 Você é o Motus, um mentor educacional voluntário do projeto Vepinho, na zona sul de São Paulo.
-Sua missão é explicar o tema: "{tema}" para jovens da Geração Z em situação de vulnerabilidade.
+Sua missão é explicar o tema indicado em "TEMA DA AULA" para jovens da Geração Z em situação de vulnerabilidade.
 
 --- SUA PERSONALIDADE (TOM DE VOZ) ---
 1.  **Mentor Parceiro:** Você fala de igual para igual, com empatia e incentivo. Use "nós", "bora", "se liga".
@@ -93,71 +254,437 @@ IMPORTANTE: Como nosso banco de dados é rígido, você deve FORMATAR os campos
 
 Siga este schema:
 [
-  {{
+  {
     "id_nivel_dificuldade": 1,
     "titulo": "Título curto estilo YouTube",
     "material_explicativo": "[Foco: Lógico-Analítico] Texto curto (max 400 chars) usando analogias. Tom: Mentor Parceiro.",
     "pergunta_interativa": "A pergunta do desafio.",
     "resposta_correta": "A resposta exata.",
     "feedback_explicacao": "Explicação do acerto. \\n💡 DICA MENTAL: Dica para alunos com TDAH (ex: desenhe no caderno)."
-  }},
-  {{
+  },
+  {
     "id_nivel_dificuldade": 2,
     "titulo": "Título focado em utilidade",
     "material_explicativo": "[Foco: Criativo-Adaptativo] Texto curto (max 400 chars) focado em aplicação prática.",
     "pergunta_interativa": "A pergunta do desafio.",
     "resposta_correta": "A resposta exata.",
     "feedback_explicacao": "Explicação da flexibilidade. \\n💡 DICA MENTAL: Dica de organização (ex: pense passo a passo)."
-  }},
-  {{
+  },
+  {
     "id_nivel_dificuldade": 3,
     "titulo": "Título Desafiador",
     "material_explicativo": "[Foco: Estratégico-Complexo] Texto curto (max 400 chars) focado em lógica pura.",
     "pergunta_interativa": "Pergunta difícil que exige Pensamento Analítico.",
     "resposta_correta": "A resposta exata.",
     "feedback_explicacao": "Explicação sistêmica. \\n💡 DICA MENTAL: Estratégia para sobrecarga (ex: respira e quebra o problema)."
-  }}
+  }
 ]
 """
-        return prompt
 
-    def extrair_json_da_resposta(self, texto):
-        """Extrai e valida o JSON da resposta da IA"""
-        try:
-            json_match = re.search(r'\[.*\]', texto, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                conteudo_gerado = json.loads(json_str)
-                if (isinstance(conteudo_gerado, list) and
-                        len(conteudo_gerado) > 0 and
-                        all('id_nivel_dificuldade' in item for item in conteudo_gerado)):
-                    return conteudo_gerado
-                else:
-                    print("Estrutura JSON inválida (não é uma lista ou itens não contêm 'id_nivel_dificuldade')")
-                    return None
-            else:
-                print("Nenhum JSON encontrado na resposta")
+def criar_prompt_tema(tema):
+    """Parte variável do prompt: apenas o tema da aula."""
+    return f'\nTEMA DA AULA: "{tema}"\n'
+
+# Renova o cached content um pouco antes de expirar; após uma falha na criação, espera antes de tentar de novo.
+MARGEM_RENOVACAO_S = 60
+ESPERA_APOS_FALHA_S = 600
+
+def erro_cache_contexto(erro):
+    """Indica se o erro da API se refere ao cached content (expirado, removido ou inválido)."""
+    return getattr(erro, 'code', None) in (400, 403, 404) and 'cache' in str(erro).lower()
+
+class PrefixoEmCache:
+    """Mantém PROMPT_MENTOR_PREFIXO como cached content do Gemini (context caching).
+
+    O cache é criado sob demanda com TTL de MOTUS_GEMINI_CACHE_TTL_S segundos e recriado quando
+    está para expirar ou quando a API informa que ele não existe mais (invalidar()). Se a criação
+    falhar (ex.: prefixo abaixo do mínimo de tokens do modelo), obter_nome() devolve None por
+    ESPERA_APOS_FALHA_S segundos e as gerações usam o prompt completo.
+    """
+
+    def __init__(self, client, modelo, ttl_segundos=None):
+        self.client = client
+        self.modelo = modelo
+        self.ttl_segundos = ttl_segundos or int(os.getenv('MOTUS_GEMINI_CACHE_TTL_S', 3600))
+        self.criacoes = 0
+        self.falhas = 0
+        self._nome = None
+        self._expira_em = 0.0
+        self._indisponivel_ate = 0.0
+        self._lock = threading.Lock()
+
+    def obter_nome(self):
+        """Nome do cached content válido (criando-o se preciso), ou None para usar o prompt completo."""
+        agora = time.monotonic()
+        with self._lock:
+            if self._nome and agora < self._expira_em - MARGEM_RENOVACAO_S:
+                return self._nome
+            if agora < self._indisponivel_ate:
                 return None
+            try:
+                cache = self.client.caches.create(
+                    model=self.modelo,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=PROMPT_MENTOR_PREFIXO,
+                        ttl=f"{self.ttl_segundos}s",
+                        display_name="motus-prefixo-mentor",
+                    ),
+                )
+            except Exception as e:
+                print(f"Cache de contexto indisponível, usando o prompt completo: {e}")
+                self.falhas += 1
+                self._nome = None
+                self._indisponivel_ate = agora + ESPERA_APOS_FALHA_S
+                return None
+            self.criacoes += 1
+            self._nome = cache.name
+            self._expira_em = agora + self.ttl_segundos
+            return self._nome
+
+    async def obter_nome_async(self):
+        """obter_nome() para o caminho assíncrono: a criação do cache (chamada de rede) roda em uma thread.
+
+        Com o cache válido, ou em espera após uma falha, responde sem sair do event loop.
+        """
+        agora = time.monotonic()
+        nome = self._nome
+        if nome and agora < self._expira_em - MARGEM_RENOVACAO_S:
+            return nome
+        if agora < self._indisponivel_ate:
+            return None
+        return await asyncio.to_thread(self.obter_nome)
+
+    def invalidar(self):
+        """Descarta o cache atual; a próxima geração cria outro."""
+        with self._lock:
+            self._nome = None
+
+_prefixos_em_cache = {}
+_prefixos_em_cache_lock = threading.Lock()
+
+def obter_prefixo_em_cache(client, modelo):
+    """PrefixoEmCache compartilhado pelo processo para o par (cliente, modelo)."""
+    chave = (id(client), modelo)
+    with _prefixos_em_cache_lock:
+        if chave not in _prefixos_em_cache:
+            _prefixos_em_cache[chave] = PrefixoEmCache(client, modelo)
+        return _prefixos_em_cache[chave]
+
+# --- Formato da Resposta da IA ---
+# Campos obrigatórios de cada exercício e o tipo esperado, na ordem em que o modelo deve gerá-los.
+CAMPOS_EXERCICIO = {
+    "id_nivel_dificuldade": int,
+    "titulo": str,
+    "material_explicativo": str,
+    "pergunta_interativa": str,
+    "resposta_correta": str,
+    "feedback_explicacao": str,
+}
+
+ESQUEMA_RESPOSTA = types.Schema(
+    type=types.Type.ARRAY,
+    min_items=3,
+    max_items=3,
+    items=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            campo: types.Schema(type=types.Type.INTEGER if tipo is int else types.Type.STRING)
+            for campo, tipo in CAMPOS_EXERCICIO.items()
+        },
+        required=list(CAMPOS_EXERCICIO),
+        property_ordering=list(CAMPOS_EXERCICIO),
+    ),
+)
+
+def _compilar_validador(campos):
+    """Monta uma única vez a função que valida (e normaliza) um exercício; retorna a mensagem de erro ou None."""
+    campos_inteiros = tuple(campo for campo, tipo in campos.items() if tipo is int)
+    campos_texto = tuple(campo for campo, tipo in campos.items() if tipo is str)
+
+    def validar(item):
+        if not isinstance(item, dict):
+            return "item não é um objeto JSON"
+        for campo in campos_inteiros:
+            valor = item.get(campo)
+            if isinstance(valor, str) and valor.strip().isdigit():
+                valor = item[campo] = int(valor)
+            if not isinstance(valor, int) or isinstance(valor, bool):
+                return f"campo '{campo}' ausente ou não inteiro"
+        for campo in campos_texto:
+            valor = item.get(campo)
+            if not isinstance(valor, str) or not valor.strip():
+                return f"campo '{campo}' ausente ou vazio"
+        return None
+
+    return validar
+
+validar_exercicio = _compilar_validador(CAMPOS_EXERCICIO)
+_decodificador_json = json.JSONDecoder()
+
+def _validar_exercicios(conteudo):
+    """Retorna None se o conteúdo é uma lista não vazia de exercícios válidos, ou a mensagem de erro."""
+    if not isinstance(conteudo, list) or not conteudo:
+        return "a resposta não é uma lista de exercícios"
+    for posicao, item in enumerate(conteudo, start=1):
+        erro = validar_exercicio(item)
+        if erro:
+            return f"exercício {posicao}: {erro}"
+    return None
+
+def localizar_exercicios_json(texto):
+    """Procura no texto o primeiro array JSON de exercícios válidos, sem expressão regular.
+
+    Cada '[' candidato é decodificado com raw_decode, que para no fim do array (ignorando texto
+    posterior, mesmo com colchetes) ou falha logo no primeiro caractere inválido. Retorna
+    (exercicios, None) ou (None, mensagem de erro).
+    """
+    ultimo_erro = "nenhum JSON encontrado na resposta"
+    posicao = texto.find('[')
+    while posicao != -1:
+        try:
+            valor, fim = _decodificador_json.raw_decode(texto, posicao)
+        except json.JSONDecodeError:
+            posicao = texto.find('[', posicao + 1)
+            continue
+        erro = _validar_exercicios(valor)
+        if erro is None:
+            return valor, None
+        ultimo_erro = f"estrutura JSON inválida ({erro})"
+        posicao = texto.find('[', fim if isinstance(valor, list) and valor else posicao + 1)
+    return None, ultimo_erro
+
+class ExtratorExerciciosIncremental:
+    """Lê a resposta da IA em pedaços e devolve cada exercício assim que o seu objeto JSON fecha.
+
+    Acompanha profundidade, strings e escapes caractere a caractere, em uma única passada; só o
+    texto do objeto em andamento é guardado. Um '[' seguido de algo que não seja um objeto (texto
+    entre colchetes antes do array) é descartado e a busca continua.
+    """
+
+    def __init__(self):
+        self.texto_completo = []
+        self.erros = []
+        self._profundidade = 0
+        self._em_string = False
+        self._escape = False
+        self._objeto = None
+        self._teve_objetos = False
+        self._array_encerrado = False
+
+    def alimentar(self, pedaco):
+        """Processa mais um trecho da resposta; retorna a lista de exercícios válidos completados nele."""
+        self.texto_completo.append(pedaco)
+        if self._array_encerrado:
+            return []
+        completos = []
+        inicio_objeto = 0 if self._objeto is not None else None
+        for posicao, caractere in enumerate(pedaco):
+            if self._em_string:
+                if self._escape:
+                    self._escape = False
+                elif caractere == '\\':
+                    self._escape = True
+                elif caractere == '"':
+                    self._em_string = False
+                continue
+            if self._profundidade == 0:
+                if caractere == '[':
+                    self._profundidade = 1
+                continue
+            if self._profundidade == 1:
+                if caractere == '{':
+                    self._profundidade = 2
+                    self._objeto = []
+                    inicio_objeto = posicao
+                elif caractere == ']':
+                    self._profundidade = 0
+                    if self._teve_objetos:
+                        self._array_encerrado = True
+                        break
+                elif caractere not in ' \t\r\n,':
+                    self._profundidade = 0
+                continue
+            if caractere == '"':
+                self._em_string = True
+            elif caractere in '{[':
+                self._profundidade += 1
+            elif caractere in '}]':
+                self._profundidade -= 1
+                if self._profundidade == 1:
+                    self._objeto.append(pedaco[inicio_objeto:posicao + 1])
+                    exercicio = self._finalizar_objeto()
+                    if exercicio is not None:
+                        completos.append(exercicio)
+                    inicio_objeto = None
+        if self._objeto is not None and inicio_objeto is not None:
+            self._objeto.append(pedaco[inicio_objeto:])
+        return completos
+
+    def _finalizar_objeto(self):
+        texto_objeto = ''.join(self._objeto)
+        self._objeto = None
+        self._teve_objetos = True
+        try:
+            exercicio = json.loads(texto_objeto)
         except json.JSONDecodeError as e:
-            print(f"Erro ao decodificar JSON: {e}")
+            self.erros.append(f"objeto JSON inválido: {e}")
+            return None
+        erro = validar_exercicio(exercicio)
+        if erro:
+            self.erros.append(erro)
+            return None
+        return exercicio
+
+    def texto(self):
+        """Resposta completa recebida até agora."""
+        return ''.join(self.texto_completo)
+
+class GeradorConteudoMotus:
+    def __init__(self, client=None, limitador=None):
+        """Usa o cliente Gemini e o limitador de cota compartilhados do processo (ou os informados, ex.: stubs nos benchmarks)"""
+        self.model = modelo_gemini()
+        # Saída estruturada: o modelo devolve apenas o JSON no formato de ESQUEMA_RESPOSTA.
+        self.saida_estruturada = os.getenv('MOTUS_SAIDA_ESTRUTURADA', 'S').upper() in ('S', '1', 'TRUE')
+        self.client = client if client is not None else obter_cliente_gemini()
+        self.cache = obter_cache_conteudo()
+        self.limitador = limitador or obter_limitador()
+        # Context caching do prefixo fixo do prompt: cada geração envia só o tema.
+        usar_cache_contexto = os.getenv('MOTUS_GEMINI_CACHE_CONTEXTO', 'S').upper() in ('S', '1', 'TRUE')
+        self.prefixo = obter_prefixo_em_cache(self.client, self.model) if usar_cache_contexto and self.client else None
+        self.duplicatas = obter_indice_duplicatas()
+
+    def criar_prompt_estruturado(self, tema):
+        """Cria o prompt fusionado para geração de conteúdo (prefixo fixo + tema)"""
+        return PROMPT_MENTOR_PREFIXO + criar_prompt_tema(tema)
+
+    def configuracao_geracao(self):
+        """Configuração enviada ao Gemini: resposta em JSON com o esquema das 3 aulas (ou None)."""
+        if not self.saida_estruturada:
             return None
+        return types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=ESQUEMA_RESPOSTA,
+        )
+
+    def _configuracao_com_timeout(self, timeout_ms):
+        """configuracao_geracao() com o tempo restante do prazo como timeout da requisição."""
+        config = self.configuracao_geracao() or types.GenerateContentConfig()
+        config.http_options = types.HttpOptions(timeout=timeout_ms)
+        return config
+
+    def _montar_requisicao(self, tema, timeout_ms, usar_prefixo=True, nome_cache=None):
+        """(contents, config) da chamada: só o tema com o prefixo em cache, ou o prompt completo.
+
+        nome_cache, se informado, é o cached content já obtido (caminho assíncrono).
+        """
+        config = self._configuracao_com_timeout(timeout_ms)
+        if nome_cache is None and usar_prefixo and self.prefixo:
+            nome_cache = self.prefixo.obter_nome()
+        if nome_cache:
+            config.cached_content = nome_cache
+            return criar_prompt_tema(tema), config
+        return self.criar_prompt_estruturado(tema), config
+
+    def _chamar_com_prefixo(self, tema, timeout_ms, chamada):
+        """Executa chamada(contents, config); se o cached content expirou, recria na próxima e repete com o prompt completo."""
+        contents, config = self._montar_requisicao(tema, timeout_ms)
+        try:
+            return chamada(contents, config)
         except Exception as e:
-            print(f"Erro inesperado ao extrair JSON: {e}")
+            if not (config.cached_content and erro_cache_contexto(e)):
+                raise
+            self.prefixo.invalidar()
+            contents, config = self._montar_requisicao(tema, timeout_ms, usar_prefixo=False)
+            return chamada(contents, config)
+
+    @staticmethod
+    def _tokens_estimados(prompt):
+        return len(prompt) // 4 + TOKENS_SAIDA_ESTIMADOS
+
+    def _registrar_uso(self, resposta, tokens_estimados):
+        uso = getattr(resposta, 'usage_metadata', None)
+        self.limitador.registrar_uso(tokens_estimados, getattr(uso, 'total_token_count', None))
+
+    def extrair_json_da_resposta(self, texto):
+        """Extrai e valida o JSON da resposta da IA"""
+        with cronometrar("motus_etapa_segundos", etapa="extracao_json"):
+            return self._extrair_json(texto)
+
+    def _extrair_json(self, texto):
+        if not texto:
+            print("Resposta vazia da IA")
             return None
+        # Caminho rápido: com saída estruturada a resposta inteira já é o array JSON.
+        try:
+            conteudo_gerado = json.loads(texto)
+        except json.JSONDecodeError:
+            conteudo_gerado = None
+        if conteudo_gerado is not None and _validar_exercicios(conteudo_gerado) is None:
+            return conteudo_gerado
+        conteudo_gerado, erro = localizar_exercicios_json(texto)
+        if erro:
+            print(erro[0].upper() + erro[1:])
+        return conteudo_gerado
+
+    def chave_cache(self, tema):
+        """Chave do cache para o tema: (tema normalizado, modelo, hash do prompt estruturado)."""
+        tema_normalizado = CacheConteudo.normalizar_tema(tema)
+        return CacheConteudo.gerar_chave(tema_normalizado, self.model, self.criar_prompt_estruturado(tema_normalizado))
+
+    def conteudo_em_cache(self, tema):
+        """Indica se já existe conteúdo válido em cache para o tema."""
+        return bool(self.cache) and self.cache.contem(self.chave_cache(tema))
+
+    def temas_similares(self, tema):
+        """Temas já gerados e desafios existentes parecidos com o tema (vazio se o índice estiver desativado)."""
+        return temas_similares(tema) if self.duplicatas else []
+
+    def _registrar_tema(self, tema):
+        if self.duplicatas:
+            self.duplicatas.registrar_tema(tema)
 
-    def gerar_conteudo_educacional(self, tema):
-        """Gera conteúdo educacional usando Gemini API"""
+    def gerar_conteudo_educacional(self, tema, usar_cache=True, forcar_atualizacao=False, evitar_similares=False):
+        """Gera conteúdo educacional usando Gemini API
+
+        Com usar_cache=False o cache é ignorado por completo; com forcar_atualizacao=True a IA
+        é consultada mesmo havendo entrada em cache, e o resultado substitui a entrada antiga.
+        Com evitar_similares=True a IA não é consultada se o tema já tiver conteúdo parecido.
+        """
         if not self.client:
             print("Cliente Gemini não inicializado")
             return None
+        usar_cache = usar_cache and self.cache is not None
+        if usar_cache and not forcar_atualizacao:
+            conteudo_gerado = self.cache.obter(self.chave_cache(tema))
+            if conteudo_gerado:
+                print(f"Conteúdo sobre '{tema}' recuperado do cache.")
+                return conteudo_gerado
+        if evitar_similares:
+            similares = self.temas_similares(tema)
+            if similares:
+                print(f"Tema '{tema}' parecido com conteúdo já existente; geração ignorada:")
+                exibir_similares(similares)
+                return None
         print(f"Gerando conteúdo sobre: {tema}")
         print("Consultando IA...")
         try:
             prompt = self.criar_prompt_estruturado(tema)
-            response = self.client.models.generate_content(model=self.model, contents=prompt)
+            tokens = self._tokens_estimados(prompt)
+
+            def chamar(timeout_ms):
+                with cronometrar("motus_etapa_segundos", etapa="gemini", modo="sincrono"):
+                    return self._chamar_com_prefixo(tema, timeout_ms, lambda contents, config:
+                                                    self.client.models.generate_content(
+                                                        model=self.model, contents=contents, config=config))
+
+            response = self.limitador.executar(chamar, tokens)
+            self._registrar_uso(response, tokens)
             conteudo_gerado = self.extrair_json_da_resposta(response.text)
             if conteudo_gerado:
                 print("Conteúdo gerado com sucesso!")
+                self._registrar_tema(tema)
+                if usar_cache:
+                    self.cache.salvar(self.chave_cache(tema), tema, self.model, conteudo_gerado)
                 return conteudo_gerado
             else:
                 print("Falha ao gerar conteúdo válido")
@@ -166,50 +693,350 @@ Siga este schema:
             print(f"Erro na API Gemini: {e}")
             return None
 
-    def salvar_conteudo_no_banco(self, conteudo_gerado, tema, id_voluntario, id_area):
-        """Salva o conteúdo gerado no banco de dados, recebendo os IDs como parâmetros."""
-        conn = conectar_banco()
-        if not conn:
-            print("Erro ao conectar no banco!")
-            return False
+    def gerar_conteudo_streaming(self, tema, usar_cache=True, forcar_atualizacao=False):
+        """Gera o conteúdo em streaming, produzindo cada exercício (nível) assim que ele fica completo.
+
+        Usa generate_content_stream e o ExtratorExerciciosIncremental; conteúdo em cache é produzido
+        de uma vez. Ao final, o conjunto completo e válido é gravado no cache. Erros da API são
+        exibidos e encerram o gerador.
+        """
+        if not self.client:
+            print("Cliente Gemini não inicializado")
+            return
+        usar_cache = usar_cache and self.cache is not None
+        if usar_cache and not forcar_atualizacao:
+            conteudo_gerado = self.cache.obter(self.chave_cache(tema))
+            if conteudo_gerado:
+                print(f"Conteúdo sobre '{tema}' recuperado do cache.")
+                yield from conteudo_gerado
+                return
+        print(f"Gerando conteúdo sobre: {tema}")
+        print("Consultando IA (streaming)...")
+        extrator = ExtratorExerciciosIncremental()
+        conteudo_gerado = []
         try:
-            with conn.cursor() as cursor:
-                desafios_criados = 0
-                for exercicio in conteudo_gerado:
-                    cursor.execute("SELECT SQ_MOT_DESAFIO.NEXTVAL FROM DUAL")
-                    id_desafio = cursor.fetchone()[0]
-                    sql_inserir = """
-                                  INSERT INTO TB_MOT_DESAFIO (id_desafio, titulo, descricao, resposta_correta,
-                                                              feedback_explicacao, ativo, id_nivel_dificuldade,
-                                                              id_voluntario_criador, id_area_competencia)
-                                  VALUES (:1, :2, :3, :4, :5, 'S', :6, :7, :8)
-                                  """
-                    descricao_completa = (
-                        f"{exercicio.get('material_explicativo', '')}\n\n"
-                        f"PERGUNTA: {exercicio.get('pergunta_interativa', '')}"
-                    )
-                    cursor.execute(sql_inserir, (
-                        id_desafio,
-                        exercicio.get('titulo', f'Desafio sobre {tema}'),
-                        descricao_completa,
-                        exercicio.get('resposta_correta', ''),
-                        exercicio.get('feedback_explicacao', ''),
-                        exercicio.get('id_nivel_dificuldade', 1),
-                        id_voluntario,
-                        id_area
-                    ))
-                    desafios_criados += 1
-                    print(f"Desafio Nível {exercicio.get('id_nivel_dificuldade')} salvo (ID: {id_desafio})")
-                conn.commit()
-                print(f"🎉 Total de {desafios_criados} desafios salvos no banco!")
-                return True
+            prompt = self.criar_prompt_estruturado(tema)
+            tokens = self._tokens_estimados(prompt)
+
+            def iniciar(timeout_ms):
+                # A requisição só acontece no primeiro next(); é essa parte que pode ser repetida.
+                with cronometrar("motus_etapa_segundos", etapa="gemini_primeiro_trecho", modo="streaming"):
+                    def abrir(contents, config):
+                        fluxo = iter(self.client.models.generate_content_stream(
+                            model=self.model, contents=contents, config=config))
+                        return next(fluxo, None), fluxo
+
+                    return self._chamar_com_prefixo(tema, timeout_ms, abrir)
+
+            inicio = time.perf_counter()
+            primeiro, fluxo = self.limitador.executar(iniciar, tokens)
+            chunk = None
+            for chunk in itertools.chain([primeiro] if primeiro is not None else [], fluxo):
+                for exercicio in extrator.alimentar(chunk.text or ''):
+                    conteudo_gerado.append(exercicio)
+                    yield exercicio
+            observar("motus_etapa_segundos", time.perf_counter() - inicio, etapa="gemini", modo="streaming")
+            self._registrar_uso(chunk, tokens)
         except Exception as e:
-            print(f"Erro ao salvar no banco: {e}")
-            conn.rollback()
-            return False
-        finally:
-            if conn:
-                conn.close()
+            print(f"Erro na API Gemini: {e}")
+            return
+        if not conteudo_gerado:
+            # O texto não pôde ser lido incrementalmente: tenta a extração sobre a resposta inteira.
+            conteudo_gerado = self.extrair_json_da_resposta(extrator.texto()) or []
+            yield from conteudo_gerado
+        for erro in extrator.erros:
+            print(f"Exercício descartado: {erro}")
+        if conteudo_gerado:
+            self._registrar_tema(tema)
+        if conteudo_gerado and usar_cache and not extrator.erros:
+            self.cache.salvar(self.chave_cache(tema), tema, self.model, conteudo_gerado)
+
+    async def gerar_conteudo_educacional_async(self, tema, usar_cache=True, forcar_atualizacao=False):
+        """Versão assíncrona de gerar_conteudo_educacional; erros da API são propagados.
+
+        As leituras e gravações em SQLite (cache de conteúdo e índice de duplicatas) rodam em
+        threads, para não parar o event loop.
+        """
+        usar_cache = usar_cache and self.cache is not None
+        if usar_cache and not forcar_atualizacao:
+            conteudo_gerado = await asyncio.to_thread(self.cache.obter, self.chave_cache(tema))
+            if conteudo_gerado:
+                return conteudo_gerado
+        prompt = self.criar_prompt_estruturado(tema)
+        tokens = self._tokens_estimados(prompt)
+
+        async def chamar(timeout_ms):
+            with cronometrar("motus_etapa_segundos", etapa="gemini", modo="assincrono"):
+                nome_cache = await self.prefixo.obter_nome_async() if self.prefixo else None
+                contents, config = self._montar_requisicao(tema, timeout_ms, usar_prefixo=False,
+                                                           nome_cache=nome_cache)
+                try:
+                    return await self.client.aio.models.generate_content(
+                        model=self.model, contents=contents, config=config)
+                except Exception as e:
+                    if not (config.cached_content and erro_cache_contexto(e)):
+                        raise
+                    self.prefixo.invalidar()
+                    contents, config = self._montar_requisicao(tema, timeout_ms, usar_prefixo=False)
+                    return await self.client.aio.models.generate_content(
+                        model=self.model, contents=contents, config=config)
+
+        response = await self.limitador.executar_async(chamar, tokens)
+        self._registrar_uso(response, tokens)
+        conteudo_gerado = self.extrair_json_da_resposta(response.text)
+        if conteudo_gerado:
+            await asyncio.to_thread(self._registrar_tema, tema)
+            if usar_cache:
+                await asyncio.to_thread(self.cache.salvar, self.chave_cache(tema), tema, self.model, conteudo_gerado)
+        return conteudo_gerado
+
+    def _registro_desafio(self, exercicio, tema, id_voluntario, id_area):
+        """Monta a tupla de INSERIR_DESAFIO_RETORNANDO_ID a partir de um exercício gerado."""
+        descricao_completa = (
+            f"{exercicio.get('material_explicativo', '')}\n\n"
+            f"PERGUNTA: {exercicio.get('pergunta_interativa', '')}"
+        )
+        return (
+            exercicio.get('titulo', f'Desafio sobre {tema}'),
+            descricao_completa,
+            exercicio.get('resposta_correta', ''),
+            exercicio.get('feedback_explicacao', ''),
+            'S',
+            exercicio.get('id_nivel_dificuldade', 1),
+            id_voluntario,
+            id_area
+        )
+
+    def _desafio_semelhante(self, assinatura, aceitos):
+        """Desafio já gravado (ou aceito neste lote) parecido com o exercício, ou None."""
+        limiar = limiar_desafio()
+        similares = self.duplicatas.similares_assinatura(assinatura, tipo='desafio', limiar=limiar, limite=1)
+        if similares:
+            return similares[0]
+        for titulo, outra in aceitos:
+            pontuacao = similaridade(assinatura, outra)
+            if pontuacao >= limiar:
+                return {"tipo": "lote", "id_desafio": None, "descricao": titulo, "similaridade": round(pontuacao, 3)}
+        return None
+
+    def salvar_aulas_em_lote(self, aulas, id_voluntario, id_area, ignorar_similares=False):
+        """Salva várias aulas de uma vez com um único executemany.
+
+        'aulas' é uma lista de pares (tema, conteudo_gerado). Retorna um dicionário com as
+        listas 'salvos' e 'falhas' (uma entrada por exercício). Exercícios parecidos com desafios
+        existentes (ou com outro do mesmo lote) não são gravados e entram em 'falhas' com o
+        desafio semelhante, salvo com ignorar_similares=True. Se o banco falhar, nada é gravado:
+        os exercícios restantes também entram em 'falhas' e a mensagem fica em 'erro_banco'.
+        """
+        registros = []
+        origem = []
+        assinaturas = []
+        resultado = {"salvos": [], "falhas": []}
+        verificar = self.duplicatas is not None and not ignorar_similares
+        if verificar:
+            self.duplicatas.sincronizar()
+        aceitos = []
+        for tema, conteudo_gerado in aulas:
+            for exercicio in conteudo_gerado:
+                id_nivel = exercicio.get('id_nivel_dificuldade')
+                assinatura = calcular_assinatura(texto_exercicio(exercicio)) if self.duplicatas else None
+                semelhante = self._desafio_semelhante(assinatura, aceitos) if verificar and assinatura else None
+                if semelhante:
+                    referencia = (f"desafio ID {semelhante['id_desafio']}" if semelhante["id_desafio"]
+                                  else f"'{semelhante['descricao']}' do mesmo lote")
+                    resultado["falhas"].append({
+                        "tema": tema, "id_nivel_dificuldade": id_nivel, "semelhante": semelhante,
+                        "erro": f"Semelhante ao {referencia} (similaridade {semelhante['similaridade']:.0%})"})
+                    continue
+                if assinatura:
+                    aceitos.append((exercicio.get('titulo', ''), assinatura))
+                registros.append(self._registro_desafio(exercicio, tema, id_voluntario, id_area))
+                origem.append((tema, id_nivel))
+                assinaturas.append(assinatura)
+        if not registros:
+            return resultado
+
+        def falha_banco(mensagem):
+            print(mensagem)
+            resultado["erro_banco"] = mensagem
+            resultado["falhas"].extend({"tema": tema, "id_nivel_dificuldade": id_nivel, "erro": mensagem}
+                                       for tema, id_nivel in origem)
+            return resultado
+
+        with conexao_banco() as conn:
+            if not conn:
+                return falha_banco("Erro ao conectar no banco!")
+            try:
+                with conn.cursor() as cursor:
+                    ids, erros = inserir_desafios_em_lote(cursor, registros)
+                    conn.commit()
+            except Exception as e:
+                conn.rollback()
+                return falha_banco(f"Erro ao salvar no banco: {e}")
+
+        mensagens_erro = dict(erros)
+        indexar = []
+        for indice, (tema, id_nivel) in enumerate(origem):
+            if indice in mensagens_erro:
+                resultado["falhas"].append({"tema": tema, "id_nivel_dificuldade": id_nivel, "erro": mensagens_erro[indice]})
+            else:
+                resultado["salvos"].append({"tema": tema, "id_nivel_dificuldade": id_nivel, "id_desafio": ids[indice]})
+                if assinaturas[indice]:
+                    indexar.append((ids[indice], registros[indice][0], assinaturas[indice]))
+        if indexar:
+            self.duplicatas.adicionar_desafios(indexar)
+        return resultado
+
+    def salvar_conteudo_no_banco(self, conteudo_gerado, tema, id_voluntario, id_area, ignorar_similares=False):
+        """Salva o conteúdo gerado no banco de dados, recebendo os IDs como parâmetros."""
+        resultado = self.salvar_aulas_em_lote([(tema, conteudo_gerado)], id_voluntario, id_area, ignorar_similares)
+        for salvo in resultado["salvos"]:
+            print(f"Desafio Nível {salvo['id_nivel_dificuldade']} salvo (ID: {salvo['id_desafio']})")
+        for falha in resultado["falhas"]:
+            print(f"Falha ao salvar desafio Nível {falha['id_nivel_dificuldade']}: {falha['erro']}")
+        print(f"🎉 Total de {len(resultado['salvos'])} desafios salvos no banco!")
+        return not resultado["falhas"]
+
+    async def _gerar_e_salvar_lote_async(self, temas, id_voluntario, id_area, concorrencia, tamanho_lote_banco,
+                                         usar_cache, forcar_atualizacao, similares_por_tema):
+        """Gera os temas com concorrência limitada e persiste as aulas em blocos conforme ficam prontas."""
+        semaforo = asyncio.Semaphore(concorrencia)
+        resultados = {}
+        pendentes_banco = []
+
+        async def gerar(tema):
+            async with semaforo:
+                inicio = time.perf_counter()
+                try:
+                    conteudo = await self.gerar_conteudo_educacional_async(tema, usar_cache, forcar_atualizacao)
+                    erro = None if conteudo else "Resposta da IA sem JSON válido"
+                except Exception as e:
+                    conteudo, erro = None, f"Erro na API Gemini: {e}"
+                duracao = time.perf_counter() - inicio
+                print(f"[{'OK' if conteudo else 'FALHA'}] {tema} ({duracao:.1f}s)")
+                return tema, conteudo, erro, duracao
+
+        for tema, similares in similares_por_tema.items():
+            print(f"[SIMILAR] {tema}")
+            resultados[tema] = {
+                "tema": tema,
+                "status": "tema_similar",
+                "erro": "Tema parecido com conteúdo já existente",
+                "similares": similares,
+                "duracao_s": 0.0,
+                "niveis_gerados": 0,
+                "ids_desafios": [],
+                "falhas_banco": [],
+            }
+        a_gerar = [tema for tema in temas if tema not in similares_por_tema]
+
+        async def persistir(bloco):
+            resultado = await asyncio.to_thread(self.salvar_aulas_em_lote, bloco, id_voluntario, id_area)
+            erro_banco = resultado.get("erro_banco")
+            for tema, _ in bloco:
+                resultados[tema]["status"] = "erro_banco" if erro_banco else "salvo"
+                if erro_banco:
+                    resultados[tema]["erro"] = erro_banco
+            for salvo in resultado["salvos"]:
+                resultados[salvo["tema"]]["ids_desafios"].append(salvo["id_desafio"])
+            for falha in resultado["falhas"]:
+                if not erro_banco:
+                    resultados[falha["tema"]]["status"] = "salvo_parcial"
+                resultados[falha["tema"]]["falhas_banco"].append(
+                    {"id_nivel_dificuldade": falha["id_nivel_dificuldade"], "erro": falha["erro"]})
+
+        for tarefa in asyncio.as_completed([gerar(tema) for tema in a_gerar]):
+            tema, conteudo, erro, duracao = await tarefa
+            resultados[tema] = {
+                "tema": tema,
+                "status": "gerado" if conteudo else "erro_geracao",
+                "erro": erro,
+                "duracao_s": round(duracao, 2),
+                "niveis_gerados": len(conteudo) if conteudo else 0,
+                "ids_desafios": [],
+                "falhas_banco": [],
+            }
+            if conteudo:
+                pendentes_banco.append((tema, conteudo))
+            if len(pendentes_banco) >= tamanho_lote_banco:
+                bloco, pendentes_banco = pendentes_banco, []
+                await persistir(bloco)
+        if pendentes_banco:
+            await persistir(pendentes_banco)
+
+        return [resultados[tema] for tema in temas if tema in resultados]
+
+    def gerar_aulas_em_lote(self, temas, id_voluntario, id_area, concorrencia=5, tamanho_lote_banco=20,
+                            nome_relatorio=None, usar_cache=True, forcar_atualizacao=False, permitir_similares=False):
+        """Gera e salva aulas para uma lista de temas, gravando um relatório JSON por tema.
+
+        Temas sem conteúdo em cache e parecidos com temas já gerados ou desafios existentes são
+        pulados (status "tema_similar"), a menos que permitir_similares=True.
+        Retorna o dicionário do relatório (também salvo em disco), ou None se os IDs forem inválidos.
+        """
+        erros = validar_ids_desafio(id_voluntario=id_voluntario, id_area=id_area)
+        if erros:
+            for erro in erros:
+                print(f"Erro: {erro}")
+            return None
+        temas = list(dict.fromkeys(temas))
+        similares_por_tema = {}
+        if not permitir_similares:
+            for tema in temas:
+                if usar_cache and not forcar_atualizacao and self.conteudo_em_cache(tema):
+                    continue
+                similares = self.temas_similares(tema)
+                if similares:
+                    similares_por_tema[tema] = similares
+        print(f"Gerando {len(temas) - len(similares_por_tema)} temas com até {concorrencia} chamadas simultâneas...")
+        inicio = time.perf_counter()
+        resultados = asyncio.run(self._gerar_e_salvar_lote_async(
+            temas, id_voluntario, id_area, concorrencia, tamanho_lote_banco, usar_cache, forcar_atualizacao,
+            similares_por_tema))
+        duracao_total = time.perf_counter() - inicio
+
+        contagem = {}
+        for resultado in resultados:
+            contagem[resultado["status"]] = contagem.get(resultado["status"], 0) + 1
+        aulas_geradas = sum(1 for r in resultados if r["status"] not in ("erro_geracao", "tema_similar"))
+        aulas_por_minuto = aulas_geradas / (duracao_total / 60) if duracao_total > 0 else 0
+
+        relatorio = {
+            "gerado_em": datetime.now().isoformat(),
+            "resumo": {
+                "total_temas": len(temas),
+                "aulas_geradas": aulas_geradas,
+                "aulas_salvas": contagem.get("salvo", 0),
+                "aulas_salvas_parcialmente": contagem.get("salvo_parcial", 0),
+                "erros_geracao": contagem.get("erro_geracao", 0),
+                "erros_banco": contagem.get("erro_banco", 0),
+                "temas_similares": contagem.get("tema_similar", 0),
+                "desafios_salvos": sum(len(r["ids_desafios"]) for r in resultados),
+                "duracao_total_s": round(duracao_total, 2),
+                "aulas_por_minuto": round(aulas_por_minuto, 2),
+                "concorrencia": concorrencia,
+                "cache": self.cache.estatisticas() if self.cache else None,
+                "cota_gemini": self.limitador.estatisticas(),
+            },
+            "temas": resultados,
+        }
+        if not nome_relatorio:
+            nome_relatorio = f"relatorio_lote_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(nome_relatorio, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+
+        resumo = relatorio["resumo"]
+        print(f"\nRelatório do lote: {nome_relatorio}")
+        print(f"   - Temas: {resumo['total_temas']} | Gerados: {resumo['aulas_geradas']} | Salvos: {resumo['aulas_salvas']}")
+        print(f"   - Erros de geração: {resumo['erros_geracao']} | Erros de banco: {resumo['erros_banco']} | "
+              f"Temas similares pulados: {resumo['temas_similares']}")
+        print(f"   - Tempo total: {resumo['duracao_total_s']}s | Vazão: {resumo['aulas_por_minuto']} aulas/min")
+        if resumo["cache"]:
+            print(f"   - Cache: {resumo['cache']['acertos']} acertos / {resumo['cache']['faltas']} faltas")
+        cota = resumo["cota_gemini"]
+        print(f"   - Cota Gemini: {cota['limitadas']} chamadas aguardaram a cota, "
+              f"{cota['repetidas']} novas tentativas, {cota['falhas']} falhas")
+        return relatorio
 
 def gerar_aula_ia():
     """Função principal para gerar aulas com IA - chamada pelo menu"""
@@ -223,44 +1050,58 @@ def gerar_aula_ia():
     gerador = GeradorConteudoMotus()
     if not gerador.client:
         return
-    conteudo_gerado = gerador.gerar_conteudo_educacional(tema)
-    if conteudo_gerado:
-        print("\nPRÉVIA DO CONTEÚDO GERADO:")
-        print("-" * 40)
-        for exercicio in conteudo_gerado:
-            print(f"\nNível {exercicio.get('id_nivel_dificuldade')}")
-            print(f"Título: {exercicio.get('titulo', 'N/A')}")
-            print(f"Pergunta: {exercicio.get('pergunta_interativa', 'N/A')[:80]}...")
-        
-        salvar = input("\nDeseja salvar esses desafios no banco? (S/N): ").strip().upper()
-        if salvar == 'S':
-            conn = conectar_banco()
-            if not conn:
-                print("Não foi possível conectar ao banco para obter opções.")
+    forcar_atualizacao = False
+    if gerador.conteudo_em_cache(tema):
+        usar = input("Já existe conteúdo recente para este tema. Usar o conteúdo em cache? (S/N) [padrão: S]: ").strip().upper()
+        forcar_atualizacao = usar == 'N'
+    else:
+        similares = gerador.temas_similares(tema)
+        if similares:
+            print("\nJá existe conteúdo parecido com este tema:")
+            exibir_similares(similares)
+            if input("Gerar mesmo assim? (S/N) [padrão: N]: ").strip().upper() != 'S':
+                print("Geração cancelada.")
                 return
-            try:
-                with conn.cursor() as cursor:
-                    if not _exibir_lista_opcoes(cursor, "Voluntário Criador", CONSULTA_VOLUNTARIOS_ATIVOS):
-                        return
-                    id_voluntario = _obter_input_numerico("Digite o ID do voluntário criador: ")
-
-                    if not _exibir_lista_opcoes(cursor, "Área de Competência", CONSULTA_AREAS_COMPETENCIA):
-                        return
-                    id_area = _obter_input_numerico("Digite o ID da área de competência: ")
-            finally:
-                if conn:
-                    conn.close()
-
-            if gerador.salvar_conteudo_no_banco(conteudo_gerado, tema, id_voluntario, id_area):
-                print("Conteúdo salvo com sucesso!")
+    # Com salvamento imediato, cada nível vai para o banco assim que chega, sem esperar os demais.
+    salvar_imediato = input("Salvar cada nível no banco assim que for gerado? (S/N) [padrão: N]: ").strip().upper() == 'S'
+    selecao = None
+    if salvar_imediato:
+        selecao = _selecionar_voluntario_e_area()
+        if not selecao:
+            return
+
+    conteudo_gerado = []
+    inicio = time.perf_counter()
+    for exercicio in gerador.gerar_conteudo_streaming(tema, forcar_atualizacao=forcar_atualizacao):
+        if not conteudo_gerado:
+            print(f"\nPrimeiro nível recebido em {time.perf_counter() - inicio:.1f}s")
+            print("\nPRÉVIA DO CONTEÚDO GERADO:")
+            print("-" * 40)
+        conteudo_gerado.append(exercicio)
+        print(f"\nNível {exercicio.get('id_nivel_dificuldade')}")
+        print(f"Título: {exercicio.get('titulo', 'N/A')}")
+        print(f"Pergunta: {exercicio.get('pergunta_interativa', 'N/A')[:80]}...")
+        if salvar_imediato:
+            gerador.salvar_conteudo_no_banco([exercicio], tema, *selecao)
+
+    if conteudo_gerado:
+        if not salvar_imediato:
+            salvar = input("\nDeseja salvar esses desafios no banco? (S/N): ").strip().upper()
+            if salvar == 'S':
+                selecao = _selecionar_voluntario_e_area()
+                if not selecao:
+                    return
+                id_voluntario, id_area = selecao
+
+                if gerador.salvar_conteudo_no_banco(conteudo_gerado, tema, id_voluntario, id_area):
+                    print("Conteúdo salvo com sucesso!")
+                else:
+                    print("Erro ao salvar conteúdo")
             else:
-                print("Erro ao salvar conteúdo")
-        else:
-            print("Conteúdo não salvo (apenas visualização)")
+                print("Conteúdo não salvo (apenas visualização)")
 
         exportar = input("\nDeseja exportar para JSON? (S/N): ").strip().upper()
         if exportar == 'S':
-            from datetime import datetime
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             nome_arquivo = f"conteudo_gerado_{tema.replace(' ', '_')}_{timestamp}.json"
             with open(nome_arquivo, 'w', encoding='utf-8') as f:
@@ -269,6 +1110,33 @@ def gerar_aula_ia():
     else:
         print("Não foi possível gerar conteúdo para este tema")
 
+def gerar_aulas_em_lote_ia():
+    """Gera aulas para todos os temas de um arquivo - chamada pelo menu"""
+    print("\n" + "=" * 60)
+    print("MOTUS.IA - GERAÇÃO DE AULAS EM LOTE")
+    print("=" * 60)
+    caminho = input("\nArquivo de temas (um tema por linha): ").strip()
+    try:
+        temas = ler_temas_arquivo(caminho)
+    except OSError as e:
+        print(f"Erro ao ler o arquivo de temas: {e}")
+        return
+    if not temas:
+        print("Nenhum tema encontrado no arquivo!")
+        return
+    print(f"{len(temas)} temas carregados.")
+
+    concorrencia = input("Chamadas simultâneas à IA [padrão: 5]: ").strip()
+    concorrencia = int(concorrencia) if concorrencia.isdigit() and int(concorrencia) > 0 else 5
+
+    selecao = _selecionar_voluntario_e_area()
+    if not selecao:
+        return
+    gerador = GeradorConteudoMotus()
+    if not gerador.client:
+        return
+    gerador.gerar_aulas_em_lote(temas, *selecao, concorrencia=concorrencia)
+
 def teste_rapido():
     """Função para testar a geração de conteúdo"""
     print("TESTE RÁPIDO DO GERADOR")
@@ -287,5 +1155,30 @@ def teste_rapido():
     else:
         print("Teste falhou")
 
+def _executar_lote_linha_comando(argumentos):
+    """Execução não interativa do lote: python ia_educacao.py --temas ARQ --voluntario ID --area ID"""
+    parser = argparse.ArgumentParser(description="Geração de aulas em lote com o Motus.IA")
+    parser.add_argument("--temas", required=True, help="Arquivo com um tema por linha")
+    parser.add_argument("--voluntario", type=int, required=True, help="ID do voluntário criador")
+    parser.add_argument("--area", type=int, required=True, help="ID da área de competência")
+    parser.add_argument("--concorrencia", type=int, default=5, help="Chamadas simultâneas à IA")
+    parser.add_argument("--relatorio", help="Caminho do relatório JSON")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora o cache de conteúdo")
+    parser.add_argument("--forcar-atualizacao", action="store_true", help="Gera novamente mesmo com conteúdo em cache")
+    parser.add_argument("--permitir-similares", action="store_true", help="Gera também temas parecidos com conteúdo existente")
+    args = parser.parse_args(argumentos)
+
+    gerador = GeradorConteudoMotus()
+    if not gerador.client:
+        return
+    gerador.gerar_aulas_em_lote(ler_temas_arquivo(args.temas), args.voluntario, args.area,
+                                concorrencia=max(1, args.concorrencia), nome_relatorio=args.relatorio,
+                                usar_cache=not args.sem_cache, forcar_atualizacao=args.forcar_atualizacao,
+                                permitir_similares=args.permitir_similares)
+
 if __name__ == "__main__":
-    teste_rapido()
\ No newline at end of file
+    load_dotenv()
+    if len(sys.argv) > 1:
+        _executar_lote_linha_comando(sys.argv[1:])
+    else:
+        teste_rapido()
\ No newline at end of file
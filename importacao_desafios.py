@@ -0,0 +1,192 @@
+from database import conexao_banco
+from crud_desafios import inserir_desafios_em_lote
+from dados_referencia import validar_ids_desafio
+from dotenv import load_dotenv
+import oracledb
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+CAMPOS_OBRIGATORIOS = ("titulo", "descricao", "resposta_correta",
+                       "id_nivel_dificuldade", "id_voluntario_criador", "id_area_competencia")
+TAMANHO_LOTE_PADRAO = 500
+
+
+def _ler_registros(caminho, formato, delimitador):
+    """Lê o arquivo sob demanda, gerando (número da linha, dicionário) ou (número da linha, erro)."""
+    with open(caminho, 'r', encoding='utf-8-sig', newline='') as arquivo:
+        if formato == "csv":
+            leitor = csv.DictReader(arquivo, delimiter=delimitador)
+            for registro in leitor:
+                yield leitor.line_num, registro
+        else:
+            for numero_linha, linha in enumerate(arquivo, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError as e:
+                    yield numero_linha, f"JSON inválido: {e}"
+                    continue
+                if not isinstance(registro, dict):
+                    yield numero_linha, "Cada linha deve ser um objeto JSON"
+                    continue
+                yield numero_linha, registro
+
+
+def _validar_registro(registro):
+    """Converte e valida um registro; retorna (tupla para INSERIR_DESAFIO_RETORNANDO_ID, None) ou (None, erro)."""
+    if isinstance(registro, str):
+        return None, registro
+    faltando = [campo for campo in CAMPOS_OBRIGATORIOS if not str(registro.get(campo) or '').strip()]
+    if faltando:
+        return None, f"Campos obrigatórios ausentes: {', '.join(faltando)}"
+    try:
+        id_nivel = int(registro["id_nivel_dificuldade"])
+        id_voluntario = int(registro["id_voluntario_criador"])
+        id_area = int(registro["id_area_competencia"])
+    except (ValueError, TypeError):
+        return None, "IDs de nível, voluntário e área devem ser números inteiros"
+    ativo = str(registro.get("ativo") or 'S').strip().upper()
+    if ativo not in ('S', 'N'):
+        return None, f"Valor de 'ativo' inválido: {ativo}"
+    erros = validar_ids_desafio(id_nivel=id_nivel, id_voluntario=id_voluntario, id_area=id_area)
+    if erros:
+        return None, "; ".join(erros)
+    feedback = str(registro.get("feedback_explicacao") or '').strip() or None
+    return (str(registro["titulo"]).strip(), str(registro["descricao"]).strip(),
+            str(registro["resposta_correta"]).strip(), feedback, ativo,
+            id_nivel, id_voluntario, id_area), None
+
+
+def _carregar_checkpoint(caminho_checkpoint, caminho_arquivo):
+    """Retorna o checkpoint salvo para o arquivo, ou None se não houver um compatível."""
+    if not os.path.exists(caminho_checkpoint):
+        return None
+    with open(caminho_checkpoint, 'r', encoding='utf-8') as arquivo:
+        checkpoint = json.load(arquivo)
+    if checkpoint.get("tamanho_arquivo") != os.path.getsize(caminho_arquivo):
+        print("Aviso: o arquivo mudou desde o último checkpoint; a importação recomeçará do início.")
+        return None
+    return checkpoint
+
+
+def _salvar_checkpoint(caminho_checkpoint, checkpoint):
+    temporario = caminho_checkpoint + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(checkpoint, arquivo, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho_checkpoint)
+
+
+def importar_desafios(caminho, formato=None, tamanho_lote=TAMANHO_LOTE_PADRAO, reiniciar=False, delimitador=','):
+    """Importa desafios de um arquivo JSONL ou CSV sem interação.
+
+    Os registros são lidos em blocos de tamanho_lote, validados contra os dados de referência em
+    cache e gravados com array DML; linhas rejeitadas vão para '<arquivo>.rejeitados.jsonl'. Após
+    cada bloco confirmado o progresso é salvo em '<arquivo>.checkpoint.json', permitindo retomar
+    uma importação interrompida. Retorna o dicionário de resumo, ou None em caso de falha.
+    """
+    formato = formato or ("csv" if caminho.lower().endswith(".csv") else "jsonl")
+    caminho_checkpoint = caminho + ".checkpoint.json"
+    caminho_rejeitados = caminho + ".rejeitados.jsonl"
+
+    checkpoint = None if reiniciar else _carregar_checkpoint(caminho_checkpoint, caminho)
+    if checkpoint is None:
+        checkpoint = {
+            "arquivo": os.path.abspath(caminho),
+            "tamanho_arquivo": os.path.getsize(caminho),
+            "registros_processados": 0,
+            "importados": 0,
+            "rejeitados": 0,
+        }
+        if os.path.exists(caminho_rejeitados):
+            os.remove(caminho_rejeitados)
+    elif checkpoint["registros_processados"]:
+        print(f"Retomando a partir do registro {checkpoint['registros_processados'] + 1}.")
+
+    registros = _ler_registros(caminho, formato, delimitador)
+    for _ in islice(registros, checkpoint["registros_processados"]):
+        pass
+
+    inicio = time.perf_counter()
+    processados_sessao = 0
+    with conexao_banco() as conn:
+        if not conn:
+            print("Erro: Não foi possível conectar ao banco de dados.")
+            return None
+        try:
+            with conn.cursor() as cursor, open(caminho_rejeitados, 'a', encoding='utf-8') as rejeitados:
+                while True:
+                    bloco = list(islice(registros, tamanho_lote))
+                    if not bloco:
+                        break
+
+                    validos, linhas_validas = [], []
+                    for numero_linha, registro in bloco:
+                        dados, erro = _validar_registro(registro)
+                        if erro:
+                            rejeitados.write(json.dumps({"linha": numero_linha, "erro": erro}, ensure_ascii=False) + "\n")
+                            checkpoint["rejeitados"] += 1
+                        else:
+                            validos.append(dados)
+                            linhas_validas.append(numero_linha)
+
+                    _, erros = inserir_desafios_em_lote(cursor, validos)
+                    conn.commit()
+                    for indice, mensagem in erros:
+                        rejeitados.write(json.dumps({"linha": linhas_validas[indice], "erro": mensagem}, ensure_ascii=False) + "\n")
+                    rejeitados.flush()
+
+                    checkpoint["importados"] += len(validos) - len(erros)
+                    checkpoint["rejeitados"] += len(erros)
+                    checkpoint["registros_processados"] += len(bloco)
+                    _salvar_checkpoint(caminho_checkpoint, checkpoint)
+
+                    processados_sessao += len(bloco)
+                    decorrido = time.perf_counter() - inicio
+                    print(f"{checkpoint['registros_processados']} registros processados "
+                          f"({processados_sessao / decorrido:.0f} linhas/s) - "
+                          f"importados: {checkpoint['importados']}, rejeitados: {checkpoint['rejeitados']}")
+
+        except oracledb.DatabaseError as e:
+            conn.rollback()
+            print(f"Erro de banco de dados durante a importação: {e}")
+            print(f"O progresso até o último bloco confirmado está em: {caminho_checkpoint}")
+            return None
+
+    duracao = time.perf_counter() - inicio
+    resumo = dict(checkpoint)
+    resumo["duracao_s"] = round(duracao, 2)
+    resumo["linhas_por_segundo"] = round(processados_sessao / duracao, 1) if duracao > 0 else 0
+    print("\nImportação concluída!")
+    print(f"   - Registros processados: {resumo['registros_processados']}")
+    print(f"   - Importados: {resumo['importados']} | Rejeitados: {resumo['rejeitados']}")
+    print(f"   - Vazão desta execução: {resumo['linhas_por_segundo']} linhas/s em {resumo['duracao_s']}s")
+    if resumo["rejeitados"]:
+        print(f"   - Detalhes das rejeições: {caminho_rejeitados}")
+    return resumo
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Importação em lote de desafios (JSONL ou CSV)")
+    parser.add_argument("arquivo", help="Arquivo .jsonl ou .csv com um desafio por linha")
+    parser.add_argument("--formato", choices=("jsonl", "csv"), help="Formato do arquivo (padrão: pela extensão)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Registros por bloco gravado")
+    parser.add_argument("--delimitador", default=',', help="Delimitador do CSV")
+    parser.add_argument("--reiniciar", action="store_true", help="Ignora o checkpoint e começa do início")
+    args = parser.parse_args(argumentos)
+    load_dotenv()
+
+    if not os.path.exists(args.arquivo):
+        print(f"Erro: Arquivo não encontrado: {args.arquivo}")
+        return 1
+    resumo = importar_desafios(args.arquivo, args.formato, max(1, args.lote), args.reiniciar, args.delimitador)
+    return 0 if resumo is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
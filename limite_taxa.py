@@ -0,0 +1,218 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+
+# --- Limites de Cota do Gemini ---
+# Podem ser sobrescritos por variáveis de ambiente; 0 desativa o limite correspondente.
+CONFIG_LIMITE_PADRAO = {
+    "rpm": 60,               # requisições por minuto
+    "tpm": 250000,           # tokens (entrada + saída) por minuto
+    "tentativas": 5,         # tentativas por chamada, contando a primeira
+    "espera_base_ms": 1000,  # primeira espera do backoff exponencial
+    "espera_maxima_ms": 60000,
+    "prazo_s": 180,          # prazo total de uma geração, incluindo esperas e novas tentativas
+}
+
+# Códigos HTTP que indicam sobrecarga ou cota excedida e valem nova tentativa.
+CODIGOS_REPETIVEIS = {408, 429, 500, 502, 503, 504}
+ERROS_REDE_REPETIVEIS = (TimeoutError, ConnectionError, httpx.TransportError)
+
+
+class PrazoEsgotado(TimeoutError):
+    """O prazo da geração terminou antes de uma resposta bem-sucedida."""
+
+
+class BaldeTokens:
+    """Balde de tokens reabastecido continuamente a 'capacidade_por_minuto' unidades por minuto.
+
+    reservar() debita a quantidade na hora (o saldo pode ficar negativo) e devolve quantos
+    segundos o chamador deve aguardar; assim serve igualmente a threads e a corrotinas.
+    """
+
+    def __init__(self, capacidade_por_minuto):
+        self.capacidade = float(capacidade_por_minuto)
+        self.taxa_por_segundo = self.capacidade / 60.0
+        self._saldo = self.capacidade
+        self._atualizado_em = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reabastecer(self, agora):
+        self._saldo = min(self.capacidade, self._saldo + (agora - self._atualizado_em) * self.taxa_por_segundo)
+        self._atualizado_em = agora
+
+    def reservar(self, quantidade):
+        if self.capacidade <= 0:
+            return 0.0
+        with self._lock:
+            self._reabastecer(time.monotonic())
+            self._saldo -= min(quantidade, self.capacidade)
+            return -self._saldo / self.taxa_por_segundo if self._saldo < 0 else 0.0
+
+    def ajustar(self, diferenca):
+        """Corrige o saldo depois que o consumo real é conhecido (positivo = consumiu mais que o reservado)."""
+        if self.capacidade <= 0 or not diferenca:
+            return
+        with self._lock:
+            self._saldo = min(self.capacidade, self._saldo - diferenca)
+
+
+def _ler_config_limite():
+    config = {}
+    for chave, padrao in CONFIG_LIMITE_PADRAO.items():
+        valor = os.getenv(f"MOTUS_GEMINI_{chave.upper()}")
+        config[chave] = int(valor) if valor and valor.strip().isdigit() else padrao
+    return config
+
+
+def erro_repetivel(erro):
+    """Indica se o erro é transitório (cota, sobrecarga ou rede) e vale nova tentativa."""
+    if isinstance(erro, PrazoEsgotado):
+        return False
+    return getattr(erro, 'code', None) in CODIGOS_REPETIVEIS or isinstance(erro, ERROS_REDE_REPETIVEIS)
+
+
+class LimitadorGemini:
+    """Limita as chamadas ao Gemini pela cota (RPM e TPM) e repete as que falham por motivo transitório.
+
+    Um único limitador é compartilhado pelos caminhos síncrono, assíncrono e de streaming. Cada
+    chamada recebe um prazo absoluto (time.monotonic()); esperas e novas tentativas nunca passam
+    dele, e o tempo restante é repassado à função chamada para ser usado como timeout da requisição.
+    """
+
+    def __init__(self, config=None):
+        config = config or _ler_config_limite()
+        self.config = config
+        self.requisicoes = BaldeTokens(config["rpm"])
+        self.tokens = BaldeTokens(config["tpm"])
+        self._estatisticas = {
+            "chamadas": 0,
+            "sucessos": 0,
+            "limitadas": 0,
+            "repetidas": 0,
+            "falhas": 0,
+            "espera_limite_s": 0.0,
+            "espera_backoff_s": 0.0,
+        }
+        self._lock = threading.Lock()
+
+    def _contar(self, chave, valor=1):
+        with self._lock:
+            self._estatisticas[chave] += valor
+
+    def novo_prazo(self, segundos=None):
+        """Prazo absoluto para uma geração que começa agora."""
+        return time.monotonic() + (segundos or self.config["prazo_s"])
+
+    def _restante(self, prazo):
+        restante = prazo - time.monotonic()
+        if restante <= 0:
+            raise PrazoEsgotado("Prazo da geração esgotado")
+        return restante
+
+    def _prazo_insuficiente(self, mensagem):
+        self._contar("falhas")
+        return PrazoEsgotado(mensagem)
+
+    def _espera_cota(self, tokens_estimados, prazo):
+        espera = max(self.requisicoes.reservar(1), self.tokens.reservar(tokens_estimados))
+        if espera > 0:
+            if espera >= prazo - time.monotonic():
+                # Devolve a reserva: esta chamada não será feita.
+                self.requisicoes.ajustar(-1)
+                self.tokens.ajustar(-tokens_estimados)
+                raise self._prazo_insuficiente(f"Cota do Gemini exigiria {espera:.1f}s de espera, além do prazo")
+            self._contar("limitadas")
+            self._contar("espera_limite_s", espera)
+        return espera
+
+    def _espera_backoff(self, tentativa, prazo):
+        base = self.config["espera_base_ms"] / 1000
+        teto = min(self.config["espera_maxima_ms"] / 1000, base * (2 ** (tentativa - 1)))
+        espera = random.uniform(base / 2, max(base / 2, teto))
+        if espera >= prazo - time.monotonic():
+            raise self._prazo_insuficiente("Prazo da geração esgotado durante as novas tentativas")
+        self._contar("repetidas")
+        self._contar("espera_backoff_s", espera)
+        return espera
+
+    def _deve_repetir(self, erro, tentativa):
+        if erro_repetivel(erro) and tentativa < self.config["tentativas"]:
+            return True
+        self._contar("falhas")
+        return False
+
+    def registrar_uso(self, tokens_estimados, tokens_reais):
+        """Ajusta o balde de tokens com o consumo informado pela API (usage_metadata)."""
+        if tokens_reais:
+            self.tokens.ajustar(tokens_reais - tokens_estimados)
+
+    def executar(self, funcao, tokens_estimados, prazo=None):
+        """Chama funcao(timeout_ms) respeitando a cota, com backoff exponencial e jitter entre tentativas."""
+        prazo = prazo or self.novo_prazo()
+        self._contar("chamadas")
+        tentativa = 1
+        while True:
+            time.sleep(self._espera_cota(tokens_estimados, prazo))
+            try:
+                resultado = funcao(int(self._restante(prazo) * 1000))
+                self._contar("sucessos")
+                return resultado
+            except Exception as e:
+                if not self._deve_repetir(e, tentativa):
+                    raise
+                time.sleep(self._espera_backoff(tentativa, prazo))
+                tentativa += 1
+
+    async def executar_async(self, funcao, tokens_estimados, prazo=None):
+        """Versão assíncrona de executar: funcao(timeout_ms) deve devolver um awaitable."""
+        prazo = prazo or self.novo_prazo()
+        self._contar("chamadas")
+        tentativa = 1
+        while True:
+            await asyncio.sleep(self._espera_cota(tokens_estimados, prazo))
+            try:
+                resultado = await funcao(int(self._restante(prazo) * 1000))
+                self._contar("sucessos")
+                return resultado
+            except Exception as e:
+                if not self._deve_repetir(e, tentativa):
+                    raise
+                await asyncio.sleep(self._espera_backoff(tentativa, prazo))
+                tentativa += 1
+
+    def estatisticas(self):
+        with self._lock:
+            stats = dict(self._estatisticas)
+        stats["espera_limite_s"] = round(stats["espera_limite_s"], 3)
+        stats["espera_backoff_s"] = round(stats["espera_backoff_s"], 3)
+        stats["rpm"] = self.config["rpm"]
+        stats["tpm"] = self.config["tpm"]
+        return stats
+
+
+_limitador = None
+_limitador_lock = threading.Lock()
+
+
+def obter_limitador():
+    """Retorna o limitador compartilhado pelo processo, criando-o na primeira chamada."""
+    global _limitador
+    if _limitador is None:
+        with _limitador_lock:
+            if _limitador is None:
+                _limitador = LimitadorGemini()
+    return _limitador
+
+
+def exibir_estatisticas_limite():
+    """Imprime os contadores de chamadas limitadas, repetidas e com falha."""
+    stats = obter_limitador().estatisticas()
+    print("\n--- Cota da API Gemini ---")
+    print(f"Limites: {stats['rpm'] or 'sem limite'} req/min | {stats['tpm'] or 'sem limite'} tokens/min")
+    print(f"Chamadas: {stats['chamadas']} | Sucessos: {stats['sucessos']} | Falhas: {stats['falhas']}")
+    print(f"Aguardaram a cota: {stats['limitadas']} ({stats['espera_limite_s']:.1f}s) | "
+          f"Novas tentativas: {stats['repetidas']} ({stats['espera_backoff_s']:.1f}s)")
@@ -1,7 +1,100 @@
-from database import conectar_banco, testar_conexao
-from crud_desafios import gerenciar_desafios
-from consultas_json import exportar_dados_json
-from ia_educacao import gerar_aula_ia
+import time
+
+_INICIO = time.perf_counter()
+
+import importlib
+import os
+import sys
+from dotenv import load_dotenv
+
+# Módulo e função de cada opção do menu. Os módulos só são importados quando a opção é
+# escolhida, para que sessões só de CRUD ou de exportação não carreguem o google.genai.
+OPCOES_MENU = {
+    1: ("crud_desafios", "gerenciar_desafios"),
+    2: ("ia_educacao", "gerar_aula_ia"),
+    3: ("consultas_json", "exportar_dados_json"),
+    4: ("database", "testar_conexao"),
+    5: ("ia_educacao", "gerar_aulas_em_lote_ia"),
+    6: ("metricas", "menu_metricas"),
+}
+
+
+def _executar_opcao(opcao):
+    """Importa o módulo da opção (na primeira vez) e chama a função correspondente."""
+    modulo, funcao = OPCOES_MENU[opcao]
+    getattr(importlib.import_module(modulo), funcao)()
+
+
+def _aquecer_gemini():
+    """Importa o ia_educacao e aquece o cliente em uma thread, sem atrasar o menu."""
+    import threading
+
+    def aquecer():
+        from ia_educacao import aquecer_cliente_gemini
+        aquecer_cliente_gemini(em_segundo_plano=False)
+    threading.Thread(target=aquecer, name="aquecimento-gemini", daemon=True).start()
+
+
+def _encerrar():
+    # Só há pool a fechar se algum módulo de banco chegou a ser importado.
+    if "database" in sys.modules:
+        sys.modules["database"].fechar_pool()
+
+
+# --- Relatório de Inicialização ---
+def _tempos_importacao(modulo):
+    """Importa o módulo em um processo novo com -X importtime.
+
+    Retorna (total_ms, [(dependencia, ms), ...]) com as dependências diretas em ordem
+    decrescente de tempo acumulado, ou None se a importação falhar.
+    """
+    import subprocess
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    resultado = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                               cwd=diretorio, capture_output=True, text=True)
+    if resultado.returncode != 0:
+        return None
+    # Cada linha: "import time: <próprio us> | <acumulado us> | <espaços><nome>"; os filhos
+    # aparecem antes do pai, com dois espaços a mais de recuo.
+    filhos = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|", 2)
+        nivel = (len(nome) - len(nome.lstrip(" "))) // 2
+        nome = nome.strip()
+        if nivel == 1:
+            filhos.append((nome, int(acumulado) / 1000))
+        elif nivel == 0:
+            if nome == modulo:
+                return int(acumulado) / 1000, sorted(filhos, key=lambda item: item[1], reverse=True)
+            filhos = []
+    return None
+
+
+def relatorio_inicializacao(limite_ms=None):
+    """Mostra o custo de importação do menu e de cada opção, no estilo do -X importtime.
+
+    Com limite_ms, retorna 1 se a importação do main passar do limite (para uso em CI).
+    """
+    print("\n--- Tempo de inicialização ---")
+    print(f"Menu pronto neste processo em {(time.perf_counter() - _INICIO) * 1000:.1f} ms")
+    print(f"{'Módulo':<16} {'Importação':>12}   Maiores dependências")
+    total_main = None
+    for modulo in ["main"] + list(dict.fromkeys(modulo for modulo, _ in OPCOES_MENU.values())):
+        tempos = _tempos_importacao(modulo)
+        if tempos is None:
+            print(f"{modulo:<16} {'erro':>12}")
+            continue
+        total, dependencias = tempos
+        if modulo == "main":
+            total_main = total
+        maiores = ", ".join(f"{nome} {ms:.1f}" for nome, ms in dependencias[:3])
+        print(f"{modulo:<16} {total:>9.1f} ms   {maiores}")
+    if limite_ms is not None and (total_main is None or total_main > limite_ms):
+        print(f"❌ Importação do main acima do limite de {limite_ms:.0f} ms.")
+        return 1
+    return 0
 
 
 def mostrar_menu():
@@ -12,6 +105,8 @@ def mostrar_menu():
     print("2. Gerar Aula com IA")
     print("3. Exportar Dados JSON")
     print("4. Testar Conexão com Banco")
+    print("5. Gerar Aulas em Lote com IA")
+    print("6. Métricas de Desempenho")
     print("0. Sair")
     print("=" * 50)
 
@@ -19,7 +114,7 @@ def mostrar_menu():
 def validar_opcao(opcao):
     try:
         opcao_int = int(opcao)
-        if 0 <= opcao_int <= 4:
+        if 0 <= opcao_int <= 6:
             return True
         else:
             return False
@@ -28,30 +123,38 @@ def validar_opcao(opcao):
 
 
 def main():
+    load_dotenv()
+    if len(sys.argv) > 1:
+        import argparse
+        parser = argparse.ArgumentParser(description="Sistema de Educação Adaptativa.")
+        parser.add_argument("--tempo-inicializacao", action="store_true",
+                            help="Mostra o tempo de importação do menu e de cada opção e sai.")
+        parser.add_argument("--limite-ms", type=float,
+                            help="Com --tempo-inicializacao, falha se a importação do main passar deste tempo.")
+        args = parser.parse_args()
+        if args.tempo_inicializacao:
+            sys.exit(relatorio_inicializacao(args.limite_ms))
+
     print("Bem-vindo ao Sistema de Educação Adaptativa!")
+    if os.getenv('MOTUS_GEMINI_AQUECER', 'N').upper() in ('S', '1', 'TRUE'):
+        _aquecer_gemini()
 
     while True:
         mostrar_menu()
         opcao = input("Digite sua opção: ")
 
         if not validar_opcao(opcao):
-            print("Opção inválida! Digite um número entre 0 e 4.")
+            print("Opção inválida! Digite um número entre 0 e 6.")
             continue
 
         opcao = int(opcao)
 
         if opcao == 0:
             print("👋 Obrigado por usar o sistema! Até logo!")
+            _encerrar()
             break
-        elif opcao == 1:
-            gerenciar_desafios()
-        elif opcao == 2:
-            gerar_aula_ia()
-        elif opcao == 3:
-            exportar_dados_json()
-        elif opcao == 4:
-            testar_conexao()
+        _executar_opcao(opcao)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
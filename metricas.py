@@ -0,0 +1,265 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- Configuração das Métricas ---
+# Limites (em segundos) dos buckets dos histogramas de latência, no estilo do Prometheus.
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIXOS_SQL = ("CONSULTA_", "INSERIR_", "ATUALIZAR_", "EXCLUIR_", "DESATIVAR_", "CONTAR_")
+ROTULO_SQL_AVULSO = "sql_avulso"
+
+_lock = threading.Lock()
+_contadores = {}
+_histogramas = {}
+_nomes_consultas = {}
+
+
+def metricas_ativas():
+    """Métricas ligadas por padrão; MOTUS_METRICAS=N desativa a coleta."""
+    return os.getenv('MOTUS_METRICAS', 'S').upper() in ('S', '1', 'TRUE')
+
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted(rotulos.items()))
+
+
+def incrementar(nome, valor=1, **rotulos):
+    """Soma 'valor' ao contador com os rótulos informados."""
+    chave = _chave(nome, rotulos)
+    with _lock:
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+
+
+def observar(nome, segundos, **rotulos):
+    """Registra uma duração no histograma com os rótulos informados."""
+    chave = _chave(nome, rotulos)
+    with _lock:
+        histograma = _histogramas.get(chave)
+        if histograma is None:
+            histograma = _histogramas[chave] = {"buckets": [0] * len(BUCKETS_SEGUNDOS), "contagem": 0, "soma": 0.0, "maximo": 0.0}
+        for indice, limite in enumerate(BUCKETS_SEGUNDOS):
+            if segundos <= limite:
+                histograma["buckets"][indice] += 1
+                break
+        histograma["contagem"] += 1
+        histograma["soma"] += segundos
+        histograma["maximo"] = max(histograma["maximo"], segundos)
+
+
+@contextmanager
+def cronometrar(nome, **rotulos):
+    """Mede o bloco no histograma 'nome'; exceções também contam em '<nome sem _segundos>_erros_total'."""
+    if not metricas_ativas():
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        incrementar(nome.replace("_segundos", "") + "_erros_total", **rotulos)
+        raise
+    finally:
+        observar(nome, time.perf_counter() - inicio, **rotulos)
+
+
+def medido(nome, **rotulos):
+    """Decorador: mede cada chamada da função com cronometrar(nome, **rotulos)."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def funcao_medida(*args, **kwargs):
+            with cronometrar(nome, **rotulos):
+                return funcao(*args, **kwargs)
+        return funcao_medida
+    return decorador
+
+
+def zerar():
+    """Descarta todas as métricas coletadas até agora."""
+    with _lock:
+        _contadores.clear()
+        _histogramas.clear()
+
+
+# --- Rótulos por Constante SQL ---
+def registrar_consultas(namespace):
+    """Associa o texto de cada constante SQL do módulo (CONSULTA_*, INSERIR_*, ...) ao nome dela.
+
+    Chamado no fim dos módulos com SQL (registrar_consultas(globals())), para que cada execute()
+    seja rotulado pelo nome da constante em vez do texto da consulta.
+    """
+    for nome, valor in namespace.items():
+        if isinstance(valor, str) and nome.isupper() and nome.startswith(PREFIXOS_SQL):
+            _nomes_consultas.setdefault(valor, nome)
+
+
+def nome_consulta(sql):
+    return _nomes_consultas.get(sql, ROTULO_SQL_AVULSO)
+
+
+class CursorInstrumentado:
+    """Repassa tudo ao cursor original, medindo execute/executemany por constante SQL."""
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._cursor, nome, valor)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self._cursor.close()
+        return False
+
+    def execute(self, sql, *args, **kwargs):
+        with cronometrar("motus_db_consulta_segundos", consulta=nome_consulta(sql), operacao="execute"):
+            return self._cursor.execute(sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        with cronometrar("motus_db_consulta_segundos", consulta=nome_consulta(sql), operacao="executemany"):
+            return self._cursor.executemany(sql, *args, **kwargs)
+
+
+class ConexaoInstrumentada:
+    """Repassa tudo à conexão original; os cursores criados por ela são instrumentados."""
+
+    def __init__(self, conexao):
+        object.__setattr__(self, "_conexao", conexao)
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._conexao, nome, valor)
+
+    def cursor(self, *args, **kwargs):
+        return CursorInstrumentado(self._conexao.cursor(*args, **kwargs))
+
+
+def instrumentar_conexao(conexao):
+    """Envolve a conexão para medir as consultas, se as métricas estiverem ativas."""
+    if conexao is None or not metricas_ativas():
+        return conexao
+    return ConexaoInstrumentada(conexao)
+
+
+# --- Exportação ---
+def _percentil_histograma(histograma, percentual):
+    """Estimativa do percentil pelo limite superior do bucket que o contém."""
+    alvo = histograma["contagem"] * percentual / 100
+    acumulado = 0
+    for limite, quantidade in zip(BUCKETS_SEGUNDOS, histograma["buckets"]):
+        acumulado += quantidade
+        if acumulado >= alvo:
+            return min(limite, histograma["maximo"])
+    return histograma["maximo"]
+
+
+def instantaneo():
+    """Retorna um dicionário serializável com todos os contadores e histogramas."""
+    with _lock:
+        contadores = [{"nome": nome, "rotulos": dict(rotulos), "valor": valor}
+                      for (nome, rotulos), valor in sorted(_contadores.items())]
+        histogramas = []
+        for (nome, rotulos), histograma in sorted(_histogramas.items()):
+            histogramas.append({
+                "nome": nome,
+                "rotulos": dict(rotulos),
+                "contagem": histograma["contagem"],
+                "soma_s": round(histograma["soma"], 6),
+                "media_ms": round(histograma["soma"] / histograma["contagem"] * 1000, 3),
+                "p95_ms": round(_percentil_histograma(histograma, 95) * 1000, 3),
+                "maximo_ms": round(histograma["maximo"] * 1000, 3),
+                "buckets": dict(zip((str(limite) for limite in BUCKETS_SEGUNDOS), histograma["buckets"])),
+            })
+    return {"coletado_em": datetime.now().isoformat(), "contadores": contadores, "histogramas": histogramas}
+
+
+def _formatar_rotulos(rotulos, extra=None):
+    itens = list(rotulos) + ([extra] if extra else [])
+    if not itens:
+        return ""
+    texto = ",".join(f'{chave}="{_escapar_rotulo(valor)}"' for chave, valor in itens)
+    return "{" + texto + "}"
+
+
+def _escapar_rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def formato_prometheus():
+    """Todas as métricas no formato de exposição em texto do Prometheus."""
+    linhas = []
+    with _lock:
+        tipos_emitidos = set()
+        for (nome, rotulos), valor in sorted(_contadores.items()):
+            if nome not in tipos_emitidos:
+                linhas.append(f"# TYPE {nome} counter")
+                tipos_emitidos.add(nome)
+            linhas.append(f"{nome}{_formatar_rotulos(rotulos)} {valor}")
+        for (nome, rotulos), histograma in sorted(_histogramas.items()):
+            if nome not in tipos_emitidos:
+                linhas.append(f"# TYPE {nome} histogram")
+                tipos_emitidos.add(nome)
+            acumulado = 0
+            for limite, quantidade in zip(BUCKETS_SEGUNDOS, histograma["buckets"]):
+                acumulado += quantidade
+                linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', limite))} {acumulado}")
+            linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', '+Inf'))} {histograma['contagem']}")
+            linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos)} {histograma['soma']:.6f}")
+            linhas.append(f"{nome}_count{_formatar_rotulos(rotulos)} {histograma['contagem']}")
+    return "\n".join(linhas) + "\n"
+
+
+def exportar_metricas(formato="prometheus", nome_arquivo=None):
+    """Grava as métricas em 'metricas_<timestamp>.prom' (Prometheus) ou '.json'; retorna o nome do arquivo."""
+    extensao = "prom" if formato == "prometheus" else "json"
+    nome_arquivo = nome_arquivo or f"metricas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+    with open(nome_arquivo, 'w', encoding='utf-8') as arquivo:
+        if formato == "prometheus":
+            arquivo.write(formato_prometheus())
+        else:
+            json.dump(instantaneo(), arquivo, ensure_ascii=False, indent=2)
+    return nome_arquivo
+
+
+def exibir_metricas():
+    """Imprime um resumo das latências e contadores coletados nesta execução."""
+    dados = instantaneo()
+    print("\n--- Métricas de Desempenho ---")
+    if not dados["histogramas"] and not dados["contadores"]:
+        print("Nenhuma métrica coletada ainda." if metricas_ativas() else "Coleta desativada (MOTUS_METRICAS=N).")
+        return
+    for histograma in dados["histogramas"]:
+        rotulos = ", ".join(f"{chave}={valor}" for chave, valor in histograma["rotulos"].items())
+        print(f"{histograma['nome']} [{rotulos}]")
+        print(f"   {histograma['contagem']} chamadas | média {histograma['media_ms']:.1f} ms | "
+              f"p95 ≤ {histograma['p95_ms']:.1f} ms | máx. {histograma['maximo_ms']:.1f} ms | total {histograma['soma_s']:.2f}s")
+    for contador in dados["contadores"]:
+        rotulos = ", ".join(f"{chave}={valor}" for chave, valor in contador["rotulos"].items())
+        print(f"{contador['nome']} [{rotulos}]: {contador['valor']}")
+
+
+def menu_metricas():
+    """Opção do menu principal: resumo das métricas, do pool e da cota, com exportação opcional."""
+    from database import exibir_estatisticas_pool
+    from limite_taxa import exibir_estatisticas_limite
+
+    exibir_metricas()
+    exibir_estatisticas_pool()
+    exibir_estatisticas_limite()
+    formato = input("\nExportar métricas? (P = Prometheus, J = JSON, Enter = não): ").strip().upper()
+    if formato in ('P', 'J'):
+        nome_arquivo = exportar_metricas("prometheus" if formato == 'P' else "json")
+        print(f"Métricas exportadas: {nome_arquivo}")
@@ -0,0 +1,191 @@
+from database import conexao_banco, identidade_banco, ler_inteiro_ambiente
+from metricas import registrar_consultas
+import oracledb
+import os
+import sqlite3
+import threading
+
+# --- Consultas SQL do Resumo de Progresso ---
+CONSULTA_MAIOR_ID_PONTUACAO = """
+    SELECT MAX(id_pontuacao) FROM TB_MOT_PONTUACAO
+"""
+
+# Pontuações de uma faixa já fora da janela (nenhuma aplicada ainda), somadas por aluno no banco.
+CONSULTA_PONTUACOES_NOVAS_POR_ALUNO = """
+    SELECT id_aluno,
+           COUNT(*)                                     as total_desafios,
+           SUM(CASE WHEN acertou = 1 THEN 1 ELSE 0 END) as desafios_acertados,
+           SUM(pontos)                                  as total_pontos
+    FROM TB_MOT_PONTUACAO
+    WHERE id_pontuacao > :1 AND id_pontuacao <= :2
+    GROUP BY id_aluno
+"""
+
+# Pontuações da janela, uma a uma, para pular as já aplicadas: acima da marca, menos a faixa somada acima.
+CONSULTA_PONTUACOES_JANELA = """
+    SELECT id_pontuacao, id_aluno, acertou, pontos
+    FROM TB_MOT_PONTUACAO
+    WHERE id_pontuacao > :1 AND (id_pontuacao <= :2 OR id_pontuacao > :3)
+"""
+
+registrar_consultas(globals())
+
+CAMINHO_PADRAO = os.path.join('.motus', 'resumo_progresso.sqlite3')
+# Ids de pontuação abaixo do maior id que ainda podem ser confirmados depois (o id vem da sequência
+# no INSERT, não no COMMIT); dentro dessa janela cada pontuação é aplicada pelo id, uma única vez.
+JANELA_IDS_PADRAO = 1000
+
+DDL_RESUMO = """
+CREATE TABLE IF NOT EXISTS totais (
+    id_aluno INTEGER PRIMARY KEY,
+    total_desafios INTEGER NOT NULL,
+    desafios_acertados INTEGER NOT NULL,
+    total_pontos INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aplicadas (
+    id_pontuacao INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+
+class ResumoProgresso:
+    """Totais de desafios, acertos e pontos por aluno, mantidos em SQLite local.
+
+    Abaixo da marca d'água tudo já foi somado. Acima dela fica a janela dos últimos janela_ids
+    ids, onde uma pontuação pode ser confirmada depois de outras com id maior: essas são lidas uma
+    a uma a cada sincronização e os ids já aplicados ficam guardados, para não contar nada duas
+    vezes nem perder as que chegam atrasadas. O que passa da janela sem ter sido aplicado é somado
+    por aluno no próprio banco. Totais, ids aplicados e marca mudam na mesma transação.
+    Pontuações são apenas inseridas pelo sistema; se alguma for alterada ou removida direto no
+    banco, reconstruir() refaz os totais do zero.
+    """
+
+    def __init__(self, caminho=None, janela_ids=None):
+        self.caminho = caminho or os.getenv('MOTUS_RESUMO_PROGRESSO_CAMINHO', CAMINHO_PADRAO)
+        self.janela_ids = janela_ids if janela_ids is not None else ler_inteiro_ambiente(
+            'MOTUS_RESUMO_PROGRESSO_JANELA_IDS', JANELA_IDS_PADRAO)
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.executescript(DDL_RESUMO)
+        self._lock = threading.Lock()
+        identidade = identidade_banco()
+        if self._meta("banco") != identidade:
+            self._limpar()
+            self._conn.execute("INSERT INTO meta (chave, valor) VALUES ('banco', ?)", (identidade,))
+            self._conn.commit()
+
+    def _meta(self, chave, padrao=None):
+        linha = self._conn.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else padrao
+
+    def _limpar(self):
+        self._conn.execute("DELETE FROM totais")
+        self._conn.execute("DELETE FROM aplicadas")
+        self._conn.execute("DELETE FROM meta")
+
+    def sincronizar(self):
+        """Acumula as pontuações novas; retorna quantas foram incorporadas (None se sem conexão)."""
+        with self._lock:
+            marca = int(self._meta("ultimo_id_pontuacao", 0))
+            # Acima de topo nenhuma pontuação foi aplicada; entre a marca e topo, só as de aplicadas.
+            topo = max(marca, self._conn.execute("SELECT MAX(id_pontuacao) FROM aplicadas").fetchone()[0] or 0)
+            with conexao_banco() as conn:
+                if not conn:
+                    return None
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute(CONSULTA_MAIOR_ID_PONTUACAO)
+                        # Abaixo de limite a janela não alcança: a faixa (topo, corte] é somada no banco.
+                        limite = (cursor.fetchone()[0] or 0) - self.janela_ids
+                        corte = max(topo, limite)
+                        somadas = []
+                        if corte > topo:
+                            cursor.execute(CONSULTA_PONTUACOES_NOVAS_POR_ALUNO, (topo, corte))
+                            somadas = cursor.fetchall()
+                        cursor.execute(CONSULTA_PONTUACOES_JANELA, (marca, topo, corte))
+                        janela = cursor.fetchall()
+                except oracledb.DatabaseError as e:
+                    print(f"Erro ao atualizar o resumo de progresso: {e}")
+                    return None
+            aplicadas = {linha[0] for linha in self._conn.execute(
+                "SELECT id_pontuacao FROM aplicadas WHERE id_pontuacao <= ?", (topo,))}
+            novas = [linha for linha in janela if linha[0] not in aplicadas]
+            totais = {}
+            for id_aluno, total, acertos, pontos in somadas:
+                totais[id_aluno] = [total, acertos or 0, pontos or 0]
+            for _, id_aluno, acertou, pontos in novas:
+                atual = totais.setdefault(id_aluno, [0, 0, 0])
+                atual[0] += 1
+                atual[1] += 1 if acertou == 1 else 0
+                atual[2] += pontos or 0
+            with self._conn:
+                self._conn.executemany("""
+                    INSERT INTO totais (id_aluno, total_desafios, desafios_acertados, total_pontos)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (id_aluno) DO UPDATE SET
+                        total_desafios = total_desafios + excluded.total_desafios,
+                        desafios_acertados = desafios_acertados + excluded.desafios_acertados,
+                        total_pontos = total_pontos + excluded.total_pontos
+                """, [(id_aluno, *valores) for id_aluno, valores in totais.items()])
+                marca = max(marca, limite)
+                self._conn.executemany("INSERT INTO aplicadas (id_pontuacao) VALUES (?)",
+                                       [(linha[0],) for linha in novas if linha[0] > marca])
+                self._conn.execute("DELETE FROM aplicadas WHERE id_pontuacao <= ?", (marca,))
+                self._conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('ultimo_id_pontuacao', ?)",
+                                   (str(marca),))
+            return sum(linha[1] for linha in somadas) + len(novas)
+
+    def reconstruir(self):
+        """Descarta os totais e soma todas as pontuações novamente."""
+        with self._lock:
+            identidade = self._meta("banco")
+            with self._conn:
+                self._limpar()
+                self._conn.execute("INSERT INTO meta (chave, valor) VALUES ('banco', ?)", (identidade,))
+        return self.sincronizar()
+
+    def totais(self):
+        """Dicionário id_aluno -> (total_desafios, desafios_acertados, total_pontos)."""
+        with self._lock:
+            return {linha[0]: linha[1:] for linha in self._conn.execute(
+                "SELECT id_aluno, total_desafios, desafios_acertados, total_pontos FROM totais")}
+
+
+_resumo = None
+_resumo_lock = threading.Lock()
+
+
+def obter_resumo_progresso():
+    """Resumo do processo (None se desativado com MOTUS_RESUMO_PROGRESSO=N ou sem disco)."""
+    global _resumo
+    if os.getenv('MOTUS_RESUMO_PROGRESSO', 'S').upper() not in ('S', '1', 'TRUE'):
+        return None
+    if _resumo is None:
+        with _resumo_lock:
+            if _resumo is None:
+                try:
+                    _resumo = ResumoProgresso()
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Resumo de progresso indisponível: {e}")
+                    return None
+    return _resumo
+
+
+def reconstruir_resumo_progresso():
+    """Refaz os totais do zero; retorna quantas pontuações foram somadas (None se desativado ou sem banco)."""
+    resumo = obter_resumo_progresso()
+    return resumo.reconstruir() if resumo else None
+
+
+def totais_progresso():
+    """Sincroniza o resumo e devolve os totais por aluno, ou None se o resumo não puder ser usado."""
+    resumo = obter_resumo_progresso()
+    if not resumo or resumo.sincronizar() is None:
+        return None
+    return resumo.totais()
@@ -0,0 +1,465 @@
+"""Serviço HTTP assíncrono do Motus, executado ao lado do menu interativo do main.py.
+
+Expõe o CRUD de desafios, a geração de aulas com a IA e as exportações como uma API JSON, usando só
+o asyncio da biblioteca padrão. O acesso ao banco e as exportações são bloqueantes e rodam em
+threads (asyncio.to_thread). O número de operações simultâneas é limitado por tipo (banco, IA e
+exportação); quem não consegue vaga em MOTUS_HTTP_ESPERA_S segundos recebe 503.
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import importlib.util
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import oracledb
+from dotenv import load_dotenv
+
+import consultas_json
+import crud_desafios
+import resumo_progresso
+from busca_desafios import buscar_desafios
+from dados_referencia import validar_ids_desafio
+from database import backend_banco, fechar_pool, ler_config_pool
+from metricas import formato_prometheus, incrementar, observar
+
+# --- Configuração do Serviço ---
+# Todos os valores podem ser sobrescritos por variáveis de ambiente MOTUS_HTTP_* (ex.: no arquivo .env).
+CONFIG_HTTP_PADRAO = {
+    "host": "127.0.0.1",
+    "porta": 8080,
+    "concorrencia_banco": None,     # padrão: tamanho máximo do pool (MOTUS_POOL_MAX)
+    "concorrencia_ia": 4,
+    "concorrencia_exportacao": 2,
+    "espera_s": 10,                 # espera máxima por uma vaga antes do 503
+    "ocioso_s": 15,                 # conexões keep-alive sem requisição são fechadas depois disso
+    "corpo_maximo": 1024 * 1024,
+}
+
+# Rotas: (método, caminho, manipulador, limite de concorrência). Os grupos do caminho viram
+# argumentos do manipulador; limite None indica que o manipulador controla as vagas sozinho.
+ROTAS = (
+    ("GET", r"/saude", "saude", None),
+    ("GET", r"/metricas", "metricas", None),
+    ("GET", r"/desafios", "listar_desafios", "banco"),
+    ("GET", r"/desafios/busca", "buscar_desafios", "banco"),
+    ("GET", r"/desafios/(\d+)", "obter_desafio", "banco"),
+    ("POST", r"/desafios", "criar_desafio", "banco"),
+    ("PATCH", r"/desafios/(\d+)", "atualizar_desafio", "banco"),
+    ("DELETE", r"/desafios/(\d+)", "inativar_desafio", "banco"),
+    ("POST", r"/aulas", "gerar_aula", None),
+    ("POST", r"/exportacoes/(desafios_nivel|progresso_alunos|estatisticas_desafios)", "exportar", None),
+    ("POST", r"/exportacoes/incremental/(desafios|pontuacoes)", "exportar_incremental", None),
+    ("POST", r"/resumo_progresso/reconstruir", "reconstruir_resumo_progresso", None),
+)
+_ROTAS = [(metodo, re.compile(caminho + r"/?\Z"), nome, limite) for metodo, caminho, nome, limite in ROTAS]
+
+# Exportações completas: função e formatos aceitos.
+EXPORTADORES = {
+    "desafios_nivel": (consultas_json.exportar_desafios_nivel, tuple(consultas_json.FORMATOS_EXPORTACAO)),
+    "progresso_alunos": (consultas_json.exportar_progresso_alunos, tuple(consultas_json.FORMATOS_EXPORTACAO)),
+    "estatisticas_desafios": (lambda formato: consultas_json.exportar_estatisticas_desafios(), ("json",)),
+}
+
+
+def _ler_config_http():
+    """Lê a configuração do serviço a partir das variáveis de ambiente MOTUS_HTTP_*."""
+    config = {}
+    for chave, padrao in CONFIG_HTTP_PADRAO.items():
+        valor = os.getenv(f"MOTUS_HTTP_{chave.upper()}")
+        if chave == "host":
+            config[chave] = valor or padrao
+        else:
+            config[chave] = int(valor) if valor and valor.strip().isdigit() else padrao
+    if not config["concorrencia_banco"]:
+        config["concorrencia_banco"] = ler_config_pool()["max"]
+    return config
+
+
+class ErroHTTP(Exception):
+    """Erro que vira diretamente uma resposta: status HTTP e corpo {"erro": ..., **detalhes}."""
+
+    def __init__(self, status, mensagem, **detalhes):
+        super().__init__(mensagem)
+        self.status = status
+        self.corpo = dict({"erro": mensagem}, **detalhes)
+
+
+def _json_corpo(corpo, obrigatorio=True):
+    """Decodifica o corpo da requisição como um objeto JSON."""
+    if not corpo:
+        if obrigatorio:
+            raise ErroHTTP(400, "Corpo JSON obrigatório.")
+        return {}
+    try:
+        dados = json.loads(corpo)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ErroHTTP(400, "Corpo da requisição não é um JSON válido.")
+    if not isinstance(dados, dict):
+        raise ErroHTTP(400, "O corpo JSON deve ser um objeto.")
+    return dados
+
+
+def _inteiro(valor, nome, padrao=None):
+    """Converte um parâmetro para int; valores ausentes devolvem o padrão."""
+    if valor in (None, ""):
+        return padrao
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErroHTTP(400, f"{nome} deve ser um número inteiro.")
+
+
+def _booleano(valor, padrao):
+    if valor is None:
+        return padrao
+    if isinstance(valor, bool):
+        return valor
+    return str(valor).strip().upper() in ('S', '1', 'TRUE')
+
+
+class ServicoMotus:
+    """Manipuladores das rotas e limites de concorrência do serviço HTTP."""
+
+    def __init__(self, config=None):
+        self.config = config or _ler_config_http()
+        self.limites = {
+            "banco": self.config["concorrencia_banco"],
+            "ia": self.config["concorrencia_ia"],
+            "exportacao": self.config["concorrencia_exportacao"],
+        }
+        self._semaforos = {tipo: asyncio.Semaphore(limite) for tipo, limite in self.limites.items()}
+        self._em_uso = dict.fromkeys(self.limites, 0)
+        # Arquivos e marcas d'água são por tipo de exportação: duas execuções do mesmo tipo não se sobrepõem.
+        self._travas_exportacao = {}
+        self._gerador = None
+        self._gerador_lock = asyncio.Lock()
+
+    @contextlib.asynccontextmanager
+    async def _vaga(self, tipo):
+        """Reserva uma vaga do limite 'tipo', esperando no máximo espera_s segundos."""
+        semaforo = self._semaforos[tipo]
+        if semaforo.locked():
+            try:
+                await asyncio.wait_for(semaforo.acquire(), self.config["espera_s"])
+            except asyncio.TimeoutError:
+                incrementar("motus_http_rejeitadas_total", limite=tipo)
+                raise ErroHTTP(503, f"Serviço ocupado ({tipo}); tente novamente em instantes.")
+        else:
+            await semaforo.acquire()
+        self._em_uso[tipo] += 1
+        try:
+            yield
+        finally:
+            self._em_uso[tipo] -= 1
+            semaforo.release()
+
+    async def _no_banco(self, funcao, *args):
+        """Executa uma função bloqueante de acesso ao banco em uma thread, dentro do limite 'banco'."""
+        async with self._vaga("banco"):
+            return await asyncio.to_thread(funcao, *args)
+
+    async def _obter_gerador(self):
+        """Gerador de conteúdo compartilhado, criado (e o ia_educacao importado) na primeira aula."""
+        async with self._gerador_lock:
+            if self._gerador is None or not self._gerador.client:
+                modulo = await asyncio.to_thread(importlib.import_module, "ia_educacao")
+                self._gerador = await asyncio.to_thread(modulo.GeradorConteudoMotus)
+        if not self._gerador.client:
+            raise ErroHTTP(503, "Cliente Gemini não inicializado; verifique a GEMINI_API_KEY.")
+        return self._gerador
+
+    # --- Roteamento ---
+
+    def localizar(self, metodo, caminho):
+        """Retorna (manipulador, limite, argumentos) da rota; levanta 404 ou 405."""
+        permitidos = []
+        for metodo_rota, padrao, nome, limite in _ROTAS:
+            encontrado = padrao.match(caminho)
+            if not encontrado:
+                continue
+            if metodo_rota == metodo:
+                return nome, limite, encontrado.groups()
+            permitidos.append(metodo_rota)
+        if permitidos:
+            raise ErroHTTP(405, f"Método {metodo} não permitido nesta rota.", permitidos=permitidos)
+        raise ErroHTTP(404, "Rota não encontrada.")
+
+    async def executar(self, nome, limite, argumentos, consulta, corpo):
+        """Chama o manipulador da rota (dentro do limite, se houver); retorna (status, corpo)."""
+        manipulador = getattr(self, nome)
+        if limite is None:
+            return await manipulador(consulta, corpo, *argumentos)
+        async with self._vaga(limite):
+            return await manipulador(consulta, corpo, *argumentos)
+
+    # --- Manipuladores ---
+
+    async def saude(self, consulta, corpo):
+        ocupacao = {tipo: f"{self._em_uso[tipo]}/{limite}" for tipo, limite in self.limites.items()}
+        return 200, {"status": "ok", "banco": backend_banco(), "ocupacao": ocupacao}
+
+    async def metricas(self, consulta, corpo):
+        return 200, formato_prometheus()
+
+    async def listar_desafios(self, consulta, corpo):
+        """Página de desafios por chave: ?apos_id= ou ?antes_id=, com filtros id_nivel, id_area, ativo (S/N/T) e tamanho."""
+        ativo = (consulta.get("ativo") or 'S').upper()
+        if ativo not in ('S', 'N', 'T'):
+            raise ErroHTTP(400, "ativo deve ser S, N ou T.")
+        filtros = {
+            "id_nivel": _inteiro(consulta.get("id_nivel"), "id_nivel"),
+            "id_area": _inteiro(consulta.get("id_area"), "id_area"),
+            "ativo": None if ativo == 'T' else ativo,
+            "tamanho": _inteiro(consulta.get("tamanho"), "tamanho", crud_desafios.TAMANHO_PAGINA_PADRAO),
+        }
+        apos_id = _inteiro(consulta.get("apos_id"), "apos_id", 0)
+        antes_id = _inteiro(consulta.get("antes_id"), "antes_id")
+        desafios, ha_mais = await asyncio.to_thread(crud_desafios.listar_pagina_desafios, filtros, apos_id, antes_id)
+        return 200, {
+            "desafios": desafios,
+            "ha_mais": ha_mais,
+            "primeiro_id": desafios[0]["id_desafio"] if desafios else None,
+            "ultimo_id": desafios[-1]["id_desafio"] if desafios else None,
+        }
+
+    async def buscar_desafios(self, consulta, corpo):
+        texto = (consulta.get("q") or "").strip()
+        if not texto:
+            raise ErroHTTP(400, "Informe o parâmetro q com as palavras da busca.")
+        limite = max(1, min(_inteiro(consulta.get("limite"), "limite", 10), 100))
+        resultados = await asyncio.to_thread(buscar_desafios, texto, limite,
+                                             _booleano(consulta.get("ativos"), False))
+        return 200, {"resultados": [
+            {"id_desafio": id_desafio, "titulo": titulo, "ativo": ativo, "relevancia": round(pontuacao, 4)}
+            for id_desafio, titulo, ativo, pontuacao in resultados
+        ]}
+
+    async def obter_desafio(self, consulta, corpo, id_desafio):
+        desafio = await asyncio.to_thread(crud_desafios.obter_desafio, int(id_desafio))
+        if desafio is None:
+            raise ErroHTTP(404, f"Desafio {id_desafio} não encontrado.")
+        return 200, desafio
+
+    async def criar_desafio(self, consulta, corpo):
+        id_desafio = await asyncio.to_thread(crud_desafios.criar_desafio_dados, _json_corpo(corpo))
+        return 201, {"id_desafio": id_desafio}
+
+    async def atualizar_desafio(self, consulta, corpo, id_desafio):
+        desafio = await asyncio.to_thread(crud_desafios.atualizar_desafio_dados, int(id_desafio), _json_corpo(corpo))
+        if desafio is None:
+            raise ErroHTTP(404, f"Desafio {id_desafio} não encontrado.")
+        return 200, desafio
+
+    async def inativar_desafio(self, consulta, corpo, id_desafio):
+        resultado = await asyncio.to_thread(crud_desafios.inativar_desafio, int(id_desafio))
+        if resultado is None:
+            raise ErroHTTP(404, f"Desafio {id_desafio} não encontrado.")
+        return 200, resultado
+
+    async def gerar_aula(self, consulta, corpo):
+        """Gera a aula de um tema com a IA e grava os desafios (gerar_conteudo_educacional + salvamento).
+
+        Corpo: tema, id_voluntario, id_area e, opcionais, usar_cache, forcar_atualizacao e
+        permitir_similares. Temas parecidos com conteúdo existente recebem 409, como no menu.
+        """
+        dados = _json_corpo(corpo)
+        tema = str(dados.get("tema") or "").strip()
+        if not tema:
+            raise ErroHTTP(400, "Campo obrigatório ausente: tema")
+        id_voluntario = _inteiro(dados.get("id_voluntario"), "id_voluntario")
+        id_area = _inteiro(dados.get("id_area"), "id_area")
+        if id_voluntario is None or id_area is None:
+            raise ErroHTTP(400, "Campos obrigatórios: id_voluntario e id_area.")
+        usar_cache = _booleano(dados.get("usar_cache"), True)
+        forcar_atualizacao = _booleano(dados.get("forcar_atualizacao"), False)
+        permitir_similares = _booleano(dados.get("permitir_similares"), False)
+
+        # Valida os IDs antes de gastar cota da IA.
+        erros = await self._no_banco(validar_ids_desafio, None, id_voluntario, id_area)
+        if erros:
+            raise ErroHTTP(400, "; ".join(erros))
+        gerador = await self._obter_gerador()
+        em_cache = usar_cache and not forcar_atualizacao and await asyncio.to_thread(gerador.conteudo_em_cache, tema)
+        if not permitir_similares and not em_cache:
+            similares = await self._no_banco(gerador.temas_similares, tema)
+            if similares:
+                raise ErroHTTP(409, "Tema parecido com conteúdo já existente.", similares=similares)
+
+        async with self._vaga("ia"):
+            try:
+                conteudo = await gerador.gerar_conteudo_educacional_async(tema, usar_cache, forcar_atualizacao)
+            except Exception as e:
+                raise ErroHTTP(502, f"Erro na API Gemini: {e}")
+        if not conteudo:
+            raise ErroHTTP(502, "Resposta da IA sem JSON válido.")
+
+        resultado = await self._no_banco(gerador.salvar_aulas_em_lote, [(tema, conteudo)], id_voluntario, id_area,
+                                         permitir_similares)
+        if "erro_banco" in resultado:
+            raise ErroHTTP(503, "Falha ao gravar os desafios no banco.", falhas=resultado["falhas"])
+        return 201, {"tema": tema, "exercicios": conteudo, "salvos": resultado["salvos"],
+                     "falhas": resultado["falhas"]}
+
+    async def _exportacao(self, chave, funcao, *args):
+        """Roda a exportação em uma thread, uma por tipo por vez e dentro do limite 'exportacao'."""
+        trava = self._travas_exportacao.setdefault(chave, asyncio.Lock())
+        async with trava, self._vaga("exportacao"):
+            inicio = time.perf_counter()
+            resultado = await asyncio.to_thread(funcao, *args)
+            return resultado, round((time.perf_counter() - inicio) * 1000, 1)
+
+    async def exportar(self, consulta, corpo, tipo):
+        """Exportação completa; corpo opcional {"formato": ...} (padrão json)."""
+        funcao, formatos = EXPORTADORES[tipo]
+        formato = _json_corpo(corpo, obrigatorio=False).get("formato") or "json"
+        if formato not in formatos:
+            raise ErroHTTP(400, f"Formato não suportado para {tipo}: {formato}", formatos=list(formatos))
+        dependencia = consultas_json.DEPENDENCIAS_FORMATOS.get(formato)
+        if dependencia and importlib.util.find_spec(dependencia.split(".")[0]) is None:
+            pacote = dependencia.split(".")[0]
+            raise ErroHTTP(400, f"Formato {formato} indisponível: instale o pacote {pacote}.")
+        nome_arquivo, duracao_ms = await self._exportacao(tipo, funcao, formato)
+        if not nome_arquivo:
+            raise ErroHTTP(500, "A exportação não foi gerada; consulte o log do serviço.")
+        return 201, {"arquivo": nome_arquivo, "formato": formato, "tamanho_bytes": os.path.getsize(nome_arquivo),
+                     "duracao_ms": duracao_ms}
+
+    async def exportar_incremental(self, consulta, corpo, tipo):
+        resultado, duracao_ms = await self._exportacao(f"incremental_{tipo}", consultas_json.exportar_incremental, tipo)
+        if resultado is None:
+            raise ErroHTTP(500, "A exportação não foi gerada; consulte o log do serviço.")
+        nome_arquivo, novas = resultado
+        return 201, {"arquivo": nome_arquivo, "linhas_novas": novas, "duracao_ms": duracao_ms}
+
+    async def reconstruir_resumo_progresso(self, consulta, corpo):
+        """Refaz do zero os totais por aluno usados na exportação de progresso."""
+        somadas, duracao_ms = await self._exportacao("resumo_progresso", resumo_progresso.reconstruir_resumo_progresso)
+        if somadas is None:
+            raise ErroHTTP(503, "O resumo de progresso está desativado ou o banco está indisponível.")
+        return 200, {"pontuacoes_somadas": somadas, "duracao_ms": duracao_ms}
+
+    # --- Protocolo HTTP/1.1 ---
+
+    async def atender(self, reader, writer):
+        """Atende uma conexão, com keep-alive, até o cliente fechar ou ficar ocioso."""
+        try:
+            manter = True
+            while manter:
+                try:
+                    cabecalho = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.config["ocioso_s"])
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._responder(writer, 431, {"erro": "Cabeçalhos grandes demais."}, False)
+                    break
+                manter = await self._processar(reader, writer, cabecalho)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _processar(self, reader, writer, cabecalho):
+        """Lê o corpo, executa a rota e responde; retorna se a conexão deve continuar aberta."""
+        linhas = cabecalho.decode("latin-1").split("\r\n")
+        try:
+            metodo, alvo, versao = linhas[0].split(" ")
+        except ValueError:
+            await self._responder(writer, 400, {"erro": "Linha de requisição inválida."}, False)
+            return False
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if ":" in linha:
+                nome, valor = linha.split(":", 1)
+                cabecalhos[nome.strip().lower()] = valor.strip()
+        conexao = cabecalhos.get("connection", "").lower()
+        manter = conexao == "keep-alive" if versao == "HTTP/1.0" else conexao != "close"
+
+        if "transfer-encoding" in cabecalhos:
+            await self._responder(writer, 411, {"erro": "Envie o corpo com Content-Length."}, False)
+            return False
+        tamanho = cabecalhos.get("content-length", "0")
+        if not tamanho.isdigit():
+            await self._responder(writer, 400, {"erro": "Content-Length inválido."}, False)
+            return False
+        if int(tamanho) > self.config["corpo_maximo"]:
+            await self._responder(writer, 413, {"erro": "Corpo da requisição grande demais."}, False)
+            return False
+        corpo = await reader.readexactly(int(tamanho)) if int(tamanho) else b""
+
+        partes = urlsplit(alvo)
+        consulta = {chave: valores[-1] for chave, valores in parse_qs(partes.query).items()}
+        inicio = time.perf_counter()
+        rota = "desconhecida"
+        try:
+            rota, limite, argumentos = self.localizar(metodo, partes.path)
+            status, resposta = await self.executar(rota, limite, argumentos, consulta, corpo)
+        except ErroHTTP as e:
+            status, resposta = e.status, e.corpo
+        except ValueError as e:
+            status, resposta = 400, {"erro": str(e)}
+        except RuntimeError as e:
+            status, resposta = 503, {"erro": str(e)}
+        except oracledb.Error as e:
+            print(f"Erro de banco de dados em {metodo} {partes.path}: {e}")
+            status, resposta = 500, {"erro": "Erro de banco de dados."}
+        except Exception as e:
+            print(f"Erro inesperado em {metodo} {partes.path}: {e}")
+            status, resposta = 500, {"erro": "Erro interno do serviço."}
+        observar("motus_http_segundos", time.perf_counter() - inicio, rota=rota, status=str(status))
+        await self._responder(writer, status, resposta, manter)
+        return manter
+
+    async def _responder(self, writer, status, resposta, manter):
+        if isinstance(resposta, str):
+            dados, tipo = resposta.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            dados, tipo = json.dumps(resposta, ensure_ascii=False, default=str).encode("utf-8"), "application/json"
+        cabecalho = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: {tipo}\r\n"
+            f"Content-Length: {len(dados)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n"
+        )
+        writer.write(cabecalho.encode("latin-1") + dados)
+        await writer.drain()
+
+
+async def servir(host=None, porta=None):
+    """Inicia o serviço e atende até ser interrompido."""
+    config = _ler_config_http()
+    servico = ServicoMotus(config)
+    # As threads de to_thread nunca passam da soma dos limites; o restante espera nos semáforos.
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=sum(servico.limites.values()), thread_name_prefix="motus-http"))
+    servidor = await asyncio.start_server(servico.atender, host or config["host"], porta or config["porta"])
+    enderecos = ", ".join(f"{socket.getsockname()[0]}:{socket.getsockname()[1]}" for socket in servidor.sockets)
+    print(f"Serviço HTTP do Motus em {enderecos} (banco: {backend_banco()}, limites: {servico.limites})")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(argumentos=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serviço HTTP do Sistema de Educação Adaptativa.")
+    parser.add_argument("--host", help="Endereço de escuta (padrão: MOTUS_HTTP_HOST ou 127.0.0.1)")
+    parser.add_argument("--porta", type=int, help="Porta de escuta (padrão: MOTUS_HTTP_PORTA ou 8080)")
+    args = parser.parse_args(argumentos)
+    try:
+        asyncio.run(servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        print("Serviço encerrado.")
+    finally:
+        fechar_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import re
+import sqlite3
+
+import banco_sqlite
+import busca_desafios
+import consultas_json
+import crud_desafios
+import dados_referencia
+import resumo_progresso
+from metricas import _nomes_consultas
+
+MODULOS_COM_SQL = (busca_desafios, consultas_json, crud_desafios, dados_referencia, resumo_progresso)
+
+
+def _parametros(sql):
+    """Binds nulos no formato que o sqlite3 espera para o SQL já traduzido."""
+    posicionais = [int(numero) for numero in re.findall(r"\?(\d+)", sql)]
+    if posicionais:
+        return [None] * max(posicionais)
+    return {nome: None for nome in re.findall(r"(?<!:):(\w+)", sql)}
+
+
+def test_todas_as_consultas_registradas_compilam_no_sqlite(banco_local):
+    consultas = {nome: sql for sql, nome in _nomes_consultas.items()}
+    for modulo in MODULOS_COM_SQL:
+        assert any(sql in _nomes_consultas for sql in vars(modulo).values() if isinstance(sql, str)), modulo
+    conn = sqlite3.connect(banco_local)
+    try:
+        for nome, sql in sorted(consultas.items()):
+            traduzido, sequencia, _ = banco_sqlite.traduzir_sql(sql)
+            if sequencia:
+                assert sequencia in banco_sqlite.SEQUENCIAS, nome
+                continue
+            # EXPLAIN prepara o comando (sintaxe, tabelas e colunas) sem executá-lo.
+            conn.execute("EXPLAIN " + traduzido, _parametros(traduzido)).fetchall()
+    except sqlite3.Error as e:
+        raise AssertionError(f"{nome} não roda no SQLite: {e}\n{traduzido}")
+    finally:
+        conn.close()
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+import busca_desafios
+
+
+@pytest.fixture
+def indice(banco_local, monkeypatch):
+    indice = busca_desafios.obter_indice()
+    assert indice.sincronizar() > 0
+
+    def reconstruir():
+        raise AssertionError("o índice não deveria ser reconstruído")
+    monkeypatch.setattr(indice, "reconstruir", reconstruir)
+    return indice
+
+
+def _documentos(indice):
+    return {linha[0] for linha in indice._conn.execute("SELECT id_desafio FROM documentos")}
+
+
+def test_tabela_sem_mudancas_nao_reindexa(indice):
+    assert indice.sincronizar() == 0
+    assert indice.conferir(forcar=True) == 0
+
+
+def test_busca_encontra_desafio_novo(indice, banco_local):
+    conn = sqlite3.connect(banco_local)
+    conn.execute("INSERT INTO TB_MOT_DESAFIO (titulo, descricao, resposta_correta, ativo, id_nivel_dificuldade, "
+                 "id_voluntario_criador, id_area_competencia) VALUES ('Geometria das pipas', 'Ângulos', 'r', 'S', 1, 1, 1)")
+    conn.commit()
+    conn.close()
+    resultados = busca_desafios.buscar_desafios("pipa")
+    assert [titulo for _, titulo, _, _ in resultados] == ["Geometria das pipas"]
+
+
+def test_conferir_acerta_so_apagados_e_atrasados(indice, banco_local):
+    ids = sorted(_documentos(indice))
+    apagado, atrasado = ids[0], ids[1]
+    conn = sqlite3.connect(banco_local)
+    # O "atrasado" some do índice como se nunca tivesse sido lido e volta a existir no banco.
+    indice._remover(atrasado)
+    indice._conn.commit()
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute("DELETE FROM TB_MOT_PONTUACAO WHERE id_desafio = ?", (apagado,))
+    conn.execute("DELETE FROM TB_MOT_DESAFIO WHERE id_desafio = ?", (apagado,))
+    conn.commit()
+    conn.close()
+
+    assert indice.conferir(forcar=True) == 2
+    assert _documentos(indice) == set(ids) - {apagado}
+    assert indice.conferir(forcar=True) == 0
+
+
+def test_conferir_respeita_intervalo(indice, banco_local, monkeypatch):
+    assert indice.intervalo_verificacao == busca_desafios.INTERVALO_VERIFICACAO_PADRAO
+    indice.conferir(forcar=True)
+    monkeypatch.setattr(indice, "_meta", lambda *args: pytest.fail("conferir leu o índice dentro do intervalo"))
+    assert indice.conferir() == 0
@@ -0,0 +1,74 @@
+import json
+import sqlite3
+
+import consultas_json
+
+COLUNAS_PONTUACAO = "id_pontuacao, id_aluno, id_desafio, acertou, pontos"
+
+
+def _inserir_pontuacao(caminho, id_pontuacao):
+    conn = sqlite3.connect(caminho)
+    modelo = conn.execute(f"SELECT {COLUNAS_PONTUACAO} FROM TB_MOT_PONTUACAO ORDER BY id_pontuacao").fetchone()
+    conn.execute(f"INSERT INTO TB_MOT_PONTUACAO ({COLUNAS_PONTUACAO}) VALUES (?, ?, ?, ?, ?)",
+                 (id_pontuacao,) + modelo[1:])
+    conn.commit()
+    conn.close()
+
+
+def _ids_exportados(nome_arquivo):
+    with open(nome_arquivo, encoding='utf-8') as arquivo:
+        return [json.loads(linha)["id_pontuacao"] for linha in arquivo]
+
+
+def test_incremental_sem_novidades_nao_acrescenta(banco_local):
+    nome_arquivo, novas = consultas_json.exportar_incremental("pontuacoes")
+    assert novas == 300
+    assert consultas_json.exportar_incremental("pontuacoes") == (nome_arquivo, 0)
+    assert _ids_exportados(nome_arquivo) == list(range(1, 301))
+
+
+def test_incremental_exporta_id_atrasado_uma_vez(banco_local, monkeypatch):
+    monkeypatch.setenv('MOTUS_EXPORTACAO_JANELA_IDS', '50')
+    consultas_json.exportar_incremental("pontuacoes")
+    # O id 302 é confirmado antes do 301: a marca passa do 301 antes de ele existir.
+    _inserir_pontuacao(banco_local, 302)
+    nome_arquivo, novas = consultas_json.exportar_incremental("pontuacoes")
+    assert novas == 1
+    _inserir_pontuacao(banco_local, 301)
+    assert consultas_json.exportar_incremental("pontuacoes") == (nome_arquivo, 1)
+    assert consultas_json.exportar_incremental("pontuacoes") == (nome_arquivo, 0)
+    assert _ids_exportados(nome_arquivo) == list(range(1, 301)) + [302, 301]
+
+
+def test_incremental_ignora_janela_invalida(banco_local, monkeypatch):
+    monkeypatch.setenv('MOTUS_EXPORTACAO_JANELA_IDS', 'mil')
+    _, novas = consultas_json.exportar_incremental("pontuacoes")
+    assert novas == 300
+
+
+def test_estatisticas_agrupadas_iguais_as_tres_consultas(banco_local):
+    from benchmark import CONSULTAS_ESTATISTICAS_SEPARADAS
+    consulta_geral, consulta_niveis, consulta_areas = CONSULTAS_ESTATISTICAS_SEPARADAS
+    conn = sqlite3.connect(banco_local)
+    conn.execute("UPDATE TB_MOT_DESAFIO SET ativo = 'N' WHERE id_desafio % 4 = 0")
+    conn.commit()
+    geral = conn.execute(consulta_geral).fetchone()
+    niveis = conn.execute(consulta_niveis).fetchall()
+    areas = conn.execute(consulta_areas).fetchall()
+    conn.close()
+
+    grupos, _ = consultas_json._consultar_desafios_agrupados()
+    estatisticas = consultas_json._agregar_estatisticas(grupos, *consultas_json._referencias_para_grupos(grupos))
+    gerais = estatisticas["estatisticas_gerais"]
+    assert (gerais["total_desafios"], gerais["desafios_ativos"], gerais["desafios_inativos"],
+            gerais["areas_diferentes"], gerais["niveis_diferentes"]) == geral
+    assert [(item["nivel"], item["total"]) for item in estatisticas["desafios_por_nivel"]] == niveis
+    assert sorted((item["area"], item["total"]) for item in estatisticas["desafios_por_area"]) == areas
+
+
+def test_grupo_sem_nivel_ou_area_nao_conta_como_diferente():
+    grupos = [(1, 10, 'S', 3), (None, 10, 'S', 2), (1, None, 'N', 1)]
+    estatisticas = consultas_json._agregar_estatisticas(grupos, [(1, "BASICO", 1)], [(10, "ALGEBRA", "Álgebra")])
+    gerais = estatisticas["estatisticas_gerais"]
+    assert (gerais["total_desafios"], gerais["areas_diferentes"], gerais["niveis_diferentes"]) == (6, 1, 1)
+    assert {"nivel": None, "id_nivel": None, "total": 2} in estatisticas["desafios_por_nivel"]
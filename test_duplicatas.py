@@ -0,0 +1,108 @@
+import random
+import sqlite3
+from array import array
+
+import duplicatas
+from duplicatas import BANDAS, LIMIAR_TEMA_PADRAO, LINHAS_POR_BANDA, NUM_POSICOES, calcular_assinatura
+
+
+def _probabilidade_candidato(similaridade):
+    return 1 - (1 - similaridade ** LINHAS_POR_BANDA) ** BANDAS
+
+
+def _par_com_jaccard(gerador, similaridade, comuns=40):
+    """Dois textos cujos conjuntos de shingles têm Jaccard próximo de similaridade."""
+    # Um trecho comum de comuns termos (comuns termos + comuns - 1 bigramas iguais) seguido de
+    # exclusivos termos próprios em cada texto (cada um com o seu bigrama): J = 2c-1 / (2c-1 + 4e).
+    iguais = 2 * comuns - 1
+    exclusivos = round(iguais * (1 / similaridade - 1) / 4)
+    base = [f"termo{gerador.getrandbits(48):x}" for _ in range(comuns)]
+    a = base + [f"a{gerador.getrandbits(48):x}" for _ in range(exclusivos)]
+    b = base + [f"b{gerador.getrandbits(48):x}" for _ in range(exclusivos)]
+    return " ".join(a), " ".join(b)
+
+
+def _jaccard(texto_a, texto_b):
+    a, b = duplicatas.shingles(texto_a), duplicatas.shingles(texto_b)
+    return len(a & b) / len(a | b)
+
+
+def test_bandas_cobrem_a_assinatura():
+    assert BANDAS * LINHAS_POR_BANDA == NUM_POSICOES
+
+
+def test_limiar_lsh_abaixo_do_limiar_de_similaridade():
+    assert (1 / BANDAS) ** (1 / LINHAS_POR_BANDA) < LIMIAR_TEMA_PADRAO
+    assert _probabilidade_candidato(LIMIAR_TEMA_PADRAO) >= 0.95
+
+
+def test_recall_no_limiar(tmp_path, monkeypatch):
+    monkeypatch.setattr(duplicatas, "identidade_banco", lambda: "teste")
+    indice = duplicatas.IndiceDuplicatas(caminho=str(tmp_path / "indice.sqlite3"))
+    gerador = random.Random(42)
+    pares = [_par_com_jaccard(gerador, LIMIAR_TEMA_PADRAO) for _ in range(300)]
+    for texto_a, texto_b in pares:
+        assert abs(_jaccard(texto_a, texto_b) - LIMIAR_TEMA_PADRAO) < 0.05
+    indice.adicionar_desafios([(id_par, f"par {id_par}", calcular_assinatura(texto_a))
+                               for id_par, (texto_a, _) in enumerate(pares, 1)])
+    # Com limiar 0 a consulta devolve todos os candidatos do LSH: mede só se o par chegou a ser comparado.
+    encontrados = sum(
+        any(item["id_desafio"] == id_par for item in indice.similares(texto_b, tipo='desafio', limiar=0, limite=len(pares)))
+        for id_par, (_, texto_b) in enumerate(pares, 1))
+    assert encontrados / len(pares) >= 0.95
+
+
+def test_migra_assinaturas_de_outro_tamanho(tmp_path, monkeypatch):
+    monkeypatch.setattr(duplicatas, "identidade_banco", lambda: "teste")
+    caminho = str(tmp_path / "indice.sqlite3")
+    conn = sqlite3.connect(caminho)
+    conn.executescript(duplicatas.DDL_DUPLICATAS)
+    antiga = array('Q', range(64)).tobytes()
+    conn.executemany("INSERT INTO assinaturas VALUES (?, ?, ?, ?)",
+                     [('tema', 'porcentagem futebol', 'Porcentagem no futebol', antiga),
+                      ('desafio', '7', 'Frações', antiga)])
+    conn.execute("INSERT INTO meta VALUES ('banco', 'teste')")
+    conn.execute("INSERT INTO meta VALUES ('ultimo_id', '7')")
+    conn.commit()
+    conn.close()
+
+    indice = duplicatas.IndiceDuplicatas(caminho=caminho)
+    assert indice.estatisticas()["desafios"] == 0
+    assert indice.similares("Porcentagem no futebol", tipo='tema')[0]["similaridade"] == 1.0
+    assert indice._conn.execute("SELECT valor FROM meta WHERE chave = 'ultimo_id'").fetchone() is None
+
+
+def _criar_desafio(titulo, descricao):
+    import crud_desafios
+    return crud_desafios.criar_desafio_dados({
+        "titulo": titulo, "descricao": descricao, "resposta_correta": "r", "id_nivel_dificuldade": 1,
+        "id_voluntario_criador": 1, "id_area_competencia": 1})
+
+
+def test_tema_encontra_desafio_existente_pelo_titulo(banco_local):
+    descricao = "Explicação com analogia do dia a dia sobre descontos, preços e troco. " * 6
+    id_desafio = _criar_desafio("Porcentagem nas compras do mercado", descricao)
+    tema = "Porcentagem no mercado"
+    # Contra o texto inteiro do desafio, a similaridade de Jaccard do tema fica longe do limiar.
+    assert _jaccard(tema, f"Porcentagem nas compras do mercado\n{descricao}") < LIMIAR_TEMA_PADRAO / 4
+
+    similares = duplicatas.temas_similares(tema)
+    assert [(item["tipo"], item["id_desafio"]) for item in similares] == [('desafio', id_desafio)]
+    assert similares[0]["similaridade"] >= LIMIAR_TEMA_PADRAO
+
+
+def test_tema_encontra_tema_ja_gerado(banco_local):
+    duplicatas.obter_indice_duplicatas().registrar_tema("Frações na cozinha da vovó")
+    similares = duplicatas.temas_similares("Frações na cozinha")
+    assert [(item["tipo"], item["descricao"]) for item in similares] == [('tema', "Frações na cozinha da vovó")]
+
+
+def test_desafio_inativado_sai_do_indice(banco_local):
+    import crud_desafios
+    id_desafio = _criar_desafio("Probabilidade no lançamento de dados", "Quantas faces tem um dado comum?")
+    assert [item["id_desafio"] for item in duplicatas.temas_similares("Probabilidade com dados")] == [id_desafio]
+
+    crud_desafios.inativar_desafio(id_desafio)
+    assert duplicatas.temas_similares("Probabilidade com dados") == []
+    assert duplicatas.obter_indice_duplicatas().similares(
+        "Probabilidade no lançamento de dados\nQuantas faces tem um dado comum?", tipo='desafio') == []
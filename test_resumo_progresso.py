@@ -0,0 +1,49 @@
+import random
+import sqlite3
+
+import resumo_progresso
+
+COLUNAS_PONTUACAO = "id_pontuacao, id_aluno, id_desafio, acertou, pontos"
+
+
+def _totais_no_banco(conn):
+    return {linha[0]: linha[1:] for linha in conn.execute(
+        "SELECT id_aluno, COUNT(*), SUM(CASE WHEN acertou = 1 THEN 1 ELSE 0 END), SUM(pontos) "
+        "FROM TB_MOT_PONTUACAO GROUP BY id_aluno")}
+
+
+def test_sincronizar_sem_novidades_nao_soma(banco_local):
+    resumo = resumo_progresso.ResumoProgresso()
+    assert resumo.sincronizar() == 300
+    assert resumo.sincronizar() == 0
+
+
+def test_id_atrasado_na_janela_conta_uma_vez(banco_local):
+    conn = sqlite3.connect(banco_local)
+    modelos = conn.execute(f"SELECT {COLUNAS_PONTUACAO} FROM TB_MOT_PONTUACAO").fetchall()
+    resumo = resumo_progresso.ResumoProgresso(janela_ids=50)
+    resumo.sincronizar()
+    gerador = random.Random(3)
+    proximo, pendentes = 301, []
+    # Ids reservados em ordem e confirmados fora de ordem, nunca mais de 40 ids atrás do maior.
+    for _ in range(30):
+        reservados = gerador.randint(0, 15)
+        pendentes += range(proximo, proximo + reservados)
+        proximo += reservados
+        gerador.shuffle(pendentes)
+        corte = gerador.randint(0, len(pendentes))
+        confirmados, pendentes = pendentes[:corte], pendentes[corte:]
+        confirmados += [i for i in pendentes if i < proximo - 40]
+        pendentes = [i for i in pendentes if i >= proximo - 40]
+        for id_pontuacao in confirmados:
+            conn.execute(f"INSERT INTO TB_MOT_PONTUACAO ({COLUNAS_PONTUACAO}) VALUES (?, ?, ?, ?, ?)",
+                         (id_pontuacao,) + gerador.choice(modelos)[1:])
+        conn.commit()
+        resumo.sincronizar()
+        assert resumo.totais() == _totais_no_banco(conn)
+    conn.close()
+
+
+def test_janela_invalida_usa_o_padrao(banco_local, monkeypatch):
+    monkeypatch.setenv('MOTUS_RESUMO_PROGRESSO_JANELA_IDS', '1e3')
+    assert resumo_progresso.obter_resumo_progresso().janela_ids == resumo_progresso.JANELA_IDS_PADRAO